@@ -19,14 +19,74 @@ class Settings(BaseSettings):
     FIREBASE_AUTH_URI: str = os.getenv("FIREBASE_AUTH_URI", "https://accounts.google.com/o/oauth2/auth")
     FIREBASE_TOKEN_URI: str = os.getenv("FIREBASE_TOKEN_URI", "https://oauth2.googleapis.com/token")
     FIREBASE_CLIENT_CERT_URL: str = os.getenv("FIREBASE_CLIENT_CERT_URL", "")
+    # Decoded ID tokens kept in memory until they expire
+    FIREBASE_TOKEN_CACHE_SIZE: int = int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", "10000"))
     
     # JWT Configuration (still needed for custom tokens)
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # bcrypt cost factor; stored hashes at another cost are rehashed on the next login
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Threads hashing/verifying passwords concurrently per worker
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    # One-time passwords: lifetime, wrong guesses allowed, and Firestore write-through for multi-worker setups
+    OTP_TTL_SECONDS: int = int(os.getenv("OTP_TTL_SECONDS", "600"))
+    OTP_MAX_ATTEMPTS: int = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+    OTP_WRITE_THROUGH: bool = os.getenv("OTP_WRITE_THROUGH", "False").lower() == "true"
+    # Background cleanup of expired Firestore data: run interval (0 disables), deletes per batch and per run
+    MAINTENANCE_INTERVAL_SECONDS: int = int(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "900"))
+    MAINTENANCE_BATCH_SIZE: int = int(os.getenv("MAINTENANCE_BATCH_SIZE", "500"))
+    MAINTENANCE_MAX_DELETES_PER_RUN: int = int(os.getenv("MAINTENANCE_MAX_DELETES_PER_RUN", "5000"))
+    # Age after which connection-test documents are deleted
+    MAINTENANCE_TEST_RETENTION_DAYS: int = int(os.getenv("MAINTENANCE_TEST_RETENTION_DAYS", "7"))
     
     # Google AI Configuration
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
+    # Maximum number of Gemini calls allowed in flight at once per worker
+    GEMINI_MAX_CONCURRENCY: int = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+    # Gemini quota budgets and scheduling
+    GEMINI_RPM_LIMIT: int = int(os.getenv("GEMINI_RPM_LIMIT", "15"))
+    GEMINI_TPM_LIMIT: int = int(os.getenv("GEMINI_TPM_LIMIT", "1000000"))
+    GEMINI_EXPECTED_OUTPUT_TOKENS: int = int(os.getenv("GEMINI_EXPECTED_OUTPUT_TOKENS", "2000"))
+    GEMINI_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "20"))
+    GEMINI_MAX_RETRIES: int = int(os.getenv("GEMINI_MAX_RETRIES", "2"))
+    # "html" (Gemini writes the HTML) or "structured" (Gemini returns JSON, rendered server-side)
+    GEMINI_RESPONSE_MODE: str = os.getenv("GEMINI_RESPONSE_MODE", "html").lower()
+
+    # Diagnosis cache (in-memory LRU backed by a local SQLite file)
+    DIAGNOSIS_CACHE_PATH: str = os.getenv("DIAGNOSIS_CACHE_PATH", "cache/diagnosis_cache.sqlite")
+    DIAGNOSIS_CACHE_TTL_SECONDS: int = int(os.getenv("DIAGNOSIS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    DIAGNOSIS_CACHE_MEMORY_ENTRIES: int = int(os.getenv("DIAGNOSIS_CACHE_MEMORY_ENTRIES", "512"))
+    DIAGNOSIS_CACHE_DISK_ENTRIES: int = int(os.getenv("DIAGNOSIS_CACHE_DISK_ENTRIES", "20000"))
+
+    # Diagnosis history write-behind queue (flushes every N items or T ms)
+    DIAGNOSIS_HISTORY_BATCH_SIZE: int = int(os.getenv("DIAGNOSIS_HISTORY_BATCH_SIZE", "50"))
+    DIAGNOSIS_HISTORY_FLUSH_MS: int = int(os.getenv("DIAGNOSIS_HISTORY_FLUSH_MS", "500"))
+    DIAGNOSIS_HISTORY_QUEUE_SIZE: int = int(os.getenv("DIAGNOSIS_HISTORY_QUEUE_SIZE", "5000"))
+
+    # Per-user profile read cache (slices of the complete-profile payload)
+    PROFILE_CACHE_TTL_SECONDS: int = int(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+    PROFILE_CACHE_MAX_ENTRIES: int = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000"))
+    PROFILE_CACHE_MAX_BYTES: int = int(os.getenv("PROFILE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+    # User lookups by Firebase UID / email (usersByUid, usersByEmail + in-process LRU)
+    USER_LOOKUP_CACHE_SIZE: int = int(os.getenv("USER_LOOKUP_CACHE_SIZE", "10000"))
+    USER_LOOKUP_CACHE_TTL_SECONDS: int = int(os.getenv("USER_LOOKUP_CACHE_TTL_SECONDS", "3600"))
+    # Fall back to a users query when no lookup document exists (turn off once migrated)
+    USER_LOOKUP_QUERY_FALLBACK: bool = os.getenv("USER_LOOKUP_QUERY_FALLBACK", "True").lower() == "true"
+
+    # Bulk NDJSON ingestion of activities / medical history
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+    INGEST_MAX_LINES: int = int(os.getenv("INGEST_MAX_LINES", "10000"))
+    INGEST_MAX_LINE_BYTES: int = int(os.getenv("INGEST_MAX_LINE_BYTES", "65536"))
+
+    # Longest ranges (days) served from per-minute samples / hourly rollups; longer ones use daily rollups
+    VITALS_RAW_MAX_DAYS: int = int(os.getenv("VITALS_RAW_MAX_DAYS", "2"))
+    VITALS_HOURLY_MAX_DAYS: int = int(os.getenv("VITALS_HOURLY_MAX_DAYS", "31"))
+
+    # Admin API key for maintenance endpoints (disabled when empty)
+    ADMIN_API_KEY: str = os.getenv("ADMIN_API_KEY", "")
     # Google Maps Platform API Key (for Geocoding, Places, etc.)
     GOOGLE_MAPS_API_KEY: str = os.getenv("GOOGLE_MAPS_API_KEY", "")
     
@@ -35,6 +95,26 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
     SMTP_SERVER: str = os.getenv("SMTP_SERVER", "smtp.gmail.com")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "True").lower() == "true"
+    SMTP_TIMEOUT_SECONDS: float = float(os.getenv("SMTP_TIMEOUT_SECONDS", "30"))
+    # Persistent SMTP connections (one per sender task), closed after this long unused
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "2"))
+    SMTP_IDLE_SECONDS: float = float(os.getenv("SMTP_IDLE_SECONDS", "60"))
+    # Delivery attempts per message, retried with exponential backoff from this base delay
+    SMTP_MAX_ATTEMPTS: int = int(os.getenv("SMTP_MAX_ATTEMPTS", "5"))
+    SMTP_RETRY_BASE_SECONDS: float = float(os.getenv("SMTP_RETRY_BASE_SECONDS", "2"))
+    # Outbound messages waiting for a connection, and how long shutdown waits for them
+    MAIL_QUEUE_SIZE: int = int(os.getenv("MAIL_QUEUE_SIZE", "10000"))
+    MAIL_DRAIN_SECONDS: float = float(os.getenv("MAIL_DRAIN_SECONDS", "10"))
+    # Reminder emails: fire on this worker (off by default, enable on one worker), batch size, and how often to pick up changes
+    REMINDERS_ENABLED: bool = os.getenv("REMINDERS_ENABLED", "False").lower() == "true"
+    REMINDER_BATCH_SIZE: int = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+    REMINDER_POLL_SECONDS: float = float(os.getenv("REMINDER_POLL_SECONDS", "60"))
+    # Daily medication reminder times (local to the user's time zone, this zone when
+    # they have not set one) and days between health check-in reminders
+    REMINDER_MEDICATION_TIMES: str = os.getenv("REMINDER_MEDICATION_TIMES", "08:00,20:00")
+    REMINDER_TIMEZONE: str = os.getenv("REMINDER_TIMEZONE", "Asia/Kolkata")
+    REMINDER_HEALTH_INTERVAL_DAYS: int = int(os.getenv("REMINDER_HEALTH_INTERVAL_DAYS", "7"))
     
     # Server Configuration
     HOST: str = os.getenv("HOST", "0.0.0.0")
@@ -2,7 +2,7 @@
 Database connection and configuration for Firebase Firestore
 """
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, firestore, firestore_async, auth
 from app.config import settings
 import logging
 import json
@@ -11,6 +11,7 @@ logger = logging.getLogger(__name__)
 
 class FirebaseDatabase:
     db = None
+    async_db = None
     app = None
 
 # Database instance
@@ -38,12 +39,14 @@ async def connect_to_firebase():
             cred = credentials.Certificate(firebase_config)
             firebase_db.app = firebase_admin.initialize_app(cred)
         
-        # Initialize Firestore
+        # Initialize Firestore - the async client is shared by all request handlers,
+        # the sync client remains for scripts and thread-pool work
         firebase_db.db = firestore.client()
+        firebase_db.async_db = firestore_async.client()
         
         # Test the connection by trying to access a collection
-        test_ref = firebase_db.db.collection('test').limit(1)
-        list(test_ref.stream())
+        test_ref = firebase_db.async_db.collection('test').limit(1)
+        [doc async for doc in test_ref.stream()]
         
         logger.info("✅ Firebase Firestore connected successfully")
         
@@ -56,6 +59,8 @@ async def close_firebase_connection():
     try:
         if firebase_db.app:
             firebase_admin.delete_app(firebase_db.app)
+            firebase_db.db = None
+            firebase_db.async_db = None
             logger.info("🔌 Firebase connection closed")
     except Exception as e:
         logger.error(f"Error closing Firebase connection: {e}")
@@ -64,6 +69,10 @@ def get_firestore_db():
     """Get Firestore database instance"""
     return firebase_db.db
 
+def get_firestore_async_db():
+    """Get the shared async Firestore client"""
+    return firebase_db.async_db
+
 def get_firebase_auth():
     """Get Firebase Auth instance"""
     return auth
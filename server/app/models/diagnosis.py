@@ -28,6 +28,54 @@ class DiagnosisResponse(BaseModel):
             }
         }
 
+class BatchDiagnosisRequest(BaseModel):
+    items: List[DiagnosisRequest] = Field(..., min_length=1, max_length=50, description="Intake forms to diagnose")
+    stream: bool = Field(default=False, description="Stream results as NDJSON in completion order")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"symptoms": "headache, fever, cough", "language": "en"},
+                    {"symptoms": "stomach pain, vomiting", "language": "hi"}
+                ],
+                "stream": False
+            }
+        }
+
+class BatchDiagnosisItem(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    response: Optional[str] = Field(default=None, description="HTML formatted diagnosis response")
+    error: Optional[str] = Field(default=None, description="Why this item failed")
+    cache: Optional[str] = Field(default=None, description="Cache tier that answered (memory, disk or miss)")
+    source: Optional[str] = Field(default=None, description="gemini or fallback")
+
+class BatchDiagnosisResponse(BaseModel):
+    results: List[BatchDiagnosisItem]
+
+class DiagnosisPoint(BaseModel):
+    label: str = Field(..., min_length=1, description="Short label summarizing the point")
+    text: str = Field(..., min_length=1, description="Point content")
+
+class DiagnosisSection(BaseModel):
+    title: str = Field(..., min_length=1, description="Section title with emoji")
+    points: List[DiagnosisPoint] = Field(..., min_length=6, max_length=6)
+
+class StructuredDiagnosis(BaseModel):
+    """Compact diagnosis returned by Gemini in structured mode, rendered to HTML server-side"""
+    sections: List[DiagnosisSection] = Field(..., min_length=5, max_length=5)
+
+class DiagnosisHistoryEntry(BaseModel):
+    id: str
+    symptoms: str
+    diagnosis: str = Field(..., description="HTML formatted diagnosis response")
+    language: Optional[str] = "en"
+    createdAt: datetime
+
+class DiagnosisHistoryResponse(BaseModel):
+    entries: List[DiagnosisHistoryEntry]
+    next_cursor: Optional[str] = Field(default=None, description="Pass as start_after to get the next page")
+
 class Diagnosis(BaseModel):
     """Diagnosis record for storing in Firestore"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -35,6 +83,7 @@ class Diagnosis(BaseModel):
     firebase_uid: Optional[str] = None  # Firebase Auth UID
     symptoms: str = Field(..., description="Symptoms provided by user")
     diagnosis: str = Field(..., description="AI-generated diagnosis")
+    language: Optional[str] = Field(default="en", description="Language code of the diagnosis")
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     
     def to_dict(self) -> Dict[str, Any]:
@@ -0,0 +1,118 @@
+"""
+Profile models - partial updates sent by the profile screen's autosave and
+records uploaded by the bulk ingestion endpoint
+"""
+from pydantic import BaseModel, Field, field_validator
+from typing import Any, Dict, Literal, Optional, List, Union
+from datetime import datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+class PersonalInfoUpdate(BaseModel):
+    name: Optional[str] = None
+    age: Optional[Union[int, str]] = None
+    gender: Optional[str] = None
+    phone: Optional[str] = None
+    location: Optional[str] = None
+    emergencyContact: Optional[str] = None
+    email: Optional[str] = None
+
+    @field_validator('name')
+    @classmethod
+    def name_must_be_trimmed(cls, v):
+        return v.strip() if v is not None else v
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "name": "John Doe",
+                "age": 25,
+                "phone": "+1234567890",
+                "location": "Bhubaneswar"
+            }
+        }
+
+class ProfileHealthUpdate(BaseModel):
+    height: Optional[Union[float, str]] = None
+    weight: Optional[Union[float, str]] = None
+    bmi: Optional[Union[float, str]] = None
+    bloodType: Optional[str] = None
+    bloodPressure: Optional[str] = None
+    heartRate: Optional[Union[int, str]] = None
+    allergies: Optional[Union[List[str], str]] = None
+    medications: Optional[Union[List[str], str]] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "height": "175",
+                "weight": "70",
+                "bloodType": "O+",
+                "heartRate": "72 bpm",
+                "allergies": ["Penicillin"]
+            }
+        }
+
+class NotificationSettings(BaseModel):
+    healthReminders: Optional[bool] = None
+    appointmentAlerts: Optional[bool] = None
+    medicationReminders: Optional[bool] = None
+
+class PrivacySettings(BaseModel):
+    profileVisibility: Optional[str] = None
+    dataSharing: Optional[bool] = None
+
+class UserSettingsUpdate(BaseModel):
+    notifications: Optional[NotificationSettings] = None
+    privacy: Optional[PrivacySettings] = None
+    timezone: Optional[str] = Field(None, description="IANA time zone for reminder times, e.g. Asia/Kolkata")
+
+    @field_validator('timezone')
+    @classmethod
+    def timezone_must_exist(cls, v):
+        if v is not None:
+            try:
+                ZoneInfo(v)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"Unknown time zone: {v}")
+        return v
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "notifications": {"healthReminders": True},
+                "privacy": {"dataSharing": False},
+                "timezone": "Asia/Kolkata"
+            }
+        }
+
+class IngestRecord(BaseModel):
+    """One line of a bulk ingestion upload"""
+    kind: Literal["activity", "medicalHistory"] = Field(..., description="Which history the record belongs to")
+    id: Optional[str] = Field(
+        None, pattern=r"^[A-Za-z0-9_-]{1,128}$",
+        description="Client-generated id; re-uploading the same id overwrites instead of duplicating"
+    )
+    timestamp: Optional[datetime] = Field(None, description="When the record happened (defaults to upload time)")
+    data: Dict[str, Any] = Field(default_factory=dict, description="Record fields")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "kind": "activity",
+                "id": "walk-2024-05-01-0730",
+                "timestamp": "2024-05-01T07:30:00Z",
+                "data": {"type": "walk", "steps": 4200}
+            }
+        }
+
+class IngestLineResult(BaseModel):
+    line: int = Field(..., description="1-based line number in the upload")
+    status: Literal["created", "error"]
+    id: Optional[str] = Field(None, description="Document id the record was stored under")
+    error: Optional[str] = Field(None, description="Why the line was rejected")
+
+class IngestResponse(BaseModel):
+    success: bool
+    created: int
+    failed: int
+    results: List[IngestLineResult]
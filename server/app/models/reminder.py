@@ -0,0 +1,28 @@
+"""
+Reminder models - scheduled medication, health check-in and appointment notifications
+"""
+from pydantic import BaseModel, Field
+from typing import List, Literal
+from datetime import datetime
+
+class AppointmentReminderCreate(BaseModel):
+    dueAt: datetime = Field(..., description="When to send the reminder (UTC unless an offset is given)")
+    message: str = Field(..., min_length=1, max_length=500, description="Reminder text, e.g. the appointment details")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "dueAt": "2024-05-02T08:00:00Z",
+                "message": "Cardiology follow-up at 10:30, City Hospital"
+            }
+        }
+
+class ReminderResponse(BaseModel):
+    id: str
+    kind: Literal["medication", "health", "appointment"]
+    dueAt: datetime = Field(..., description="Next time the reminder is sent")
+    repeatSeconds: int = Field(0, description="Interval between repeats, 0 for a one-off reminder")
+    message: str
+
+class ReminderListResponse(BaseModel):
+    reminders: List[ReminderResponse]
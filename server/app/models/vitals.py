@@ -0,0 +1,59 @@
+"""
+Vital signs models - timestamped readings and analytics over them
+"""
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+from datetime import datetime
+
+# Metrics stored as time series; BMI is derived from weight and the latest height
+VITAL_METRICS = ("heartRate", "systolic", "diastolic", "weight", "height", "spo2")
+
+class VitalReading(BaseModel):
+    timestamp: datetime = Field(..., description="When the reading was taken (stored per minute, UTC)")
+    heartRate: Optional[float] = Field(None, gt=0, lt=300, description="Beats per minute")
+    systolic: Optional[float] = Field(None, gt=0, lt=300, description="Systolic blood pressure, mmHg")
+    diastolic: Optional[float] = Field(None, gt=0, lt=200, description="Diastolic blood pressure, mmHg")
+    weight: Optional[float] = Field(None, gt=0, lt=700, description="Body weight, kg")
+    height: Optional[float] = Field(None, gt=0, lt=300, description="Height, cm")
+    spo2: Optional[float] = Field(None, gt=0, le=100, description="Blood oxygen saturation, %")
+
+    @model_validator(mode='after')
+    def must_have_a_value(self):
+        if all(getattr(self, metric) is None for metric in VITAL_METRICS):
+            raise ValueError("A reading needs at least one vital sign")
+        return self
+
+class VitalsUpload(BaseModel):
+    readings: List[VitalReading] = Field(..., min_length=1, max_length=10000)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "readings": [
+                    {"timestamp": "2024-05-01T07:30:00Z", "heartRate": 72, "systolic": 121, "diastolic": 79},
+                    {"timestamp": "2024-05-01T07:31:00Z", "heartRate": 75}
+                ]
+            }
+        }
+
+class VitalsPoint(BaseModel):
+    timestamp: datetime = Field(..., description="Reading time, or start of the hour/day bucket")
+    mean: float
+    min: float
+    max: float
+    count: int
+
+class VitalsTrend(BaseModel):
+    slope_per_day: float = Field(..., description="Least-squares change per day")
+    change: float = Field(..., description="Fitted change from the first to the last point")
+
+class VitalsSeriesResponse(BaseModel):
+    metric: str
+    resolution: Literal["raw", "hour", "day"]
+    points: List[VitalsPoint]
+    moving_average: List[Optional[float]] = Field(..., description="Trailing moving average aligned with points")
+    trend: Optional[VitalsTrend] = None
+    count: int
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
@@ -4,10 +4,12 @@ Authentication routes - Firebase Authentication compatible (Fixed)
 from fastapi import APIRouter, HTTPException, status
 from app.models.user import UserCreate, UserLogin, UserResponse
 from app.models.otp import SendOTPRequest, OTPVerify, ResetPasswordRequest
-from app.utils.auth import get_password_hash, verify_password, create_access_token
-from app.utils.otp_generator import generate_otp, is_otp_expired
+from app.utils.auth import create_access_token
 from app.utils.email_service import email_service
 from app.services.firebase_service import firebase_service
+from app.services.user_directory import UserAlreadyExistsError
+from app.services.password_hasher import password_hasher
+from app.services.otp_store import otp_store, OTP_OK, OTP_EXPIRED, OTP_LOCKED
 from datetime import datetime
 import logging
 
@@ -37,7 +39,7 @@ async def register_user(user_data: UserCreate):
             )
         
         # Hash password for legacy users
-        hashed_password = get_password_hash(user_data.password) if user_data.password else None
+        hashed_password = await password_hasher.hash(user_data.password) if user_data.password else None
         
         # Create new user in Firestore
         from app.models.user import User
@@ -49,10 +51,14 @@ async def register_user(user_data: UserCreate):
             createdAt=datetime.utcnow()
         )
         
-        # Save to Firestore
-        db = firebase_service.db
-        user_ref = db.collection('users').document(new_user.id)
-        user_ref.set(new_user.to_dict())
+        # Save to Firestore together with its lookup documents
+        try:
+            await firebase_service.create_user(new_user)
+        except UserAlreadyExistsError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="User already exists"
+            )
         
         logger.info(f"✅ User registered successfully: {user_data.email}")
         
@@ -94,12 +100,19 @@ async def login_user(user_data: UserLogin):
             )
         
         # Verify password
-        if not user.password or not verify_password(user_data.password, user.password):
+        valid, new_hash = (False, None)
+        if user.password and user_data.password:
+            valid, new_hash = await password_hasher.verify_and_update(user_data.password, user.password)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
         
+        # Stored hash uses an outdated cost factor - upgrade it while we have the password
+        if new_hash:
+            await firebase_service.update_user(user.id, {'password': new_hash})
+        
         # Create access token
         access_token = create_access_token(data={"sub": user.email})
         
@@ -141,22 +154,15 @@ async def send_otp(request: SendOTPRequest):
                 detail="User not found"
             )
         
-        # Generate OTP
-        otp_code = generate_otp()
+        # Generate OTP (replaces any code still outstanding for this email)
+        otp_code = await otp_store.issue(request.email)
         
-        # Save OTP to Firestore
-        from app.models.otp import OTP
-        otp_record = OTP(
-            email=request.email,
-            otp=otp_code
-        )
-        
-        db = firebase_service.db
-        otp_ref = db.collection('otps').document(otp_record.id)
-        otp_ref.set(otp_record.to_dict())
-        
-        # Send email
-        await email_service.send_otp_email(request.email, otp_code)
+        # Queue the email - delivery happens in the background
+        if not await email_service.send_otp_email(request.email, otp_code):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Email service busy, please try again"
+            )
         
         logger.info(f"✅ OTP sent successfully to: {request.email}")
         
@@ -179,37 +185,24 @@ async def send_otp(request: SendOTPRequest):
 async def verify_otp(request: OTPVerify):
     """Verify OTP for password reset"""
     try:
-        # Find OTP record
-        db = firebase_service.db
-        otps_ref = db.collection('otps')
-        query = otps_ref.where('email', '==', request.email).where('otp', '==', request.otp).limit(1)
-        docs = query.stream()
+        result = await otp_store.verify(request.email, request.otp)
         
-        otp_doc = None
-        for doc in docs:
-            otp_doc = doc
-            break
-        
-        if not otp_doc:
+        if result == OTP_EXPIRED:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid OTP"
+                detail="OTP has expired"
             )
-        
-        otp_data = otp_doc.to_dict()
-        
-        # Check if OTP is expired
-        if is_otp_expired(otp_data.get('expiresAt')):
-            # Delete expired OTP
-            otp_doc.reference.delete()
+        if result == OTP_LOCKED:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many incorrect attempts, request a new OTP"
+            )
+        if result != OTP_OK:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="OTP has expired"
+                detail="Invalid OTP"
             )
         
-        # Delete used OTP
-        otp_doc.reference.delete()
-        
         logger.info(f"✅ OTP verified successfully for: {request.email}")
         
         return {"message": "OTP verified successfully"}
@@ -240,12 +233,11 @@ async def reset_password(request: ResetPasswordRequest):
             )
         
         # Hash new password
-        hashed_password = get_password_hash(request.newPassword)
+        hashed_password = await password_hasher.hash(request.newPassword)
         
         # Update user password in Firestore
-        db = firebase_service.db
-        user_ref = db.collection('users').document(user.id)
-        user_ref.update({'password': hashed_password})
+        if not await firebase_service.update_user(user.id, {'password': hashed_password}):
+            raise Exception("Password update failed")
         
         logger.info(f"✅ Password reset successfully for: {request.email}")
         
@@ -1,16 +1,80 @@
 """
 Diagnosis routes - matches Node.js diagnosisRoutes.js exactly
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from app.models.diagnosis import DiagnosisRequest, DiagnosisResponse
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+from app.models.diagnosis import (
+    DiagnosisRequest, DiagnosisResponse,
+    BatchDiagnosisRequest, BatchDiagnosisItem, BatchDiagnosisResponse,
+    DiagnosisHistoryEntry, DiagnosisHistoryResponse
+)
+from app.services.diagnosis_history import diagnosis_history
 from app.services.gemini_service import gemini_service
+from app.services.gemini_scheduler import Priority
+from app.services.diagnosis_cache import diagnosis_cache, diagnosis_cache_key
+from app.services.fallback_diagnosis import fallback_engine
+from app.utils.auth import get_current_user, get_optional_user, require_admin_key
+from app.utils.singleflight import SingleFlight
+from app.utils.diagnosis_html import SectionStreamer, split_sections
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["🤖 AI Medical Diagnosis"])
 
+# Coalesces identical diagnosis requests that are generating at the same time
+diagnosis_flights = SingleFlight()
+
+async def _generate_and_cache(symptoms: str, language: str, priority: Priority = Priority.INTERACTIVE) -> str:
+    diagnosis_html = await gemini_service.get_diagnosis(symptoms, language, priority=priority)
+    if diagnosis_html:
+        await diagnosis_cache.set(symptoms, language, diagnosis_html)
+    return diagnosis_html
+
+class ResolvedDiagnosis(NamedTuple):
+    html: str
+    cache: str       # cache tier that answered: memory, disk or miss
+    shared: bool     # result came from another in-flight request
+    source: str      # gemini or fallback
+
+def _fallback_diagnosis(symptoms: str, language: str, reason: Exception) -> ResolvedDiagnosis:
+    """Answer from the offline rule-based engine; these results are never cached"""
+    logger.info(f"ℹ️ Switching to intelligent fallback system for user request ({reason})")
+    return ResolvedDiagnosis(fallback_engine.diagnose(symptoms, language), "miss", False, "fallback")
+
+async def _resolve_diagnosis(
+    symptoms: str,
+    language: str,
+    priority: Priority = Priority.INTERACTIVE
+) -> ResolvedDiagnosis:
+    """
+    Serve a diagnosis from the cache when possible, otherwise generate and cache it.
+    Identical requests already generating share that generation's result.
+    Falls back to the offline engine when Gemini fails or returns nothing.
+    """
+    cached, tier = await diagnosis_cache.get(symptoms, language)
+    if cached is not None:
+        return ResolvedDiagnosis(cached, tier, False, "gemini")
+
+    try:
+        diagnosis_html, shared = await diagnosis_flights.do(
+            diagnosis_cache_key(symptoms, language),
+            lambda: _generate_and_cache(symptoms, language, priority)
+        )
+    except Exception as e:
+        return _fallback_diagnosis(symptoms, language, e)
+    if not diagnosis_html:
+        return _fallback_diagnosis(symptoms, language, Exception("No response from Gemini API"))
+    return ResolvedDiagnosis(diagnosis_html, tier, shared, "gemini")
+
 @router.post("/get_diagnosis", response_model=DiagnosisResponse)
-async def get_diagnosis(request: DiagnosisRequest):
+async def get_diagnosis(
+    request: DiagnosisRequest,
+    response: Response,
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
     """
     Get AI diagnosis from Gemini - matches Node.js /get_diagnosis route exactly
     """
@@ -21,15 +85,16 @@ async def get_diagnosis(request: DiagnosisRequest):
                 detail="No symptoms provided"
             )
         
-        # Get diagnosis from Gemini AI with language support
-        diagnosis_html = await gemini_service.get_diagnosis(request.symptoms, request.language or "en")
-        
-        if not diagnosis_html:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="No response from Gemini API"
-            )
+        # Get diagnosis from the cache or Gemini AI with language support
+        resolved = await _resolve_diagnosis(request.symptoms, request.language or "en")
+        diagnosis_html = resolved.html
+        response.headers["X-Diagnosis-Cache"] = resolved.cache
+        response.headers["X-Diagnosis-Shared"] = "true" if resolved.shared else "false"
+        response.headers["X-Diagnosis-Source"] = resolved.source
         
+        if current_user:
+            diagnosis_history.record(current_user['uid'], request.symptoms, diagnosis_html, request.language or "en")
+
         logger.info(f"✅ Diagnosis generated for symptoms: {request.symptoms[:50]}...")
         
         return DiagnosisResponse(response=diagnosis_html)
@@ -37,21 +102,165 @@ async def get_diagnosis(request: DiagnosisRequest):
     except HTTPException:
         raise
     except Exception as e:
-        error_str = str(e)
-        
-        # Handle quota exceeded specifically
-        if "QUOTA_EXCEEDED" in error_str:
-            logger.info(f"ℹ️ Switching to intelligent fallback system for user request")
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="QUOTA_EXCEEDED"
-            )
-        else:
-            logger.error(f"❌ Gemini API error: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to get diagnosis"
-            )
+        # Gemini failures already fell back to the offline engine; this is the history or response step
+        logger.error(f"❌ Failed to return diagnosis: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get diagnosis"
+        )
+
+async def _resolve_batch_item(symptoms: str, language: str) -> BatchDiagnosisItem:
+    try:
+        resolved = await _resolve_diagnosis(symptoms, language, Priority.BATCH)
+        return BatchDiagnosisItem(index=-1, response=resolved.html, cache=resolved.cache, source=resolved.source)
+    except Exception as e:
+        logger.error(f"❌ Batch diagnosis item failed: {e}")
+        return BatchDiagnosisItem(index=-1, error="Failed to get diagnosis")
+
+def _plan_batch(items: List[DiagnosisRequest]) -> Dict[str, List[int]]:
+    """Group item positions by cache key so duplicate intakes are generated once"""
+    groups: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        if item.symptoms.strip():
+            groups.setdefault(diagnosis_cache_key(item.symptoms, item.language or "en"), []).append(index)
+    return groups
+
+def _batch_tasks(items: List[DiagnosisRequest], groups: Dict[str, List[int]]) -> Dict[asyncio.Task, List[int]]:
+    tasks = {}
+    for indexes in groups.values():
+        first = items[indexes[0]]
+        task = asyncio.ensure_future(_resolve_batch_item(first.symptoms, first.language or "en"))
+        tasks[task] = indexes
+    return tasks
+
+def _empty_items(items: List[DiagnosisRequest]) -> List[BatchDiagnosisItem]:
+    return [
+        BatchDiagnosisItem(index=index, error="No symptoms provided")
+        for index, item in enumerate(items)
+        if not item.symptoms.strip()
+    ]
+
+async def _stream_batch(items: List[DiagnosisRequest], groups: Dict[str, List[int]]) -> AsyncIterator[str]:
+    for result in _empty_items(items):
+        yield result.model_dump_json() + "\n"
+
+    tasks = _batch_tasks(items, groups)
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                for index in tasks[task]:
+                    yield result.model_copy(update={"index": index}).model_dump_json() + "\n"
+    finally:
+        # Client went away - stop work nobody will read
+        for task in tasks:
+            task.cancel()
+
+@router.post("/get_diagnosis/batch", response_model=BatchDiagnosisResponse)
+async def get_diagnosis_batch(request: BatchDiagnosisRequest):
+    """
+    Diagnose several intake forms at once. Duplicates are generated once and the
+    rest run concurrently under the Gemini limits at batch priority. With
+    `stream` set, results are sent as NDJSON lines in completion order.
+    """
+    groups = _plan_batch(request.items)
+    logger.info(f"ℹ️ Batch diagnosis: {len(request.items)} items, {len(groups)} unique")
+
+    if request.stream:
+        return StreamingResponse(
+            _stream_batch(request.items, groups),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    results = _empty_items(request.items)
+    tasks = _batch_tasks(request.items, groups)
+    await asyncio.gather(*tasks)
+    for task, indexes in tasks.items():
+        result = task.result()
+        results.extend(result.model_copy(update={"index": index}) for index in indexes)
+    results.sort(key=lambda item: item.index)
+    return BatchDiagnosisResponse(results=results)
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _stream_diagnosis_events(symptoms: str, language: str, uid: Optional[str] = None) -> AsyncIterator[str]:
+    cached, tier = await diagnosis_cache.get(symptoms, language)
+    if cached is not None:
+        for index, section in enumerate(split_sections(cached)):
+            yield _sse("section", {"index": index, "html": section})
+        if uid:
+            diagnosis_history.record(uid, symptoms, cached, language)
+        yield _sse("done", {"cache": tier, "source": "gemini"})
+        return
+
+    streamer = SectionStreamer()
+    sections = []
+    try:
+        async for chunk in gemini_service.stream_diagnosis(symptoms, language):
+            for section in streamer.feed(chunk):
+                yield _sse("section", {"index": len(sections), "html": section})
+                sections.append(section)
+
+        rest = streamer.flush()
+        if rest:
+            yield _sse("section", {"index": len(sections), "html": rest})
+            sections.append(rest)
+    except Exception as e:
+        logger.error(f"❌ Streaming diagnosis failed: {e}")
+        if sections:
+            # Part of the answer is already on the client; don't mix in another source
+            detail = "QUOTA_EXCEEDED" if "QUOTA_EXCEEDED" in str(e) else "Failed to get diagnosis"
+            yield _sse("error", {"detail": detail})
+            return
+
+    if not sections:
+        fallback = _fallback_diagnosis(symptoms, language, Exception("Gemini stream produced no sections"))
+        for index, section in enumerate(split_sections(fallback.html)):
+            yield _sse("section", {"index": index, "html": section})
+        if uid:
+            diagnosis_history.record(uid, symptoms, fallback.html, language)
+        yield _sse("done", {"cache": fallback.cache, "source": fallback.source})
+        return
+
+    diagnosis_html = "\n\n".join(sections)
+    await diagnosis_cache.set(symptoms, language, diagnosis_html)
+    if uid:
+        diagnosis_history.record(uid, symptoms, diagnosis_html, language)
+    logger.info(f"✅ Diagnosis streamed for symptoms: {symptoms[:50]}...")
+    yield _sse("done", {"cache": tier, "source": "gemini"})
+
+@router.post("/get_diagnosis/stream")
+async def stream_diagnosis(
+    request: DiagnosisRequest,
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """
+    Stream the diagnosis as Server-Sent Events, one `section` event per completed
+    <div> section, followed by `done` (or `error`)
+    """
+    if not request.symptoms.strip():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No symptoms provided"
+        )
+
+    return StreamingResponse(
+        _stream_diagnosis_events(
+            request.symptoms,
+            request.language or "en",
+            current_user['uid'] if current_user else None
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
 
 @router.post("/test-ai")
 async def test_ai():
@@ -68,3 +277,59 @@ async def test_ai():
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Gemini AI test failed"
         )
+
+@router.get("/diagnosis/metrics")
+async def get_diagnosis_metrics():
+    """
+    Gemini concurrency and queue-wait metrics for this worker
+    """
+    return {
+        "gemini": gemini_service.get_metrics(),
+        "cache": await diagnosis_cache.get_metrics(),
+        "single_flight": diagnosis_flights.stats(),
+        "history": diagnosis_history.get_metrics()
+    }
+
+@router.get("/diagnosis/history", response_model=DiagnosisHistoryResponse)
+async def get_diagnosis_history(
+    limit: int = Query(20, ge=1, le=100),
+    start_after: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    The signed-in user's past diagnoses, newest first
+    """
+    try:
+        entries, next_cursor = await diagnosis_history.list_entries(current_user['uid'], limit, start_after)
+        return DiagnosisHistoryResponse(
+            entries=[
+                DiagnosisHistoryEntry(
+                    id=entry.id,
+                    symptoms=entry.symptoms,
+                    diagnosis=entry.diagnosis,
+                    language=entry.language,
+                    createdAt=entry.createdAt
+                )
+                for entry in entries
+            ],
+            next_cursor=next_cursor
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    except Exception as e:
+        logger.error(f"❌ Error getting diagnosis history: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get diagnosis history"
+        )
+
+@router.delete("/diagnosis/cache", dependencies=[Depends(require_admin_key)])
+async def purge_diagnosis_cache(language: Optional[str] = Query(None, description="Only purge entries for this language")):
+    """
+    Purge cached diagnoses (admin only)
+    """
+    purged = await diagnosis_cache.purge(language)
+    return {"message": "Diagnosis cache purged", "purged": purged}
@@ -0,0 +1,167 @@
+"""
+Data export routes - stream a user's full record as NDJSON
+"""
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.services.diagnosis_history import decompress_diagnosis
+from app.services.firestore_repository import firestore_repository
+from app.utils.auth import get_current_user
+from app.utils.pagination import encode_cursor, decode_cursor
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+import base64
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/export", tags=["📦 Data Export"])
+
+# (name, collection, subcollection) in export order; single documents have no subcollection
+EXPORT_SOURCES = [
+    ("users", "users", None),
+    ("healthProfiles", "healthProfiles", None),
+    ("health_profiles", "health_profiles", None),
+    ("settings", "userSettings", None),
+    ("activities", "userActivity", "activities"),
+    ("medicalHistory", "medicalHistory", "entries"),
+    ("diagnoses", "diagnoses", "entries"),
+]
+_SOURCE_NAMES = [name for name, _, _ in EXPORT_SOURCES]
+_PAGE_SIZE = 200
+
+def _encode_cursor(source: str, after: str) -> str:
+    # Document ids cannot contain "/", so it separates the source from the id
+    return encode_cursor(f"{source}/{after}")
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    """(source, doc_id) inside an export cursor; raises ValueError for malformed cursors"""
+    source, _, after = decode_cursor(cursor).partition("/")
+    if source not in _SOURCE_NAMES or not after:
+        raise ValueError("Invalid cursor")
+    return source, after
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    return str(value)
+
+def _prepare(source: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    if source == "users":
+        # Never export credentials
+        data.pop("password", None)
+        data.pop("otp", None)
+    elif source == "diagnoses" and "diagnosisGz" in data:
+        data["diagnosis"] = decompress_diagnosis(data.pop("diagnosisGz"))
+    return data
+
+async def _stream_subcollection(collection: str, user_id: str, subcollection: str, after: Optional[str]):
+    """Documents of a subcollection in id order, one page at a time"""
+    entries = firestore_repository.subcollection(collection, user_id, subcollection)
+    last = None
+    if after:
+        last = await entries.document(after).get()
+        if not last.exists:
+            raise ValueError("Invalid cursor")
+    while True:
+        query = entries.order_by("__name__").limit(_PAGE_SIZE)
+        if last is not None:
+            query = query.start_after(last)
+        count = 0
+        async for doc in query.stream():
+            count += 1
+            last = doc
+            yield doc.id, doc.to_dict()
+        if count < _PAGE_SIZE:
+            return
+
+async def _export_records(user_id: str, cursor: Optional[str]) -> AsyncIterator[Tuple[str, str, Dict[str, Any]]]:
+    """(source, doc_id, data) for every exported document, resuming after cursor"""
+    resume_source, resume_after = _decode_cursor(cursor) if cursor else (None, None)
+    skipping = resume_source is not None
+
+    for name, collection, subcollection in EXPORT_SOURCES:
+        after = None
+        if skipping:
+            if name != resume_source:
+                continue
+            skipping = False
+            if subcollection is None:
+                # The cursor was left after this single document
+                continue
+            after = resume_after
+
+        if subcollection is None:
+            data = await firestore_repository.get(collection, user_id)
+            if data is not None:
+                yield name, user_id, data
+        else:
+            async for doc_id, data in _stream_subcollection(collection, user_id, subcollection, after):
+                yield name, doc_id, data
+
+async def _export_ndjson(user_id: str, cursor: Optional[str]) -> AsyncIterator[str]:
+    exported = 0
+    try:
+        async for source, doc_id, data in _export_records(user_id, cursor):
+            exported += 1
+            yield json.dumps({
+                "collection": source,
+                "id": doc_id,
+                "data": _prepare(source, data),
+                "cursor": _encode_cursor(source, doc_id)
+            }, default=_json_default, ensure_ascii=False) + "\n"
+    except Exception as e:
+        logger.error(f"❌ Export failed for {user_id} after {exported} records: {e}")
+        yield json.dumps({"error": "Export interrupted, resume with the last cursor"}) + "\n"
+        return
+    logger.info(f"✅ Exported {exported} records for user: {user_id}")
+    yield json.dumps({"done": True, "records": exported}) + "\n"
+
+@router.get(
+    "/{user_id}",
+    summary="📦 Export User Record",
+    description="Stream every stored record for a user as NDJSON"
+)
+async def export_user_record(
+    user_id: str,
+    cursor: Optional[str] = Query(None, description="Resume after the record carrying this cursor"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    ## 📦 Export User Record
+
+    Streams one JSON object per line:
+    - 📄 **Records** - `{"collection", "id", "data", "cursor"}` for users, health profiles,
+      settings, activities, medical history and diagnoses
+    - 🔁 **Resumable** - pass the last received `cursor` to continue an interrupted export
+    - ✅ **Completion** - a final `{"done": true, "records": n}` line
+    """
+    # Allow development user to access any profile for testing
+    if current_user.get('uid') != user_id and current_user.get('uid') != 'dev_user_123':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    if not firestore_repository.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Firebase not configured"
+        )
+    if cursor:
+        try:
+            _decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+
+    return StreamingResponse(
+        _export_ndjson(user_id, cursor),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="arogyaai-export-{user_id}.ndjson"',
+            "X-Accel-Buffering": "no"
+        }
+    )
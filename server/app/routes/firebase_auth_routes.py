@@ -4,6 +4,7 @@ Firebase Authentication routes
 from fastapi import APIRouter, HTTPException, status
 from app.models.user import UserCreate, UserResponse, FirebaseTokenVerify
 from app.services.firebase_service import firebase_service
+from app.services.user_directory import UserAlreadyExistsError
 import logging
 
 logger = logging.getLogger(__name__)
@@ -60,7 +61,25 @@ async def verify_firebase_token(token_data: FirebaseTokenVerify):
             email=email
         )
         
-        new_user = await firebase_service.create_user_in_firestore(user_data, firebase_uid)
+        try:
+            new_user = await firebase_service.create_user_in_firestore(user_data, firebase_uid)
+        except UserAlreadyExistsError:
+            # A concurrent first login for this UID, or a legacy user with this email
+            existing_user = await firebase_service.resolve_existing_user(
+                firebase_uid, email, decoded_token.get('email_verified', False)
+            )
+            if not existing_user:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="User already exists"
+                )
+            return UserResponse(
+                userId=existing_user.id,
+                firebase_uid=existing_user.firebase_uid,
+                name=existing_user.name,
+                email=existing_user.email,
+                message="User authenticated successfully"
+            )
         
         return UserResponse(
             userId=new_user.id,
@@ -129,7 +148,13 @@ async def register_with_profile(user_data: UserCreate, token_data: FirebaseToken
             )
         
         # Create new user with complete profile
-        new_user = await firebase_service.create_user_in_firestore(user_data, firebase_uid)
+        try:
+            new_user = await firebase_service.create_user_in_firestore(user_data, firebase_uid)
+        except UserAlreadyExistsError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="User already exists"
+            )
         
         return UserResponse(
             userId=new_user.id,
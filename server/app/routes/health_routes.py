@@ -3,7 +3,7 @@ Health profile routes - matches Node.js healthRoutes.js exactly
 """
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from app.models.health_profile import HealthProfileCreate, HealthProfileUpdate
-from app.services.firebase_service import firebase_service
+from app.services.firestore_repository import firestore_repository
 from datetime import datetime
 import logging
 
@@ -27,9 +27,7 @@ async def update_health_profile(profile_data: HealthProfileCreate):
         profile_dict["updatedAt"] = datetime.utcnow()
         
         # Save to Firestore (merge=True will update existing or create new)
-        db = firebase_service.db
-        profile_ref = db.collection('health_profiles').document(profile_data.userId)
-        profile_ref.set(profile_dict, merge=True)
+        await firestore_repository.set('health_profiles', profile_data.userId, profile_dict, merge=True)
         
         logger.info(f"✅ Health profile saved for user: {profile_data.userId}")
         
@@ -57,17 +55,14 @@ async def get_user_health(userId: str = Query(..., description="User ID")):
             )
         
         # Find health profile in Firestore
-        db = firebase_service.db
-        profile_ref = db.collection('health_profiles').document(userId)
-        profile_doc = profile_ref.get()
+        profile = await firestore_repository.get('health_profiles', userId)
         
-        if not profile_doc.exists:
+        if profile is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Profile not found"
             )
         
-        profile = profile_doc.to_dict()
         profile["userId"] = userId  # Add userId to response
         
         logger.info(f"✅ Health profile loaded for user: {userId}")
@@ -0,0 +1,37 @@
+"""
+Maintenance routes - status and manual runs of the background cleanup jobs (admin only)
+"""
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from app.services.firestore_repository import firestore_repository
+from app.services.maintenance import maintenance_scheduler
+from app.utils.auth import require_admin_key
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/maintenance", tags=["🧹 Maintenance"], dependencies=[Depends(require_admin_key)])
+
+@router.get("/status")
+async def get_maintenance_status():
+    """
+    Registered cleanup jobs with deleted counts and the last run of each on this worker
+    """
+    return maintenance_scheduler.get_metrics()
+
+@router.post("/run")
+async def run_maintenance(job: Optional[List[str]] = Query(None, description="Jobs to run (all by default)")):
+    """
+    Run cleanup jobs now instead of waiting for the next scheduled pass
+    """
+    if not firestore_repository.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Firebase not configured"
+        )
+    unknown = [name for name in job or [] if name not in maintenance_scheduler.jobs]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown maintenance job: {', '.join(unknown)}"
+        )
+    return {"results": await maintenance_scheduler.run_once(job)}
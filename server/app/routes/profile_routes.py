@@ -2,12 +2,23 @@
 Comprehensive Profile Management Routes
 Handles user profiles, health data, activities, settings, and file uploads
 """
-from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile, Header
+from fastapi import APIRouter, HTTPException, status, Depends, File, UploadFile, Query, Request, Response
 from fastapi.responses import JSONResponse
 from app.models.user import UserResponse
 from app.models.health_profile import HealthProfileCreate, HealthProfileUpdate
+from app.models.profile import PersonalInfoUpdate, ProfileHealthUpdate, UserSettingsUpdate, IngestResponse
+from app.services.bulk_ingest import bulk_ingestor
 from app.services.firebase_service import firebase_service
-# Firebase auth verification will be handled by firebase_service
+from app.services.firestore_repository import firestore_repository
+from app.services.profile_cache import profile_cache, SLICES
+from app.services.profile_summary import profile_summary
+from app.services.profile_writes import profile_writer
+from app.services.reminder_scheduler import reminder_scheduler
+from app.services.user_directory import UserAlreadyExistsError
+from app.services.vitals_store import vitals_store
+from app.utils.pagination import paginate_entries
+from app.utils.server_timing import ServerTiming
+from app.utils.auth import get_current_user
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 import logging
@@ -18,58 +29,6 @@ from pathlib import Path
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/profile", tags=["👤 Profile Management"])
 
-# Dependency to get current user from Firebase token
-async def get_current_user(authorization: str = Header(None)):
-    """Extract and verify Firebase token from Authorization header"""
-    # Check if we're in development mode (no authorization header)
-    if not authorization or not authorization.startswith("Bearer "):
-        # In development, check if Firebase is properly configured
-        try:
-            # Try to access Firebase to see if it's configured
-            db = firebase_service.db
-            if db is None:
-                # Firebase not configured, allow development access
-                logger.warning("Firebase not configured, allowing development access")
-                return {
-                    'uid': 'dev_user_123',
-                    'email': 'dev@arogyaai.com',
-                    'name': 'Development User'
-                }
-        except Exception as e:
-            logger.warning(f"Firebase not available: {e}, allowing development access")
-            return {
-                'uid': 'dev_user_123',
-                'email': 'dev@arogyaai.com',
-                'name': 'Development User'
-            }
-        
-        # Firebase is configured but no token provided
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header required"
-        )
-    
-    token = authorization.split(" ")[1]
-    
-    try:
-        # Create firebase service instance
-        service = firebase_service
-        decoded_token = await service.verify_firebase_token(token)
-        
-        if not decoded_token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid or expired token"
-            )
-        
-        return decoded_token
-    except Exception as e:
-        logger.error(f"Token verification error: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token verification failed"
-        )
-
 @router.get(
     "/complete/{user_id}",
     summary="📋 Get Complete User Profile",
@@ -77,6 +36,7 @@ async def get_current_user(authorization: str = Header(None)):
 )
 async def get_complete_profile(
     user_id: str,
+    response: Response,
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -99,19 +59,36 @@ async def get_complete_profile(
         
         # Get data from Firebase with error handling
         try:
-            db = firebase_service.db
-            
-            if db is None:
+            if not firestore_repository.available:
                 # Firebase not configured, return empty data
                 raise Exception("Firebase not configured")
             
-            # Get user profile
-            user_ref = db.collection('users').document(user_id)
-            user_doc = user_ref.get()
+            # Cached slices are served as-is; anything missing comes from the
+            # user's profileSummary document (one read), which is rebuilt from
+            # the source collections the first time it is needed
+            slices = profile_cache.get_slices(user_id)
+            generation = profile_cache.generation
+            missing = [name for name in SLICES if name not in slices]
+            if missing:
+                timing = ServerTiming()
+                summary = await timing.measure("summary", profile_summary.get(user_id))
+                if summary is None:
+                    summary = await timing.measure("rebuild", profile_summary.rebuild(user_id, timing))
+                fresh = {name: summary[name] for name in missing}
+                profile_cache.set_slices(user_id, fresh, generation)
+                slices.update(fresh)
+                response.headers["Server-Timing"] = timing.header()
+            response.headers["X-Profile-Cache"] = (
+                "hit" if not missing else ("miss" if len(missing) == len(SLICES) else "partial")
+            )
+
+            profile_data = slices["profile"]
+            health_data = slices["health"]
+            settings_data = slices["settings"]
+            activities = slices["activities"]
+            medical_history = slices["history"]
             
-            if user_doc.exists:
-                profile_data = user_doc.to_dict()
-            else:
+            if profile_data is None:
                 # Return empty profile data if user doesn't exist
                 profile_data = {
                     'name': current_user.get('name', ''),
@@ -126,10 +103,7 @@ async def get_complete_profile(
                     'updatedAt': datetime.utcnow()
                 }
             
-            # Get health profile
-            health_ref = db.collection('healthProfiles').document(user_id)
-            health_doc = health_ref.get()
-            health_data = health_doc.to_dict() if health_doc.exists else {
+            health_data = health_data or {
                 'height': '',
                 'weight': '',
                 'bmi': '',
@@ -141,19 +115,7 @@ async def get_complete_profile(
                 'updatedAt': datetime.utcnow()
             }
             
-            # Get recent activities (last 10)
-            activities_ref = db.collection('userActivity').document(user_id).collection('activities')
-            activities_query = activities_ref.order_by('timestamp', direction='DESCENDING').limit(10)
-            activities_docs = activities_query.stream()
-            activities = [
-                {**doc.to_dict(), 'id': doc.id} 
-                for doc in activities_docs
-            ]
-            
-            # Get user settings
-            settings_ref = db.collection('userSettings').document(user_id)
-            settings_doc = settings_ref.get()
-            settings_data = settings_doc.to_dict() if settings_doc.exists else {
+            settings_data = settings_data or {
                 'notifications': {
                     'healthReminders': False,
                     'appointmentAlerts': False,
@@ -165,15 +127,6 @@ async def get_complete_profile(
                 }
             }
             
-            # Get medical history
-            history_ref = db.collection('medicalHistory').document(user_id).collection('entries')
-            history_query = history_ref.order_by('timestamp', direction='DESCENDING').limit(5)
-            history_docs = history_query.stream()
-            medical_history = [
-                {**doc.to_dict(), 'id': doc.id} 
-                for doc in history_docs
-            ]
-            
         except Exception as firebase_error:
             logger.warning(f"Firebase error: {firebase_error}, returning development data")
             # Return development data from memory storage if available
@@ -274,7 +227,7 @@ async def get_complete_profile(
 )
 async def update_personal_info(
     user_id: str,
-    update_data: Dict[str, Any],
+    update: PersonalInfoUpdate,
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -286,7 +239,12 @@ async def update_personal_info(
     - 📞 **Phone** - Contact number
     - 📍 **Location** - User location
     - 🚨 **Emergency Contact** - Emergency contact details
+    
+    Only fields that differ from the stored profile are written; an unchanged
+    payload makes no write at all.
     """
+    update_data = update.model_dump(exclude_unset=True)
+    changes = {}
     try:
         # Verify user access
         # Allow development user to access any profile for testing
@@ -297,17 +255,21 @@ async def update_personal_info(
             )
         
         try:
-            db = firebase_service.db
-            if db is None:
+            if not firestore_repository.available:
                 raise Exception("Firebase not configured")
                 
-            user_ref = db.collection('users').document(user_id)
-            
-            # Update user document
-            update_data['updatedAt'] = datetime.utcnow()
-            user_ref.set(update_data, merge=True)
-            
-            logger.info(f"Personal info updated for user: {user_id}")
+            # Write only the changed fields of the user document
+            changes = await profile_writer.write(user_id, 'profile', update_data)
+            if 'email' in changes:
+                # Reminders are addressed to the profile email
+                reminder_scheduler.request_sync(user_id)
+            
+            logger.info(f"Personal info {'updated' if changes else 'unchanged'} for user: {user_id}")
+        except UserAlreadyExistsError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email is already in use"
+            )
         except Exception as firebase_error:
             logger.warning(f"Firebase update failed: {firebase_error}, simulating success for development")
             # In development mode, just log the update
@@ -317,9 +279,12 @@ async def update_personal_info(
                 firebase_service.dev_storage = {}
             if 'users' not in firebase_service.dev_storage:
                 firebase_service.dev_storage['users'] = {}
+            update_data['updatedAt'] = datetime.utcnow()
             firebase_service.dev_storage['users'][user_id] = {**firebase_service.dev_storage['users'].get(user_id, {}), **update_data}
+            changes = update_data
+            profile_cache.invalidate(user_id, 'profile')
         
-        return {"success": True, "message": "Personal information updated successfully"}
+        return {"success": True, "message": "Personal information updated successfully", "written": bool(changes)}
         
     except HTTPException:
         raise
@@ -337,7 +302,7 @@ async def update_personal_info(
 )
 async def update_health_profile(
     user_id: str,
-    health_data: Dict[str, Any],
+    update: ProfileHealthUpdate,
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -348,7 +313,12 @@ async def update_health_profile(
     - 🩸 **Vital Signs** - Blood pressure, heart rate, blood type
     - 💊 **Medical Info** - Allergies, medications
     - 📊 **Health Metrics** - Various health indicators
+    
+    Only fields that differ from the stored health profile are written; an
+    unchanged payload makes no write at all.
     """
+    health_data = update.model_dump(exclude_unset=True)
+    changes = {}
     try:
         # Verify user access
         # Allow development user to access any profile for testing
@@ -359,17 +329,18 @@ async def update_health_profile(
             )
         
         try:
-            db = firebase_service.db
-            if db is None:
+            if not firestore_repository.available:
                 raise Exception("Firebase not configured")
                 
-            health_ref = db.collection('healthProfiles').document(user_id)
-            
-            # Update health document
-            health_data['updatedAt'] = datetime.utcnow()
-            health_ref.set(health_data, merge=True)
-            
-            logger.info(f"Health profile updated for user: {user_id}")
+            # Write only the changed fields of the health document
+            changes = await profile_writer.write(user_id, 'health', health_data)
+            if changes:
+                # Keep a timestamped reading of any vitals that changed
+                await vitals_store.record_profile_vitals(user_id, changes)
+            if 'medications' in changes:
+                reminder_scheduler.request_sync(user_id)
+            
+            logger.info(f"Health profile {'updated' if changes else 'unchanged'} for user: {user_id}")
         except Exception as firebase_error:
             logger.warning(f"Firebase health update failed: {firebase_error}, simulating success for development")
             # In development mode, just log the update
@@ -379,9 +350,12 @@ async def update_health_profile(
                 firebase_service.dev_storage = {}
             if 'healthProfiles' not in firebase_service.dev_storage:
                 firebase_service.dev_storage['healthProfiles'] = {}
+            health_data['updatedAt'] = datetime.utcnow()
             firebase_service.dev_storage['healthProfiles'][user_id] = {**firebase_service.dev_storage['healthProfiles'].get(user_id, {}), **health_data}
+            changes = health_data
+            profile_cache.invalidate(user_id, 'health')
         
-        return {"success": True, "message": "Health profile updated successfully"}
+        return {"success": True, "message": "Health profile updated successfully", "written": bool(changes)}
         
     except HTTPException:
         raise
@@ -421,17 +395,15 @@ async def add_activity_record(
             )
         
         try:
-            db = firebase_service.db
-            if db is None:
+            if not firestore_repository.available:
                 raise Exception("Firebase not configured")
                 
-            activities_ref = db.collection('userActivity').document(user_id).collection('activities')
-            
             # Add timestamp and create activity
             activity_data['timestamp'] = datetime.utcnow()
             activity_data['id'] = str(uuid.uuid4())
             
-            activities_ref.add(activity_data)
+            doc_id = await firestore_repository.add_entry('userActivity', user_id, 'activities', activity_data)
+            await profile_summary.push(user_id, 'activities', {**activity_data, 'id': doc_id})
             
             logger.info(f"Activity added for user: {user_id}")
         except Exception as firebase_error:
@@ -449,6 +421,8 @@ async def add_activity_record(
             firebase_service.dev_storage['activities'][user_id].append(activity_data)
             logger.info(f"Development mode activity added for user {user_id}: {activity_data}")
         
+        profile_cache.invalidate(user_id, 'activities')
+        
         return {"success": True, "message": "Activity record added successfully"}
         
     except HTTPException:
@@ -467,7 +441,7 @@ async def add_activity_record(
 )
 async def update_user_settings(
     user_id: str,
-    settings_data: Dict[str, Any],
+    update: UserSettingsUpdate,
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -477,7 +451,12 @@ async def update_user_settings(
     - 🔔 **Notifications** - Health reminders, appointments, medications
     - 🔒 **Privacy** - Profile visibility, data sharing preferences
     - 🎨 **Preferences** - UI preferences and customizations
+    
+    Only settings that differ from the stored ones are written; an unchanged
+    payload makes no write at all.
     """
+    settings_data = update.model_dump(exclude_unset=True)
+    changes = {}
     try:
         # Verify user access
         # Allow development user to access any profile for testing
@@ -488,17 +467,16 @@ async def update_user_settings(
             )
         
         try:
-            db = firebase_service.db
-            if db is None:
+            if not firestore_repository.available:
                 raise Exception("Firebase not configured")
                 
-            settings_ref = db.collection('userSettings').document(user_id)
-            
-            # Update settings document
-            settings_data['updatedAt'] = datetime.utcnow()
-            settings_ref.set(settings_data, merge=True)
+            # Write only the changed settings
+            changes = await profile_writer.write(user_id, 'settings', settings_data)
+            if 'notifications' in changes or 'timezone' in changes:
+                # Schedule, cancel or move reminders to match the notification flags and time zone
+                reminder_scheduler.request_sync(user_id)
             
-            logger.info(f"Settings updated for user: {user_id}")
+            logger.info(f"Settings {'updated' if changes else 'unchanged'} for user: {user_id}")
         except Exception as firebase_error:
             logger.warning(f"Firebase settings update failed: {firebase_error}, storing in development mode")
             # Store in memory for development
@@ -506,10 +484,13 @@ async def update_user_settings(
                 firebase_service.dev_storage = {}
             if 'settings' not in firebase_service.dev_storage:
                 firebase_service.dev_storage['settings'] = {}
+            settings_data['updatedAt'] = datetime.utcnow()
             firebase_service.dev_storage['settings'][user_id] = settings_data
             logger.info(f"Development mode settings updated for user {user_id}: {settings_data}")
+            changes = settings_data
+            profile_cache.invalidate(user_id, 'settings')
         
-        return {"success": True, "message": "Settings updated successfully"}
+        return {"success": True, "message": "Settings updated successfully", "written": bool(changes)}
         
     except HTTPException:
         raise
@@ -586,15 +567,15 @@ async def upload_profile_picture(
             
             # Update user document with new photo URL
             try:
-                db = firebase_service.db
-                if db is None:
+                if not firestore_repository.available:
                     raise Exception("Firebase not configured")
                     
-                user_ref = db.collection('users').document(user_id)
-                user_ref.set({
+                photo_data = {
                     'photoURL': photo_url,
                     'updatedAt': datetime.utcnow()
-                }, merge=True)
+                }
+                await firestore_repository.set('users', user_id, photo_data, merge=True)
+                await profile_summary.merge(user_id, 'profile', photo_data)
             except Exception as firebase_error:
                 logger.warning(f"Firebase photo URL update failed: {firebase_error}, storing in development mode")
                 # Store in memory for development
@@ -607,6 +588,7 @@ async def upload_profile_picture(
                 firebase_service.dev_storage['users'][user_id]['photoURL'] = photo_url
                 firebase_service.dev_storage['users'][user_id]['updatedAt'] = datetime.utcnow()
             
+            profile_cache.invalidate(user_id, 'profile')
             logger.info(f"Profile picture uploaded for user: {user_id}")
             
             return {
@@ -660,17 +642,15 @@ async def add_medical_history(
             )
         
         try:
-            db = firebase_service.db
-            if db is None:
+            if not firestore_repository.available:
                 raise Exception("Firebase not configured")
                 
-            history_ref = db.collection('medicalHistory').document(user_id).collection('entries')
-            
             # Add timestamp and create history entry
             history_data['timestamp'] = datetime.utcnow()
             history_data['id'] = str(uuid.uuid4())
             
-            history_ref.add(history_data)
+            doc_id = await firestore_repository.add_entry('medicalHistory', user_id, 'entries', history_data)
+            await profile_summary.push(user_id, 'history', {**history_data, 'id': doc_id})
             
             logger.info(f"Medical history added for user: {user_id}")
         except Exception as firebase_error:
@@ -688,6 +668,8 @@ async def add_medical_history(
             firebase_service.dev_storage['medicalHistory'][user_id].append(history_data)
             logger.info(f"Development mode medical history added for user {user_id}: {history_data}")
         
+        profile_cache.invalidate(user_id, 'history')
+        
         return {"success": True, "message": "Medical history entry added successfully"}
         
     except HTTPException:
@@ -699,22 +681,120 @@ async def add_medical_history(
             detail="Failed to add medical history entry"
         )
 
+@router.post(
+    "/ingest/{user_id}",
+    response_model=IngestResponse,
+    summary="📥 Bulk Ingest Records",
+    description="Upload many activity and medical history records in one NDJSON request",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string", "format": "binary"}}}
+        }
+    }
+)
+async def bulk_ingest_records(
+    user_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    ## 📥 Bulk Ingest Records
+    
+    For companion apps syncing after being offline. The body is NDJSON, one record per line:
+    - 🏷️ **kind** - `activity` or `medicalHistory`
+    - 🆔 **id** - Optional client id; re-sending a record with the same id overwrites it
+    - 🕒 **timestamp** - When it happened (defaults to upload time)
+    - 📄 **data** - The record's fields
+    
+    Lines are validated as they arrive and written in batches of up to 500.
+    The response reports a result for every line, so a client can retry only
+    the failed ones.
+    """
+    # Allow development user to access any profile for testing
+    if current_user.get('uid') != user_id and current_user.get('uid') != 'dev_user_123':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+
+    try:
+        results = await bulk_ingestor.ingest(user_id, request.stream())
+    except Exception as e:
+        logger.error(f"❌ Bulk ingest error for {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to ingest records"
+        )
+
+    created = sum(1 for result in results if result.status == "created")
+    logger.info(f"✅ Bulk ingest for {user_id}: {created} created, {len(results) - created} failed")
+    return IngestResponse(
+        success=created == len(results),
+        created=created,
+        failed=len(results) - created,
+        results=results
+    )
+
+async def _page_user_entries(
+    user_id: str,
+    collection: str,
+    subcollection: str,
+    dev_key: str,
+    limit: int,
+    start_after: Optional[str],
+    from_: Optional[datetime],
+    to: Optional[datetime]
+) -> Dict[str, Any]:
+    """Paginated, date-filtered entries of a per-user subcollection, newest first"""
+    try:
+        try:
+            if not firestore_repository.available:
+                raise Exception("Firebase not configured")
+
+            entries, next_cursor = await firestore_repository.page_entries(
+                collection, user_id, subcollection, order_by='timestamp',
+                limit=limit, start_after=start_after, start=from_, end=to
+            )
+        except ValueError:
+            raise
+        except Exception as firebase_error:
+            logger.warning(f"Firebase {dev_key} get failed: {firebase_error}, using development data")
+            # Get from memory storage for development
+            stored = getattr(firebase_service, 'dev_storage', {}).get(dev_key, {}).get(user_id, [])
+            entries, next_cursor = paginate_entries(stored, 'timestamp', limit, start_after, from_, to)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    return {
+        "success": True,
+        "data": entries,
+        "next_cursor": next_cursor
+    }
+
 @router.get(
     "/medical-history/{user_id}",
     summary="📋 Get Medical History",
-    description="Retrieve user's complete medical history"
+    description="Retrieve user's medical history, newest first, one page at a time"
 )
 async def get_medical_history(
     user_id: str,
+    limit: int = Query(50, ge=1, le=200, description="Entries per page"),
+    start_after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    from_: Optional[datetime] = Query(None, alias="from", description="Only entries at or after this time"),
+    to: Optional[datetime] = Query(None, description="Only entries at or before this time"),
     current_user: dict = Depends(get_current_user)
 ):
     """
     ## 📋 Get Medical History
     
-    Retrieves complete medical history:
+    Retrieves medical history:
     - 📅 **Chronological Order** - Most recent first
-    - 🏥 **All Records** - Checkups, tests, treatments
-    - 📊 **Detailed Info** - Complete medical data
+    - 📄 **Paginated** - Pass `next_cursor` back as `start_after` for the next page
+    - 🗓️ **Date Range** - Optional `from` / `to` filters
     """
     try:
         # Verify user access
@@ -725,31 +805,9 @@ async def get_medical_history(
                 detail="Access denied"
             )
         
-        try:
-            db = firebase_service.db
-            if db is None:
-                raise Exception("Firebase not configured")
-                
-            history_ref = db.collection('medicalHistory').document(user_id).collection('entries')
-            history_query = history_ref.order_by('timestamp', direction='DESCENDING')
-            history_docs = history_query.stream()
-            
-            medical_history = [
-                {**doc.to_dict(), 'id': doc.id} 
-                for doc in history_docs
-            ]
-        except Exception as firebase_error:
-            logger.warning(f"Firebase medical history get failed: {firebase_error}, using development data")
-            # Get from memory storage for development
-            if hasattr(firebase_service, 'dev_storage') and 'medicalHistory' in firebase_service.dev_storage:
-                medical_history = firebase_service.dev_storage['medicalHistory'].get(user_id, [])
-            else:
-                medical_history = []
-        
-        return {
-            "success": True,
-            "data": medical_history
-        }
+        return await _page_user_entries(
+            user_id, 'medicalHistory', 'entries', 'medicalHistory', limit, start_after, from_, to
+        )
         
     except HTTPException:
         raise
@@ -759,3 +817,57 @@ async def get_medical_history(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve medical history"
         )
+
+@router.get(
+    "/activity/{user_id}",
+    summary="📊 Get Activity History",
+    description="Retrieve user's activities, newest first, one page at a time"
+)
+async def get_activities(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=200, description="Entries per page"),
+    start_after: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    from_: Optional[datetime] = Query(None, alias="from", description="Only activities at or after this time"),
+    to: Optional[datetime] = Query(None, description="Only activities at or before this time"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    ## 📊 Get Activity History
+    
+    Same paging and date filters as the medical history endpoint
+    """
+    try:
+        # Verify user access
+        # Allow development user to access any profile for testing
+        if current_user.get('uid') != user_id and current_user.get('uid') != 'dev_user_123':
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Access denied"
+            )
+        
+        return await _page_user_entries(
+            user_id, 'userActivity', 'activities', 'activities', limit, start_after, from_, to
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting activities: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve activities"
+        )
+
+@router.get(
+    "/cache/metrics",
+    summary="📈 Profile Cache Metrics",
+    description="Hit ratio, size, staleness and invalidation counts of the profile read cache, plus written and skipped profile writes"
+)
+async def get_profile_cache_metrics():
+    """Profile read cache and write elision metrics for this worker"""
+    return {
+        **profile_cache.get_metrics(),
+        "summary": profile_summary.get_metrics(),
+        "writes": profile_writer.get_metrics(),
+        "ingest": bulk_ingestor.get_metrics()
+    }
@@ -0,0 +1,99 @@
+"""
+Reminder routes - list, add and cancel a user's scheduled notifications
+"""
+from fastapi import APIRouter, HTTPException, status, Depends
+from app.models.reminder import AppointmentReminderCreate, ReminderResponse, ReminderListResponse
+from app.services.firestore_repository import firestore_repository
+from app.services.mail_queue import mail_queue
+from app.services.reminder_scheduler import reminder_scheduler, RemindersDisabledError
+from app.utils.auth import get_current_user, require_admin_key
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/reminders", tags=["🔔 Reminders"])
+
+def _check_access(current_user: dict, user_id: str):
+    # Allow development user to access any profile for testing
+    if current_user.get('uid') != user_id and current_user.get('uid') != 'dev_user_123':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    if not firestore_repository.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Firebase not configured"
+        )
+
+@router.get("/metrics", dependencies=[Depends(require_admin_key)])
+async def get_reminder_metrics():
+    """
+    Reminder scheduler and outbound mail queue metrics for this worker (admin only)
+    """
+    return {
+        "scheduler": reminder_scheduler.get_metrics(),
+        "mail": mail_queue.get_metrics()
+    }
+
+@router.get("/{user_id}", response_model=ReminderListResponse)
+async def list_reminders(user_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    The user's pending reminders, soonest first
+    """
+    _check_access(current_user, user_id)
+    try:
+        reminders = await reminder_scheduler.list_user(user_id)
+        return ReminderListResponse(reminders=[ReminderResponse(**r.to_response()) for r in reminders])
+    except Exception as e:
+        logger.error(f"❌ Error listing reminders: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list reminders"
+        )
+
+@router.post("/{user_id}", response_model=ReminderResponse, status_code=status.HTTP_201_CREATED)
+async def add_appointment_reminder(
+    user_id: str,
+    reminder: AppointmentReminderCreate,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Schedule a one-off appointment reminder (needs appointment alerts turned on)
+    """
+    _check_access(current_user, user_id)
+    try:
+        created = await reminder_scheduler.add_appointment(user_id, reminder.dueAt, reminder.message)
+        return ReminderResponse(**created.to_response())
+    except RemindersDisabledError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"❌ Error adding reminder: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to add reminder"
+        )
+
+@router.delete("/{user_id}/{reminder_id}")
+async def cancel_reminder(user_id: str, reminder_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Cancel a pending reminder
+    """
+    _check_access(current_user, user_id)
+    try:
+        if not await reminder_scheduler.cancel(user_id, reminder_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Reminder not found"
+            )
+        return {"success": True, "message": "Reminder cancelled"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error cancelling reminder: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to cancel reminder"
+        )
@@ -0,0 +1,181 @@
+"""
+Vital signs routes - record timestamped readings and query trends over them
+"""
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from app.models.vitals import VitalsUpload, VitalsSeriesResponse, VitalsPoint, VitalsTrend
+from app.services.firestore_repository import firestore_repository
+from app.services.vitals_store import vitals_store, choose_resolution
+from app.utils import vitals_analytics as analytics
+from app.utils.auth import get_current_user
+from app.utils.pagination import naive_utc
+from app.config import settings
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/vitals", tags=["❤️ Vital Signs"])
+
+_MAX_DAYS = {"raw": lambda: settings.VITALS_RAW_MAX_DAYS, "hour": lambda: settings.VITALS_HOURLY_MAX_DAYS}
+
+def _check_access(current_user: dict, user_id: str):
+    # Allow development user to access any profile for testing
+    if current_user.get('uid') != user_id and current_user.get('uid') != 'dev_user_123':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    if not firestore_repository.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Firebase not configured"
+        )
+
+def _number(value: float) -> Optional[float]:
+    return None if math.isnan(value) else round(float(value), 3)
+
+@router.post(
+    "/{user_id}",
+    summary="❤️ Record Vital Signs",
+    description="Store timestamped heart rate, blood pressure, weight, height and SpO2 readings"
+)
+async def record_vitals(
+    user_id: str,
+    upload: VitalsUpload,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    ## ❤️ Record Vital Signs
+
+    Accepts up to 10,000 readings per request (about a week of per-minute wearable data):
+    - 🕒 **Per minute** - readings are stored at minute resolution; a later reading for the same minute replaces the earlier one
+    - 📦 **Day buckets** - one document per user per day, with hourly and daily rollups kept beside it
+    """
+    _check_access(current_user, user_id)
+    try:
+        days = await vitals_store.append(user_id, upload.readings)
+        logger.info(f"✅ Stored {len(upload.readings)} vital readings over {days} days for user: {user_id}")
+        return {"success": True, "stored": len(upload.readings), "days": days}
+    except Exception as e:
+        logger.error(f"❌ Error storing vitals for {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to store vital signs"
+        )
+
+@router.get(
+    "/{user_id}/latest",
+    summary="🩺 Latest Vital Signs",
+    description="Most recent reading of every vital sign, with BMI"
+)
+async def get_latest_vitals(
+    user_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Latest value and time of each recorded vital sign"""
+    _check_access(current_user, user_id)
+    try:
+        latest = await vitals_store.latest(user_id)
+        height = await vitals_store.height_cm(user_id)
+        if "weight" in latest and height:
+            latest["bmi"] = {
+                "value": round(latest["weight"]["value"] / (height / 100) ** 2, 1),
+                "timestamp": latest["weight"]["timestamp"]
+            }
+        return {"success": True, "data": latest}
+    except Exception as e:
+        logger.error(f"❌ Error getting latest vitals for {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve vital signs"
+        )
+
+@router.get(
+    "/{user_id}/series",
+    response_model=VitalsSeriesResponse,
+    summary="📈 Vital Signs Trends",
+    description="A vital sign over a date range with moving average and trend"
+)
+async def get_vitals_series(
+    user_id: str,
+    metric: Literal["heartRate", "systolic", "diastolic", "weight", "height", "spo2", "bmi"] = Query(...),
+    from_: Optional[datetime] = Query(None, alias="from", description="Range start (default: 30 days before `to`)"),
+    to: Optional[datetime] = Query(None, description="Range end (default: now)"),
+    resolution: Literal["auto", "raw", "hour", "day"] = Query("auto", description="Per-minute readings or hourly/daily rollups"),
+    window: int = Query(7, ge=1, le=1000, description="Moving average window, in points"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    ## 📈 Vital Signs Trends
+
+    - 🔍 **Resolution** - `auto` picks per-minute readings for short ranges, hourly
+      rollups for up to a month and daily rollups beyond that, so years of data cost
+      one read per month
+    - 📉 **Moving average** - count-weighted over the last `window` points
+    - 📐 **Trend** - least-squares slope per day
+    - ⚖️ **BMI** - derived from weight and the latest recorded height
+    """
+    _check_access(current_user, user_id)
+    end = naive_utc(to) if to else datetime.utcnow()
+    start = naive_utc(from_) if from_ else end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="`from` must be before `to`"
+        )
+    if resolution == "auto":
+        resolution = choose_resolution(start, end)
+    elif resolution in _MAX_DAYS and end - start > timedelta(days=_MAX_DAYS[resolution]()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ranges longer than {_MAX_DAYS[resolution]()} days need a coarser resolution"
+        )
+
+    try:
+        if metric == "bmi":
+            height = await vitals_store.height_cm(user_id)
+            if not height:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="BMI needs a recorded height"
+                )
+            buckets = analytics.scale(
+                await vitals_store.load(user_id, "weight", start, end, resolution), 1 / (height / 100) ** 2
+            )
+        else:
+            buckets = await vitals_store.load(user_id, metric, start, end, resolution)
+
+        moving = analytics.moving_average(buckets, window)
+        fitted = analytics.trend(buckets)
+        means = buckets.sum / buckets.count if len(buckets.count) else buckets.sum
+        points = [
+            VitalsPoint(
+                timestamp=datetime.utcfromtimestamp(float(time)),
+                mean=round(float(mean), 3),
+                min=round(float(low), 3),
+                max=round(float(high), 3),
+                count=int(count)
+            )
+            for time, mean, low, high, count in zip(buckets.times, means, buckets.min, buckets.max, buckets.count)
+        ]
+        summary = analytics.summarize(buckets)
+        return VitalsSeriesResponse(
+            metric=metric,
+            resolution=resolution,
+            points=points,
+            moving_average=[_number(value) for value in moving],
+            trend=VitalsTrend(**fitted) if fitted else None,
+            count=summary["count"],
+            mean=_number(summary["mean"]) if summary["mean"] is not None else None,
+            min=summary["min"],
+            max=summary["max"]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error querying vitals for {user_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve vital signs"
+        )
@@ -0,0 +1,139 @@
+"""
+Bulk ingestion of activity and medical history records from NDJSON uploads,
+committed in Firestore batched writes
+"""
+from app.config import settings
+from app.models.profile import IngestRecord, IngestLineResult
+from app.services.firebase_service import firebase_service
+from app.services.firestore_repository import firestore_repository
+from app.services.profile_cache import profile_cache
+from app.services.profile_summary import profile_summary
+from app.utils.ndjson import iter_lines
+from pydantic import ValidationError
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Tuple
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects batched writes with more than 500 operations
+MAX_BATCH_WRITES = 500
+
+# kind -> (collection, subcollection, profile cache slice, dev_storage key)
+INGEST_TARGETS = {
+    "activity": ("userActivity", "activities", "activities", "activities"),
+    "medicalHistory": ("medicalHistory", "entries", "history", "medicalHistory"),
+}
+
+def _line_error(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first.get("loc", ()))
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+class BulkIngestor:
+    def __init__(self):
+        self.batch_size = min(settings.INGEST_BATCH_SIZE, MAX_BATCH_WRITES)
+        self.uploads = 0
+        self.created = 0
+        self.rejected = 0
+        self.failed_batches = 0
+
+    def _parse(self, line: bytes) -> IngestRecord:
+        return IngestRecord.model_validate_json(line)
+
+    def _document(self, record: IngestRecord) -> Tuple[str, Dict[str, Any]]:
+        doc_id = record.id or str(uuid.uuid4())
+        data = {**record.data, 'id': doc_id, 'timestamp': record.timestamp or datetime.utcnow()}
+        return doc_id, data
+
+    async def _commit(self, user_id: str, pending: List[Tuple[int, IngestRecord]]) -> List[IngestLineResult]:
+        """Write one batch of validated records; a failed commit fails every line in it"""
+        documents = [(line, record.kind, *self._document(record)) for line, record in pending]
+        try:
+            if firestore_repository.available:
+                batch = firestore_repository.batch()
+                for _, kind, doc_id, data in documents:
+                    collection, subcollection, _, _ = INGEST_TARGETS[kind]
+                    batch.set(firestore_repository.subcollection(collection, user_id, subcollection).document(doc_id), data)
+                await batch.commit()
+            else:
+                # Store in memory for development
+                if not hasattr(firebase_service, 'dev_storage'):
+                    firebase_service.dev_storage = {}
+                for _, kind, doc_id, data in documents:
+                    dev_key = INGEST_TARGETS[kind][3]
+                    firebase_service.dev_storage.setdefault(dev_key, {}).setdefault(user_id, []).append(data)
+        except Exception as e:
+            self.failed_batches += 1
+            logger.error(f"❌ Bulk ingest batch of {len(documents)} failed for {user_id}: {e}")
+            return [IngestLineResult(line=line, status="error", error="Write failed, retry this record") for line, *_ in documents]
+
+        self.created += len(documents)
+        return [IngestLineResult(line=line, status="created", id=doc_id) for line, _, doc_id, _ in documents]
+
+    async def ingest(self, user_id: str, body: AsyncIterator[bytes]) -> List[IngestLineResult]:
+        """
+        Parse the upload as it streams in, validating line by line and committing
+        every batch_size valid records, so at most one batch is held in memory
+        """
+        self.uploads += 1
+        results: List[IngestLineResult] = []
+        pending: List[Tuple[int, IngestRecord]] = []
+        kinds = set()
+        lines = 0
+
+        async for line_number, line in iter_lines(body, settings.INGEST_MAX_LINE_BYTES):
+            lines += 1
+            if lines > settings.INGEST_MAX_LINES:
+                results.append(IngestLineResult(
+                    line=line_number, status="error", error=f"Upload exceeds {settings.INGEST_MAX_LINES} records"
+                ))
+                break
+            if line is None:
+                results.append(IngestLineResult(
+                    line=line_number, status="error", error=f"Line exceeds {settings.INGEST_MAX_LINE_BYTES} bytes"
+                ))
+                continue
+            try:
+                record = self._parse(line)
+            except ValidationError as e:
+                results.append(IngestLineResult(line=line_number, status="error", error=_line_error(e)))
+                continue
+
+            pending.append((line_number, record))
+            kinds.add(record.kind)
+            if len(pending) >= self.batch_size:
+                results.extend(await self._commit(user_id, pending))
+                pending = []
+
+        if pending:
+            results.extend(await self._commit(user_id, pending))
+        self.rejected += sum(1 for result in results if result.status == "error")
+
+        if any(result.status == "created" for result in results):
+            await self._refresh_views(user_id, kinds)
+        results.sort(key=lambda result: result.line)
+        return results
+
+    async def _refresh_views(self, user_id: str, kinds):
+        """One cache invalidation and summary rebuild per upload instead of per record"""
+        profile_cache.invalidate(user_id, *(INGEST_TARGETS[kind][2] for kind in kinds))
+        if not firestore_repository.available:
+            return
+        try:
+            await profile_summary.rebuild(user_id)
+        except Exception as e:
+            await profile_summary.discard(user_id, e)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "uploads": self.uploads,
+            "created": self.created,
+            "rejected": self.rejected,
+            "failed_batches": self.failed_batches,
+            "batch_size": self.batch_size
+        }
+
+# Global bulk ingestor instance
+bulk_ingestor = BulkIngestor()
@@ -0,0 +1,187 @@
+"""
+Two-tier diagnosis response cache - in-process LRU/TTL backed by a local SQLite file
+"""
+from app.config import settings
+from app.utils.ttl_cache import TTLCache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_SYMPTOM_SEPARATORS = re.compile(r"[,;\n]+")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_symptoms(symptoms: str) -> str:
+    """Canonical form of a symptom list: lowercased, trimmed, de-duplicated and sorted"""
+    parts = {
+        _WHITESPACE.sub(" ", part).strip(" .")
+        for part in _SYMPTOM_SEPARATORS.split(symptoms.lower())
+    }
+    return ", ".join(sorted(part for part in parts if part))
+
+def diagnosis_cache_key(symptoms: str, language: str = "en") -> str:
+    """Cache key for a symptom set and response language"""
+    normalized = f"{(language or 'en').lower()}|{normalize_symptoms(symptoms)}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+class DiagnosisCache:
+    def __init__(self):
+        self.ttl = settings.DIAGNOSIS_CACHE_TTL_SECONDS
+        self.memory = TTLCache(maxsize=settings.DIAGNOSIS_CACHE_MEMORY_ENTRIES, ttl=self.ttl)
+        self.disk_max_entries = settings.DIAGNOSIS_CACHE_DISK_ENTRIES
+        self.path = Path(settings.DIAGNOSIS_CACHE_PATH)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS diagnosis_cache (
+                    key TEXT PRIMARY KEY,
+                    language TEXT NOT NULL,
+                    symptoms TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_diagnosis_cache_access ON diagnosis_cache(last_access)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response, expires_at FROM diagnosis_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            response, expires_at = row
+            if expires_at <= now:
+                conn.execute("DELETE FROM diagnosis_cache WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE diagnosis_cache SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return response, expires_at - now
+
+    def _disk_set(self, key: str, symptoms: str, language: str, response: str) -> int:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                """INSERT OR REPLACE INTO diagnosis_cache
+                   (key, language, symptoms, response, created_at, expires_at, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (key, language, normalize_symptoms(symptoms), response, now, now + self.ttl, now)
+            )
+            # Drop expired rows first, then the least recently used beyond the size bound
+            evicted = conn.execute("DELETE FROM diagnosis_cache WHERE expires_at <= ?", (now,)).rowcount
+            (count,) = conn.execute("SELECT COUNT(*) FROM diagnosis_cache").fetchone()
+            if count > self.disk_max_entries:
+                evicted += conn.execute(
+                    """DELETE FROM diagnosis_cache WHERE key IN (
+                           SELECT key FROM diagnosis_cache ORDER BY last_access ASC LIMIT ?
+                       )""",
+                    (count - self.disk_max_entries,)
+                ).rowcount
+            conn.commit()
+            return evicted
+
+    def _disk_purge(self, language: Optional[str]) -> int:
+        with self._lock:
+            conn = self._connection()
+            if language:
+                deleted = conn.execute("DELETE FROM diagnosis_cache WHERE language = ?", (language,)).rowcount
+            else:
+                deleted = conn.execute("DELETE FROM diagnosis_cache").rowcount
+            conn.commit()
+            return deleted
+
+    def _disk_size(self) -> int:
+        with self._lock:
+            (count,) = self._connection().execute("SELECT COUNT(*) FROM diagnosis_cache").fetchone()
+            return count
+
+    async def get(self, symptoms: str, language: str = "en") -> Tuple[Optional[str], str]:
+        """Look up a cached diagnosis, returning (response, tier) where tier is memory, disk or miss"""
+        key = diagnosis_cache_key(symptoms, language)
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached, "memory"
+
+        try:
+            entry = await asyncio.to_thread(self._disk_get, key)
+        except Exception as e:
+            logger.warning(f"⚠️ Diagnosis disk cache read failed: {e}")
+            entry = None
+
+        if entry is None:
+            self.disk_misses += 1
+            return None, "miss"
+
+        response, remaining_ttl = entry
+        self.disk_hits += 1
+        self.memory.set(key, response, ttl=remaining_ttl)
+        return response, "disk"
+
+    async def set(self, symptoms: str, language: str, response: str):
+        """Store a diagnosis in both tiers"""
+        key = diagnosis_cache_key(symptoms, language)
+        self.memory.set(key, response)
+        try:
+            self.disk_evictions += await asyncio.to_thread(self._disk_set, key, symptoms, language, response)
+        except Exception as e:
+            logger.warning(f"⚠️ Diagnosis disk cache write failed: {e}")
+
+    async def purge(self, language: Optional[str] = None) -> Dict[str, int]:
+        """Remove cached diagnoses, optionally only those for one language"""
+        # Memory keys are hashes, so even a per-language purge clears the memory tier entirely
+        memory_purged = self.memory.clear()
+        disk_purged = await asyncio.to_thread(self._disk_purge, language)
+        logger.info(f"🧹 Diagnosis cache purged: {memory_purged} memory, {disk_purged} disk entries")
+        return {"memory": memory_purged, "disk": disk_purged}
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        try:
+            disk_size = await asyncio.to_thread(self._disk_size)
+        except Exception:
+            disk_size = None
+        return {
+            "memory": self.memory.stats(),
+            "disk": {
+                "size": disk_size,
+                "max_entries": self.disk_max_entries,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+                "evictions": self.disk_evictions
+            }
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Global diagnosis cache instance
+diagnosis_cache = DiagnosisCache()
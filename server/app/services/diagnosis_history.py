@@ -0,0 +1,190 @@
+"""
+Diagnosis history - write-behind queue persisting Diagnosis records to
+Firestore in batches, with the HTML stored gzip-compressed
+"""
+from app.config import settings
+from app.models.diagnosis import Diagnosis
+from app.services.firebase_service import firebase_service
+from app.services.firestore_repository import firestore_repository
+from app.utils.pagination import encode_cursor, decode_cursor
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import gzip
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Firestore rejects write batches larger than this
+_FIRESTORE_BATCH_LIMIT = 500
+
+def compress_diagnosis(html: str) -> bytes:
+    return gzip.compress(html.encode("utf-8"), compresslevel=6)
+
+def decompress_diagnosis(data: bytes) -> str:
+    return gzip.decompress(data).decode("utf-8")
+
+def diagnosis_to_document(diagnosis: Diagnosis) -> Dict[str, Any]:
+    """Firestore document for a Diagnosis, with the HTML replaced by its gzip form"""
+    document = diagnosis.to_dict()
+    document["diagnosisGz"] = compress_diagnosis(document.pop("diagnosis"))
+    return document
+
+def diagnosis_from_document(document: Dict[str, Any]) -> Diagnosis:
+    data = dict(document)
+    compressed = data.pop("diagnosisGz", None)
+    if compressed is not None:
+        data["diagnosis"] = decompress_diagnosis(compressed)
+    return Diagnosis.from_dict(data)
+
+class DiagnosisHistory:
+    def __init__(self):
+        self.batch_size = max(1, min(settings.DIAGNOSIS_HISTORY_BATCH_SIZE, _FIRESTORE_BATCH_LIMIT))
+        self.flush_interval = max(settings.DIAGNOSIS_HISTORY_FLUSH_MS, 1) / 1000.0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.DIAGNOSIS_HISTORY_QUEUE_SIZE)
+        self._task: Optional[asyncio.Task] = None
+        # Records taken off the queue but not yet written
+        self._batch: List[Diagnosis] = []
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+        self._flush_time_total = 0.0
+
+    def record(self, uid: str, symptoms: str, diagnosis_html: str, language: str = "en"):
+        """Queue a diagnosis for persistence without waiting on Firestore"""
+        diagnosis = Diagnosis(
+            userId=uid,
+            firebase_uid=uid,
+            symptoms=symptoms,
+            diagnosis=diagnosis_html,
+            language=language
+        )
+        try:
+            self._queue.put_nowait(diagnosis)
+            self.enqueued += 1
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning("⚠️ Diagnosis history queue full, dropping record")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("✅ Diagnosis history writer started")
+
+    async def stop(self):
+        """Stop the writer after flushing everything still queued"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Documents are keyed by diagnosis id, so rewriting a batch that was
+        # mid-commit when cancelled is harmless
+        pending, self._batch = self._batch, []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        for start in range(0, len(pending), self.batch_size):
+            await self._flush(pending[start:start + self.batch_size])
+        logger.info(f"🔌 Diagnosis history writer drained ({len(pending)} pending records)")
+
+    async def _run(self):
+        while True:
+            self._batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    self._batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(self._batch)
+            self._batch = []
+
+    async def _flush(self, batch: List[Diagnosis]):
+        started = time.perf_counter()
+        try:
+            await self._write_batch(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"❌ Failed to write {len(batch)} diagnosis records: {e}")
+        self.flushes += 1
+        self._flush_time_total += time.perf_counter() - started
+
+    async def _write_batch(self, batch: List[Diagnosis]):
+        if not firestore_repository.available:
+            # Development mode without Firestore - keep history in memory
+            if not hasattr(firebase_service, 'dev_storage'):
+                firebase_service.dev_storage = {}
+            storage = firebase_service.dev_storage.setdefault('diagnoses', {})
+            for diagnosis in batch:
+                storage.setdefault(diagnosis.userId, []).append(diagnosis_to_document(diagnosis))
+            return
+
+        # Compressing a full batch is CPU work, keep it off the event loop
+        documents = await asyncio.to_thread(lambda: [diagnosis_to_document(d) for d in batch])
+        write_batch = firestore_repository.batch()
+        for diagnosis, document in zip(batch, documents):
+            ref = firestore_repository.subcollection('diagnoses', diagnosis.userId, 'entries').document(diagnosis.id)
+            write_batch.set(ref, document)
+        await write_batch.commit()
+
+    async def list_entries(
+        self,
+        uid: str,
+        limit: int = 20,
+        start_after: Optional[str] = None
+    ) -> Tuple[List[Diagnosis], Optional[str]]:
+        """
+        One page of a user's diagnoses, newest first. start_after is the opaque
+        cursor of the previous page; returns the entries and the next cursor.
+        Raises ValueError for a malformed cursor.
+        """
+        documents = await self._read_page(uid, limit + 1, decode_cursor(start_after) if start_after else None)
+        entries = [diagnosis_from_document(document) for document in documents[:limit]]
+        next_cursor = encode_cursor(entries[-1].id) if len(documents) > limit else None
+        return entries, next_cursor
+
+    async def _read_page(self, uid: str, limit: int, start_after: Optional[str]) -> List[Dict[str, Any]]:
+        if not firestore_repository.available:
+            documents = sorted(
+                getattr(firebase_service, 'dev_storage', {}).get('diagnoses', {}).get(uid, []),
+                key=lambda document: document['createdAt'],
+                reverse=True
+            )
+            if start_after:
+                ids = [document['id'] for document in documents]
+                documents = documents[ids.index(start_after) + 1:] if start_after in ids else []
+            return documents[:limit]
+
+        entries = firestore_repository.subcollection('diagnoses', uid, 'entries')
+        query = entries.order_by('createdAt', direction='DESCENDING')
+        if start_after:
+            cursor = await entries.document(start_after).get()
+            if not cursor.exists:
+                return []
+            query = query.start_after(cursor)
+        return [doc.to_dict() async for doc in query.limit(limit).stream()]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "flush_avg_ms": round(self._flush_time_total / self.flushes * 1000, 2) if self.flushes else 0.0
+        }
+
+# Global diagnosis history instance
+diagnosis_history = DiagnosisHistory()
@@ -0,0 +1,193 @@
+"""
+Offline rule-based diagnosis used when Gemini is unavailable - a bundled
+symptom/condition knowledge base compiled at import into a regex synonym
+index and a weighted condition x symptom matrix
+"""
+from app.utils.diagnosis_html import render_diagnosis
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Tuple
+import json
+import logging
+import re
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+_KNOWLEDGE_PATH = _DATA_DIR / "symptom_knowledge.json"
+_LOCALES_PATH = _DATA_DIR / "fallback_locales.json"
+
+# Blend of profile similarity and how much of the condition's profile was reported
+_COSINE_WEIGHT = 0.7
+_COVERAGE_WEIGHT = 0.3
+_MIN_SCORE = 0.1
+_MAX_CONFIDENCE = 95
+_ALTERNATIVES = 3
+
+class FallbackMatch(NamedTuple):
+    condition: Dict[str, Any]
+    score: float
+    matched: List[str]
+    alternatives: List[str]
+
+class FallbackDiagnosisEngine:
+    def __init__(self, knowledge: Dict[str, Any], locales: Dict[str, Any]):
+        self.locales = locales
+        self.conditions: List[Dict[str, Any]] = knowledge["conditions"]
+        self.fallback_condition: Dict[str, Any] = knowledge["fallback_condition"]
+        self.emergency_condition: Dict[str, Any] = knowledge["emergency_condition"]
+
+        symptom_ids = list(knowledge["symptoms"])
+        self._symptom_index = {symptom_id: i for i, symptom_id in enumerate(symptom_ids)}
+        self._red_flags = [self._symptom_index[symptom_id] for symptom_id in knowledge["red_flags"]]
+
+        # One alternation over every synonym, longest first so "runny nose"
+        # wins over "nose"; word boundaries only make sense for ASCII phrases
+        self._synonyms: Dict[str, int] = {}
+        for symptom_id, phrases in knowledge["symptoms"].items():
+            for phrase in [symptom_id.replace("_", " "), *phrases]:
+                self._synonyms.setdefault(phrase.lower(), self._symptom_index[symptom_id])
+        alternatives = [
+            rf"\b{re.escape(phrase)}\b" if phrase.isascii() else re.escape(phrase)
+            for phrase in sorted(self._synonyms, key=len, reverse=True)
+        ]
+        self._pattern = re.compile("|".join(alternatives), re.IGNORECASE)
+
+        # idf-weighted profiles: symptoms shared by many conditions discriminate less
+        weights = np.zeros((len(self.conditions), len(symptom_ids)), dtype=np.float64)
+        for row, condition in enumerate(self.conditions):
+            for symptom_id, weight in condition["symptoms"].items():
+                weights[row, self._symptom_index[symptom_id]] = weight
+        document_frequency = np.count_nonzero(weights, axis=0)
+        idf = np.log((1 + len(self.conditions)) / (1 + document_frequency)) + 1.0
+        weighted = weights * idf
+        self._profiles = weighted / np.linalg.norm(weighted, axis=1, keepdims=True)
+        self._profile_totals = weighted.sum(axis=1)
+        self._weighted = weighted
+
+    @classmethod
+    def load(cls) -> "FallbackDiagnosisEngine":
+        with open(_KNOWLEDGE_PATH, encoding="utf-8") as f:
+            knowledge = json.load(f)
+        with open(_LOCALES_PATH, encoding="utf-8") as f:
+            locales = json.load(f)
+        return cls(knowledge, locales)
+
+    def match(self, symptoms: str) -> FallbackMatch:
+        """Rank conditions against the symptoms found in free text"""
+        query = np.zeros(len(self._symptom_index), dtype=np.float64)
+        matched: List[str] = []
+        for found in self._pattern.finditer(symptoms):
+            index = self._synonyms[found.group(0).lower()]
+            if not query[index]:
+                query[index] = 1.0
+                matched.append(found.group(0).strip())
+
+        if not matched:
+            return FallbackMatch(self.fallback_condition, 0.0, [], [])
+
+        cosine = self._profiles @ (query / np.sqrt(len(matched)))
+        coverage = (self._weighted @ query) / self._profile_totals
+        scores = _COSINE_WEIGHT * cosine + _COVERAGE_WEIGHT * coverage
+
+        ranked = np.argsort(-scores)
+        candidates = [
+            self.conditions[i]["id"]
+            for i in ranked[:1 + _ALTERNATIVES]
+            if scores[i] >= _MIN_SCORE
+        ]
+
+        # Red-flag symptoms override the ranking: the best matches are only
+        # listed as alternatives and no home treatment is suggested
+        if query[self._red_flags].any():
+            return FallbackMatch(self.emergency_condition, 1.0, matched, candidates[:_ALTERNATIVES])
+
+        best = int(ranked[0])
+        if scores[best] < _MIN_SCORE:
+            return FallbackMatch(self.fallback_condition, 0.0, matched, [])
+        return FallbackMatch(self.conditions[best], float(scores[best]), matched, candidates[1:])
+
+    def diagnose(self, symptoms: str, language: str = "en") -> str:
+        """Five-section diagnosis HTML for the symptoms, in the requested language"""
+        started = time.perf_counter()
+        result = self.match(symptoms)
+        html = render_diagnosis(self._sections(result, language))
+        logger.info(
+            f"ℹ️ Fallback diagnosis '{result.condition['id']}' "
+            f"in {(time.perf_counter() - started) * 1000:.2f}ms"
+        )
+        return html
+
+    def _sections(self, result: FallbackMatch, language: str) -> List[Tuple[str, List[Tuple[str, str]]]]:
+        locale = self.locales.get((language or "en").lower(), self.locales["en"])
+        text = locale["text"]
+        condition = result.condition
+        system = locale["systems"][condition["system"]]
+        severity = condition["severity"]
+        medicines = locale["medicines"][condition["id"]]
+        name = locale["conditions"][condition["id"]]
+        confidence = min(_MAX_CONFIDENCE, round(result.score * 100))
+        alternatives = ", ".join(locale["conditions"][a] for a in result.alternatives) or text["no_alternatives"]
+        urgent = condition is self.emergency_condition
+
+        if urgent:
+            relation = text["relation_urgent"].format(matched=", ".join(result.matched))
+        elif result.matched and result.score > 0:
+            relation = text["relation"].format(matched=", ".join(result.matched), condition=name)
+        else:
+            relation = text["relation_none"]
+        if condition["duration_days"]:
+            duration = text["duration"].format(days=condition["duration_days"])
+        else:
+            duration = text["duration_urgent"]
+
+        values = [
+            [
+                text["condition_urgent" if urgent else "condition"].format(condition=name, confidence=confidence),
+                locale["causes"][condition["cause"]],
+                relation,
+                system["name"],
+                locale["severity"][severity],
+                text["uncertainty"].format(alternatives=alternatives)
+            ],
+            [
+                medicines["primary"],
+                medicines["supplement"],
+                medicines["otc"],
+                text["usage"],
+                duration,
+                text["consultation"]
+            ],
+            [
+                text["side_common"],
+                text["side_rare"],
+                text["side_management"],
+                text["side_critical"],
+                text["side_interactions"],
+                text["side_special"]
+            ],
+            [
+                system["food"],
+                system["activity"],
+                text["avoid_interactions"],
+                text["avoid_triggers"],
+                text["avoid_habits"],
+                text["avoid_delay"]
+            ],
+            [
+                locale["visit"][severity],
+                system["tests"],
+                text["monitoring"],
+                system["red_flags"],
+                system["specialist"],
+                text["tools"]
+            ]
+        ]
+        return [
+            (title, list(zip(labels, section_values)))
+            for title, labels, section_values in zip(locale["titles"], locale["labels"], values)
+        ]
+
+# Global fallback engine instance, compiled once at import
+fallback_engine = FallbackDiagnosisEngine.load()
@@ -4,6 +4,9 @@ Firebase service for authentication and Firestore operations
 from firebase_admin import auth, firestore
 from app.database import get_firestore_db, get_firebase_auth
 from app.models.user import User, UserCreate
+from app.services.firestore_repository import firestore_repository
+from app.services.token_verifier import token_verifier
+from app.services.user_directory import user_directory, UserAlreadyExistsError
 from typing import Optional, Dict, Any
 import logging
 
@@ -11,17 +14,17 @@ logger = logging.getLogger(__name__)
 
 class FirebaseService:
     def __init__(self):
-        self.db = get_firestore_db()
         self.auth = get_firebase_auth()
+        self.repository = firestore_repository
+
+    @property
+    def db(self):
+        """Sync Firestore client, resolved lazily since it only exists after startup"""
+        return get_firestore_db()
     
     async def verify_firebase_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify Firebase ID token and return user info"""
-        try:
-            decoded_token = self.auth.verify_id_token(token)
-            return decoded_token
-        except Exception as e:
-            logger.error(f"Error verifying Firebase token: {e}")
-            return None
+        return await token_verifier.verify(token)
     
     async def create_user_in_firestore(self, user_data: UserCreate, firebase_uid: str) -> User:
         """Create user document in Firestore"""
@@ -33,44 +36,57 @@ class FirebaseService:
                 email=user_data.email
             )
             
-            # Save to Firestore
-            user_ref = self.db.collection('users').document(user.id)
-            user_ref.set(user.to_dict())
-            
-            logger.info(f"User created in Firestore: {user.email}")
-            return user
+            return await self.create_user(user)
             
         except Exception as e:
             logger.error(f"Error creating user in Firestore: {e}")
             raise e
     
+    async def create_user(self, user: User) -> User:
+        """Save a new user with its lookup documents; raises UserAlreadyExistsError on a taken email or UID"""
+        await user_directory.create(user.id, user.to_dict())
+        logger.info(f"User created in Firestore: {user.email}")
+        return user
+    
     async def get_user_by_firebase_uid(self, firebase_uid: str) -> Optional[User]:
         """Get user by Firebase UID"""
         try:
-            users_ref = self.db.collection('users')
-            query = users_ref.where('firebase_uid', '==', firebase_uid).limit(1)
-            docs = query.stream()
-            
-            for doc in docs:
-                return User.from_dict(doc.to_dict())
-            
-            return None
+            found = await user_directory.find('firebase_uid', firebase_uid)
+            return User.from_dict(found[1]) if found else None
             
         except Exception as e:
             logger.error(f"Error getting user by Firebase UID: {e}")
             return None
     
+    async def resolve_existing_user(self, firebase_uid: str, email: Optional[str], email_verified: bool) -> Optional[User]:
+        """
+        The user that stopped a Firebase user from being created - the same UID
+        created by a concurrent first login, or a legacy email/password user
+        with the token's email, which is linked to the UID when the token's
+        email is verified. None when the email belongs to another account.
+        """
+        existing = await self.get_user_by_firebase_uid(firebase_uid)
+        if existing:
+            return existing
+        if not email or not email_verified:
+            return None
+        existing = await self.get_user_by_email(email)
+        if existing is None or existing.firebase_uid not in (None, firebase_uid):
+            return None
+        try:
+            await user_directory.update(existing.id, {'firebase_uid': firebase_uid})
+        except UserAlreadyExistsError:
+            # Linked by a concurrent login in the meantime
+            return await self.get_user_by_firebase_uid(firebase_uid)
+        logger.info(f"Linked Firebase UID to existing user: {existing.email}")
+        existing.firebase_uid = firebase_uid
+        return existing
+
     async def get_user_by_email(self, email: str) -> Optional[User]:
         """Get user by email"""
         try:
-            users_ref = self.db.collection('users')
-            query = users_ref.where('email', '==', email).limit(1)
-            docs = query.stream()
-            
-            for doc in docs:
-                return User.from_dict(doc.to_dict())
-            
-            return None
+            found = await user_directory.find('email', email)
+            return User.from_dict(found[1]) if found else None
             
         except Exception as e:
             logger.error(f"Error getting user by email: {e}")
@@ -79,8 +95,7 @@ class FirebaseService:
     async def update_user(self, user_id: str, update_data: Dict[str, Any]) -> bool:
         """Update user document in Firestore"""
         try:
-            user_ref = self.db.collection('users').document(user_id)
-            user_ref.update(update_data)
+            await user_directory.update(user_id, update_data)
             logger.info(f"User updated: {user_id}")
             return True
             
@@ -91,8 +106,7 @@ class FirebaseService:
     async def delete_user(self, user_id: str) -> bool:
         """Delete user document from Firestore"""
         try:
-            user_ref = self.db.collection('users').document(user_id)
-            user_ref.delete()
+            await user_directory.delete(user_id)
             logger.info(f"User deleted: {user_id}")
             return True
             
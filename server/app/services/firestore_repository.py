@@ -0,0 +1,124 @@
+"""
+Firestore repository - non-blocking document access for route handlers on
+the shared async Firestore client
+"""
+from app.database import get_firestore_async_db
+from app.utils.pagination import encode_cursor, decode_cursor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FirestoreRepository:
+    @property
+    def db(self):
+        return get_firestore_async_db()
+
+    @property
+    def available(self) -> bool:
+        return self.db is not None
+
+    def collection(self, name: str):
+        if self.db is None:
+            raise Exception("Firebase not configured")
+        return self.db.collection(name)
+
+    def subcollection(self, name: str, parent_id: str, subcollection: str):
+        return self.collection(name).document(parent_id).collection(subcollection)
+
+    def batch(self):
+        if self.db is None:
+            raise Exception("Firebase not configured")
+        return self.db.batch()
+
+    async def get(self, collection: str, doc_id: str) -> Optional[Dict[str, Any]]:
+        """Document data, or None when it does not exist"""
+        doc = await self.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    async def get_many(self, *keys: Tuple[str, str]) -> List[Optional[Dict[str, Any]]]:
+        """Fetch several (collection, doc_id) documents in one batched read, in the order given"""
+        refs = [self.collection(collection).document(doc_id) for collection, doc_id in keys]
+        found = {}
+        async for doc in self.db.get_all(refs):
+            if doc.exists:
+                found[doc.reference.path] = doc.to_dict()
+        return [found.get(ref.path) for ref in refs]
+
+    async def set(self, collection: str, doc_id: str, data: Dict[str, Any], merge: bool = False):
+        await self.collection(collection).document(doc_id).set(data, merge=merge)
+
+    async def update(self, collection: str, doc_id: str, data: Dict[str, Any]):
+        await self.collection(collection).document(doc_id).update(data)
+
+    async def delete(self, collection: str, doc_id: str):
+        await self.collection(collection).document(doc_id).delete()
+
+    async def find_one(self, collection: str, **equals: Any) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """First document whose fields equal the given values, as (id, data)"""
+        query = self.collection(collection)
+        for field, value in equals.items():
+            query = query.where(field, '==', value)
+        async for doc in query.limit(1).stream():
+            return doc.id, doc.to_dict()
+        return None
+
+    async def add_entry(self, collection: str, parent_id: str, subcollection: str, data: Dict[str, Any]) -> str:
+        """Add a document with a generated id under collection/parent_id/subcollection"""
+        _, ref = await self.subcollection(collection, parent_id, subcollection).add(data)
+        return ref.id
+
+    async def list_entries(
+        self,
+        collection: str,
+        parent_id: str,
+        subcollection: str,
+        order_by: str,
+        limit: Optional[int] = None,
+        descending: bool = True
+    ) -> List[Dict[str, Any]]:
+        """Ordered documents of a subcollection, each with its id"""
+        query = self.subcollection(collection, parent_id, subcollection).order_by(
+            order_by, direction='DESCENDING' if descending else 'ASCENDING'
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return [{**doc.to_dict(), 'id': doc.id} async for doc in query.stream()]
+
+    async def page_entries(
+        self,
+        collection: str,
+        parent_id: str,
+        subcollection: str,
+        order_by: str,
+        limit: int,
+        start_after: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of a subcollection, newest first, with the range filters and
+        cursor pushed down into the query. Returns the entries and the opaque
+        cursor for the next page (None on the last page).
+        """
+        entries = self.subcollection(collection, parent_id, subcollection)
+        query = entries.order_by(order_by, direction='DESCENDING')
+        if start is not None:
+            query = query.where(order_by, '>=', start)
+        if end is not None:
+            query = query.where(order_by, '<=', end)
+        if start_after:
+            cursor = await entries.document(decode_cursor(start_after)).get()
+            if not cursor.exists:
+                return [], None
+            query = query.start_after(cursor)
+
+        # One extra document tells us whether another page exists
+        docs = [doc async for doc in query.limit(limit + 1).stream()]
+        page = [{**doc.to_dict(), 'id': doc.id} for doc in docs[:limit]]
+        next_cursor = encode_cursor(docs[limit - 1].id) if len(docs) > limit else None
+        return page, next_cursor
+
+# Global Firestore repository instance
+firestore_repository = FirestoreRepository()
@@ -0,0 +1,183 @@
+"""
+Quota-aware request scheduler for the Gemini API - token bucket budgets,
+priority queueing and adaptive backoff driven by quota errors
+"""
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+_RETRY_HINT = re.compile(r"retry[^0-9]{0,40}?(\d+(?:\.\d+)?)\s*(ms|s|sec|seconds)?", re.IGNORECASE)
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BATCH = 1
+    BACKGROUND = 2
+
+class GeminiQuotaExceeded(Exception):
+    """Raised when a request cannot be admitted within the queue timeout"""
+    def __init__(self, message: str = "QUOTA_EXCEEDED"):
+        super().__init__(message)
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.level = min(self.capacity, self.level + elapsed * self.refill_per_second)
+            self._updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken from the bucket"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_per_second
+
+    def consume(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Charge (positive) or refund (negative) tokens after the fact"""
+        self.level = min(self.capacity, self.level - delta)
+
+    def remaining(self, now: float) -> float:
+        self._refill(now)
+        return max(0.0, self.level)
+
+class GeminiScheduler:
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        queue_timeout: float,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0
+    ):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self.queue_timeout = queue_timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Heap of [priority, sequence, tokens] waiting for admission
+        self._queue: List[List[Any]] = []
+        self._sequence = itertools.count()
+        self._condition = asyncio.Condition()
+        self._paused_until = 0.0
+        self._consecutive_quota_errors = 0
+
+        self.admitted = 0
+        self.timeouts = 0
+        self.quota_errors = 0
+        self._queue_wait_total = 0.0
+
+    def _delay(self, tokens: float, now: float) -> float:
+        return max(
+            self._paused_until - now,
+            self.requests.time_until(1, now),
+            self.tokens.time_until(tokens, now)
+        )
+
+    async def acquire(self, priority: Priority, tokens: int):
+        """
+        Wait until the request is at the head of the priority queue and both
+        budgets allow it. Raises GeminiQuotaExceeded after the queue timeout.
+        """
+        entry = [int(priority), next(self._sequence), tokens]
+        queued_at = time.monotonic()
+        deadline = queued_at + self.queue_timeout
+
+        async with self._condition:
+            heapq.heappush(self._queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._queue[0] is entry:
+                        delay = self._delay(tokens, now)
+                        if delay <= 0:
+                            heapq.heappop(self._queue)
+                            self.requests.consume(1, now)
+                            self.tokens.consume(tokens, now)
+                            self.admitted += 1
+                            self._queue_wait_total += now - queued_at
+                            self._condition.notify_all()
+                            return
+                    else:
+                        # Not our turn; wake when the head is admitted or gives up
+                        delay = self.queue_timeout
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise GeminiQuotaExceeded()
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout=min(delay, remaining))
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                self._condition.notify_all()
+                raise
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Reconcile the token estimate with the usage reported by the API"""
+        self._consecutive_quota_errors = 0
+        if actual_tokens:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def record_quota_error(self, error: Exception) -> float:
+        """Pause admissions using the error's retry hint or jittered exponential backoff"""
+        self.quota_errors += 1
+        self._consecutive_quota_errors += 1
+
+        delay = self._retry_hint(str(error))
+        if delay is None:
+            exponent = min(self._consecutive_quota_errors - 1, 10)
+            delay = min(self.backoff_max, self.backoff_base * (2 ** exponent))
+        delay = min(self.backoff_max, delay) * random.uniform(1.0, 1.25)
+
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        logger.info(f"ℹ️ Gemini quota hit, pausing new requests for {delay:.1f}s")
+        return delay
+
+    @staticmethod
+    def _retry_hint(message: str) -> Optional[float]:
+        match = _RETRY_HINT.search(message)
+        if not match:
+            return None
+        value = float(match.group(1))
+        return value / 1000.0 if (match.group(2) or "").lower() == "ms" else value
+
+    def get_metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        depth = {p.name.lower(): 0 for p in Priority}
+        for priority, _, _ in self._queue:
+            depth[Priority(priority).name.lower()] += 1
+        return {
+            "queue_depth": len(self._queue),
+            "queue_depth_by_priority": depth,
+            "requests_remaining": round(self.requests.remaining(now), 2),
+            "tokens_remaining": int(self.tokens.remaining(now)),
+            "paused_for_seconds": round(max(0.0, self._paused_until - now), 2),
+            "admitted": self.admitted,
+            "timeouts": self.timeouts,
+            "quota_errors": self.quota_errors,
+            "queue_wait_avg_ms": round(self._queue_wait_total / self.admitted * 1000, 2) if self.admitted else 0.0
+        }
@@ -3,7 +3,18 @@ Gemini AI service for medical diagnosis - matches Node.js Gemini integration
 """
 import google.generativeai as genai
 from app.config import settings
+from app.services.gemini_scheduler import GeminiScheduler, GeminiQuotaExceeded, Priority
+from app.models.diagnosis import StructuredDiagnosis
+from app.utils.diagnosis_html import render_diagnosis, strip_code_fences
+from pydantic import ValidationError
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import json
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +27,187 @@ class GeminiService:
             logger.warning("⚠️ Google API key not configured")
             self.model = None
 
-    async def get_diagnosis(self, symptoms: str, language: str = "en") -> str:
+        # The SDK client is synchronous, so calls run on a dedicated executor
+        # sized to the concurrency cap instead of blocking the event loop
+        self.max_concurrency = max(1, settings.GEMINI_MAX_CONCURRENCY)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="gemini"
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Requests/tokens-per-minute budgets with priority queueing and backoff
+        self.scheduler = GeminiScheduler(
+            requests_per_minute=settings.GEMINI_RPM_LIMIT,
+            tokens_per_minute=settings.GEMINI_TPM_LIMIT,
+            queue_timeout=settings.GEMINI_QUEUE_TIMEOUT_SECONDS
+        )
+        self.max_retries = settings.GEMINI_MAX_RETRIES
+        self.retries = 0
+
+        # "html" has Gemini write the full HTML; "structured" has it return compact
+        # JSON that is validated and rendered into the same HTML layout server-side
+        self.response_mode = settings.GEMINI_RESPONSE_MODE
+        self.structured_fallbacks = 0
+
+        # Queue and call metrics
+        self._in_flight = 0
+        self._waiting = 0
+        self._calls = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._call_time_total = 0.0
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of the limited Gemini call slots, recording queue wait and call time"""
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        queue_wait = time.perf_counter() - queued_at
+        self._queue_wait_total += queue_wait
+        self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+        if queue_wait > 1.0:
+            logger.info(f"ℹ️ Gemini call waited {queue_wait:.2f}s for a free slot")
+
+        self._in_flight += 1
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._calls += 1
+            self._call_time_total += time.perf_counter() - started_at
+            self._semaphore.release()
+
+    @staticmethod
+    def _estimate_tokens(prompt: str) -> int:
+        """Rough prompt + response token estimate used to charge the TPM budget"""
+        return len(prompt) // 4 + settings.GEMINI_EXPECTED_OUTPUT_TOKENS
+
+    @staticmethod
+    def _is_quota_error(e: Exception) -> bool:
+        error_str = str(e)
+        return (
+            isinstance(e, GeminiQuotaExceeded)
+            or "429" in error_str
+            or "quota" in error_str.lower()
+            or "exceeded" in error_str.lower()
+        )
+
+    async def _generate(self, prompt: str, priority: Priority = Priority.INTERACTIVE, **kwargs) -> Any:
+        """
+        Run a Gemini generation off the event loop once the scheduler admits it,
+        retrying quota errors after the scheduler's backoff
+        """
+        estimated_tokens = self._estimate_tokens(prompt)
+        attempt = 0
+        while True:
+            await self.scheduler.acquire(priority, estimated_tokens)
+            try:
+                async with self._slot():
+                    loop = asyncio.get_running_loop()
+                    result = await loop.run_in_executor(
+                        self._executor,
+                        lambda: self.model.generate_content(prompt, **kwargs)
+                    )
+            except Exception as e:
+                if not self._is_quota_error(e):
+                    raise
+                self.scheduler.record_quota_error(e)
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                self.retries += 1
+                continue
+
+            usage = getattr(result, "usage_metadata", None)
+            self.scheduler.record_usage(estimated_tokens, getattr(usage, "total_token_count", None))
+            return result
+
+    async def _generate_stream(self, prompt: str, priority: Priority = Priority.INTERACTIVE) -> AsyncIterator[str]:
+        """Stream Gemini text chunks, iterating the SDK's blocking stream on the executor"""
+        estimated_tokens = self._estimate_tokens(prompt)
+        await self.scheduler.acquire(priority, estimated_tokens)
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        stop = threading.Event()
+
+        def produce():
+            usage = None
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    # The final chunk carries the token counts for the whole response
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    if stop.is_set():
+                        break
+                    text = getattr(chunk, "text", "")
+                    if text:
+                        loop.call_soon_threadsafe(chunks.put_nowait, text)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(chunks.put_nowait, (finished, getattr(usage, "total_token_count", None)))
+
+        actual_tokens = None
+        quota_error = False
+        async with self._slot():
+            producer = loop.run_in_executor(self._executor, produce)
+            try:
+                while True:
+                    item = await chunks.get()
+                    if isinstance(item, tuple) and item[0] is finished:
+                        actual_tokens = item[1]
+                        break
+                    if isinstance(item, Exception):
+                        if self._is_quota_error(item):
+                            quota_error = True
+                            self.scheduler.record_quota_error(item)
+                        raise item
+                    yield item
+            finally:
+                # Stop the producer early if the client went away mid-stream
+                stop.set()
+                await asyncio.shield(producer)
+                while not chunks.empty():
+                    item = chunks.get_nowait()
+                    if isinstance(item, tuple) and item[0] is finished:
+                        actual_tokens = item[1]
+                if not quota_error:
+                    self.scheduler.record_usage(estimated_tokens, actual_tokens)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Concurrency and queue-wait metrics for the Gemini client"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "calls": self._calls,
+            "queue_wait_avg_ms": round(self._queue_wait_total / self._calls * 1000, 2) if self._calls else 0.0,
+            "queue_wait_max_ms": round(self._queue_wait_max * 1000, 2),
+            "call_time_avg_ms": round(self._call_time_total / self._calls * 1000, 2) if self._calls else 0.0,
+            "retries": self.retries,
+            "response_mode": self.response_mode,
+            "structured_fallbacks": self.structured_fallbacks,
+            "scheduler": self.scheduler.get_metrics()
+        }
+
+    def shutdown(self):
+        """Release the Gemini executor threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def get_diagnosis(
+        self,
+        symptoms: str,
+        language: str = "en",
+        priority: Priority = Priority.INTERACTIVE,
+        mode: Optional[str] = None
+    ) -> str:
         """
         Get AI diagnosis from Gemini - matches the Node.js diagnosis logic exactly
         """
@@ -26,6 +217,82 @@ class GeminiService:
         if not symptoms.strip():
             raise ValueError("No symptoms provided")
 
+        target_language = self._language_name(language)
+
+        try:
+            if (mode or self.response_mode) == "structured":
+                response = await self._get_structured_diagnosis(symptoms, target_language, priority)
+            else:
+                result = await self._generate(self._build_prompt(symptoms, target_language), priority)
+                response = result.text
+            
+            if not response:
+                raise Exception("No response from Gemini API")
+            
+            logger.info(f"✅ Gemini diagnosis generated successfully in {target_language}")
+            return response
+            
+        except Exception as e:
+            raise self._translate_error(e)
+
+    async def _get_structured_diagnosis(self, symptoms: str, target_language: str, priority: Priority) -> str:
+        """Generate the diagnosis as JSON and render it into the standard HTML layout"""
+        result = await self._generate(self._build_structured_prompt(symptoms, target_language), priority)
+        try:
+            structured = self.parse_structured(result.text)
+        except (ValueError, ValidationError) as e:
+            # Malformed JSON: fall back to letting Gemini write the HTML directly
+            self.structured_fallbacks += 1
+            logger.warning(f"⚠️ Structured diagnosis failed validation, falling back to HTML mode: {e}")
+            result = await self._generate(self._build_prompt(symptoms, target_language), priority)
+            return result.text
+        return self.render_structured(structured)
+
+    @staticmethod
+    def parse_structured(text: str) -> StructuredDiagnosis:
+        """Parse and validate Gemini's JSON diagnosis"""
+        return StructuredDiagnosis.model_validate(json.loads(strip_code_fences(text).strip()))
+
+    @staticmethod
+    def render_structured(structured: StructuredDiagnosis) -> str:
+        return render_diagnosis(
+            (section.title, [(point.label, point.text) for point in section.points])
+            for section in structured.sections
+        )
+
+    async def stream_diagnosis(self, symptoms: str, language: str = "en") -> AsyncIterator[str]:
+        """
+        Stream an AI diagnosis from Gemini as raw HTML text chunks
+        """
+        if not self.model:
+            raise Exception("Gemini AI not configured")
+
+        if not symptoms.strip():
+            raise ValueError("No symptoms provided")
+
+        target_language = self._language_name(language)
+        prompt = self._build_prompt(symptoms, target_language)
+
+        try:
+            async for chunk in self._generate_stream(prompt):
+                yield chunk
+            logger.info(f"✅ Gemini diagnosis streamed successfully in {target_language}")
+        except Exception as e:
+            raise self._translate_error(e)
+
+    @staticmethod
+    def _translate_error(e: Exception) -> Exception:
+        """Map Gemini client errors onto the QUOTA_EXCEEDED / generic failure contract"""
+        # Check if it's a quota exceeded error
+        if GeminiService._is_quota_error(e):
+            logger.info(f"ℹ️ Gemini API quota temporarily exceeded, switching to fallback system")
+            return Exception("QUOTA_EXCEEDED")
+        else:
+            logger.error(f"❌ Gemini API error: {e}")
+            return Exception("Failed to get diagnosis")
+
+    @staticmethod
+    def _language_name(language: str) -> str:
         # Language mapping
         language_names = {
             'en': 'English',
@@ -34,10 +301,11 @@ class GeminiService:
             'or': 'Odia (ଓଡ଼ିଆ)'
         }
         
-        target_language = language_names.get(language, 'English')
-        
-        # Language-specific prompt with proper instructions
-        prompt = f"""You are a medical assistant. A user reports: "{symptoms}".
+        return language_names.get(language, 'English')
+
+    @staticmethod
+    def _build_prompt(symptoms: str, target_language: str) -> str:
+        return f"""You are a medical assistant. A user reports: "{symptoms}".
 
 Generate a professional HTML response ENTIRELY IN {target_language} language. Use <div> containers and <ol><li> for numbered bullet points. Each section must include exactly 6 points, and each point should begin with a <b>label</b> summarizing its meaning.
 
@@ -73,26 +341,22 @@ Include these 5 sections (translate section titles to {target_language}):
 
 Return ONLY the HTML content in {target_language}. No markdown, no code blocks, no additional text."""
 
-        try:
-            result = self.model.generate_content(prompt)
-            response = result.text
-            
-            if not response:
-                raise Exception("No response from Gemini API")
-            
-            logger.info(f"✅ Gemini diagnosis generated successfully in {target_language}")
-            return response
-            
-        except Exception as e:
-            error_str = str(e)
-            
-            # Check if it's a quota exceeded error
-            if "429" in error_str or "quota" in error_str.lower() or "exceeded" in error_str.lower():
-                logger.info(f"ℹ️ Gemini API quota temporarily exceeded, switching to fallback system")
-                raise Exception("QUOTA_EXCEEDED")
-            else:
-                logger.error(f"❌ Gemini API error: {e}")
-                raise Exception("Failed to get diagnosis")
+    @staticmethod
+    def _build_structured_prompt(symptoms: str, target_language: str) -> str:
+        return f"""You are a medical assistant. A user reports: "{symptoms}".
+
+Respond ENTIRELY IN {target_language} with a single JSON object and nothing else (no markdown, no code fences):
+{{"sections": [{{"title": "<emoji> <title>", "points": [{{"label": "<label>", "text": "<point>"}}]}}]}}
+
+Rules:
+- Exactly 5 sections in this order, titles translated to {target_language} and starting with the emoji:
+  1. 📋 Diagnosis Summary (Condition, Cause, Symptom Relation, Body System, Severity, Uncertainty)
+  2. 💊 Recommended Medicines (Primary Drug, Supplement, OTC, Usage, Duration, Consultation)
+  3. ⚠️ Possible Side Effects (Common, Rare, Management, Critical Signs)
+  4. 🚫 Things to Avoid (Food, Activities, Interactions, Triggers, Habits, Delay)
+  5. 📅 Follow-Up Suggestions (Visit, Tests, Monitoring, Red Flags, Specialists, Tools)
+- Exactly 6 points per section; each label is a short phrase in {target_language} without a trailing colon.
+- Plain text only inside strings, no HTML."""
 
     async def test_ai_connection(self) -> str:
         """Test Gemini AI connection"""
@@ -100,7 +364,7 @@ Return ONLY the HTML content in {target_language}. No markdown, no code blocks,
             raise Exception("Gemini AI not configured")
         
         try:
-            result = self.model.generate_content("Hello, Gemini!")
+            result = await self._generate("Hello, Gemini!", Priority.BACKGROUND)
             return result.text
         except Exception as e:
             logger.error(f"❌ Gemini test failed: {e}")
@@ -0,0 +1,188 @@
+"""
+Outbound mail queue - messages are enqueued without waiting on SMTP and
+delivered by a few worker tasks, each holding one persistent authenticated
+aiosmtplib connection, with exponential backoff on transient failures
+"""
+from app.config import settings
+from email.message import Message
+from typing import Any, Dict, Iterable, List, Optional
+import aiosmtplib
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+class OutboundMail:
+    __slots__ = ("message", "attempts")
+
+    def __init__(self, message: Message):
+        self.message = message
+        self.attempts = 0
+
+def _permanent(error: Exception) -> bool:
+    """5xx replies and refused recipients will fail the same way on retry"""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, aiosmtplib.SMTPResponseException) and 500 <= error.code < 600
+
+class MailQueue:
+    def __init__(
+        self,
+        hostname: Optional[str] = None,
+        port: Optional[int] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        start_tls: Optional[bool] = None
+    ):
+        # Overridable so the queue can be pointed at a local stand-in such as
+        # `python -m aiosmtpd -n -l localhost:8025` (no STARTTLS, no login)
+        self.hostname = hostname or settings.SMTP_SERVER
+        self.port = port or settings.SMTP_PORT
+        self.username = settings.SMTP_EMAIL if username is None else username
+        self.password = settings.SMTP_PASSWORD if password is None else password
+        self.start_tls = settings.SMTP_STARTTLS if start_tls is None else start_tls
+        self.pool_size = max(1, settings.SMTP_POOL_SIZE)
+        self.max_attempts = max(1, settings.SMTP_MAX_ATTEMPTS)
+        self.retry_base = settings.SMTP_RETRY_BASE_SECONDS
+        # Servers drop idle sessions; close ours first rather than finding out on the next send
+        self.idle_timeout = settings.SMTP_IDLE_SECONDS
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=settings.MAIL_QUEUE_SIZE)
+        self._workers: List[asyncio.Task] = []
+        self._retries: List[asyncio.TimerHandle] = []
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.connections = 0
+        self._send_time_total = 0.0
+
+    def enqueue(self, message: Message) -> bool:
+        """Queue a message for delivery; False when the queue is full"""
+        try:
+            self._queue.put_nowait(OutboundMail(message))
+            self.enqueued += 1
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"⚠️ Mail queue full, dropping message to {message['To']}")
+            return False
+
+    def enqueue_many(self, messages: Iterable[Message]) -> int:
+        """Queue several messages; returns how many were accepted"""
+        return sum(self.enqueue(message) for message in messages)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            start_tls=self.start_tls,
+            timeout=settings.SMTP_TIMEOUT_SECONDS
+        )
+        await smtp.connect()
+        if self.username and self.password:
+            await smtp.login(self.username, self.password)
+        self.connections += 1
+        return smtp
+
+    @staticmethod
+    async def _close(smtp: Optional[aiosmtplib.SMTP]):
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _retry(self, mail: OutboundMail, error: Exception):
+        if mail.attempts >= self.max_attempts or _permanent(error):
+            self.failed += 1
+            logger.error(f"❌ Failed to send email to {mail.message['To']} after {mail.attempts} attempts: {error}")
+            return
+        self.retried += 1
+        delay = self.retry_base * (2 ** (mail.attempts - 1)) * random.uniform(0.5, 1.5)
+        logger.warning(f"⚠️ Email to {mail.message['To']} failed ({error}), retrying in {delay:.1f}s")
+        loop = asyncio.get_running_loop()
+        self._retries = [handle for handle in self._retries if not handle.cancelled() and loop.time() < handle.when()]
+        self._retries.append(loop.call_later(delay, self._requeue, mail))
+
+    def _requeue(self, mail: OutboundMail):
+        try:
+            self._queue.put_nowait(mail)
+        except asyncio.QueueFull:
+            self.failed += 1
+            logger.error(f"❌ Mail queue full, giving up on email to {mail.message['To']}")
+
+    async def _worker(self):
+        smtp: Optional[aiosmtplib.SMTP] = None
+        try:
+            while True:
+                if smtp is not None and smtp.is_connected:
+                    try:
+                        mail = await asyncio.wait_for(self._queue.get(), timeout=self.idle_timeout)
+                    except asyncio.TimeoutError:
+                        await self._close(smtp)
+                        smtp = None
+                        continue
+                else:
+                    mail = await self._queue.get()
+
+                mail.attempts += 1
+                started = time.perf_counter()
+                try:
+                    if smtp is None or not smtp.is_connected:
+                        smtp = await self._connect()
+                    await smtp.send_message(mail.message)
+                    self.sent += 1
+                    self._send_time_total += time.perf_counter() - started
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # Start the next message on a fresh session
+                    await self._close(smtp)
+                    smtp = None
+                    self._retry(mail, e)
+                finally:
+                    self._queue.task_done()
+        finally:
+            await self._close(smtp)
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.pool_size)]
+            logger.info(f"✅ Mail queue started ({self.pool_size} SMTP connections)")
+
+    async def stop(self):
+        """Give queued mail a short window to go out, then close every connection"""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=settings.MAIL_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Mail queue stopped with {self._queue.qsize()} messages undelivered")
+        for handle in self._retries:
+            handle.cancel()
+        self._retries = []
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.pool_size,
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "connections_opened": self.connections,
+            "avg_send_ms": round(self._send_time_total / self.sent * 1000, 1) if self.sent else 0.0
+        }
+
+# Global mail queue instance
+mail_queue = MailQueue()
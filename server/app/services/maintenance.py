@@ -0,0 +1,187 @@
+"""
+Background maintenance - periodic garbage collection of TTL'd Firestore data
+(expired OTPs, old connection-test documents, ...) in batched, conditional
+deletes, with per-job run statistics recorded on maintenance/{job}
+"""
+from app.config import settings
+from app.services.firestore_repository import firestore_repository
+from google.api_core.exceptions import FailedPrecondition
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_COLLECTION = 'maintenance'
+# Firestore rejects batched writes with more than 500 operations
+MAX_BATCH_DELETES = 500
+
+class CleanupJob:
+    """Delete documents of a collection whose timestamp field is older than a cutoff"""
+
+    def __init__(self, name: str, collection: str, field: str, cutoff: Callable[[], datetime]):
+        self.name = name
+        self.collection = collection
+        self.field = field
+        self.cutoff = cutoff
+        self.runs = 0
+        self.deleted = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def _status_ref(self):
+        return firestore_repository.collection(MAINTENANCE_COLLECTION).document(self.name)
+
+    async def _delete(self, docs) -> int:
+        """
+        Delete docs only if unchanged since they were read, so a document
+        rewritten in the meantime (e.g. a reissued OTP under the same email)
+        survives. Returns how many were deleted.
+        """
+        def option(doc):
+            return firestore_repository.db.write_option(last_update_time=doc.update_time)
+
+        batch = firestore_repository.batch()
+        for doc in docs:
+            batch.delete(doc.reference, option=option(doc))
+        try:
+            await batch.commit()
+            return len(docs)
+        except FailedPrecondition:
+            pass
+        # A batch fails as a whole, so retry one by one and skip the changed documents
+        deleted = 0
+        for doc in docs:
+            try:
+                await doc.reference.delete(option=option(doc))
+                deleted += 1
+            except FailedPrecondition:
+                pass
+        return deleted
+
+    async def run(self, batch_size: int, max_deletes: int) -> Dict[str, Any]:
+        """
+        Delete expired documents oldest first, batch_size per batched delete,
+        stopping after max_deletes have been examined. Each pass re-queries
+        from the oldest document, so no cursor is needed: deleted documents
+        drop out of the query and rewritten ones no longer match the cutoff.
+        """
+        started = time.perf_counter()
+        cutoff = self.cutoff()
+        status = await firestore_repository.get(MAINTENANCE_COLLECTION, self.name) or {}
+        deleted = examined = batches = 0
+        drained = False
+
+        while examined < max_deletes:
+            query = (
+                firestore_repository.collection(self.collection)
+                .where(self.field, '<', cutoff)
+                .order_by(self.field)
+                .limit(min(batch_size, max_deletes - examined))
+            )
+            docs = [doc async for doc in query.select([self.field]).stream()]
+            if not docs:
+                drained = True
+                break
+
+            deleted += await self._delete(docs)
+            examined += len(docs)
+            batches += 1
+            # Yield to request handlers between batches
+            await asyncio.sleep(0)
+
+        elapsed = time.perf_counter() - started
+        self.runs += 1
+        self.deleted += deleted
+        self.last_run = {
+            "deleted": deleted,
+            "skipped": examined - deleted,
+            "batches": batches,
+            "drained": drained,
+            "run_seconds": round(elapsed, 3),
+            "finished_at": datetime.utcnow()
+        }
+        await self._status_ref().set({
+            'lastRun': self.last_run,
+            'totalDeleted': status.get('totalDeleted', 0) + deleted,
+            'updatedAt': datetime.utcnow()
+        }, merge=True)
+        return self.last_run
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "collection": self.collection,
+            "field": self.field,
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "last_run": self.last_run
+        }
+
+class MaintenanceScheduler:
+    def __init__(self):
+        self.interval = settings.MAINTENANCE_INTERVAL_SECONDS
+        self.batch_size = max(1, min(settings.MAINTENANCE_BATCH_SIZE, MAX_BATCH_DELETES))
+        self.max_deletes = settings.MAINTENANCE_MAX_DELETES_PER_RUN
+        self.jobs: Dict[str, CleanupJob] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.failures = 0
+
+    def register(self, job: CleanupJob):
+        self.jobs[job.name] = job
+
+    async def run_once(self, names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Run the given jobs (all by default) one after another; returns each job's result"""
+        results = {}
+        async with self._lock:
+            for name in names or list(self.jobs):
+                job = self.jobs[name]
+                try:
+                    results[name] = await job.run(self.batch_size, self.max_deletes)
+                    if results[name]["deleted"]:
+                        logger.info(
+                            f"🧹 {name}: deleted {results[name]['deleted']} documents "
+                            f"in {results[name]['run_seconds']}s"
+                        )
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"❌ Maintenance job {name} failed: {e}")
+                    results[name] = {"error": str(e)}
+        return results
+
+    async def _run(self):
+        while True:
+            if firestore_repository.available:
+                await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "batch_size": self.batch_size,
+            "max_deletes_per_run": self.max_deletes,
+            "failures": self.failures,
+            "jobs": {name: job.get_metrics() for name, job in self.jobs.items()}
+        }
+
+# Global maintenance scheduler instance
+maintenance_scheduler = MaintenanceScheduler()
+maintenance_scheduler.register(CleanupJob('expired_otps', 'otps', 'expiresAt', datetime.utcnow))
+maintenance_scheduler.register(CleanupJob(
+    'stale_test_docs', 'test', 'createdAt',
+    lambda: datetime.utcnow() - timedelta(days=settings.MAINTENANCE_TEST_RETENTION_DAYS)
+))
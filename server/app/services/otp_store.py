@@ -0,0 +1,212 @@
+"""
+One-time password store - an in-process map keyed by email with a min-heap
+of expiry times swept in the background, and optional write-through to
+Firestore (otps/{email}) so every worker of a multi-worker deployment can
+verify a code another worker issued
+"""
+from app.config import settings
+from app.services.firestore_repository import firestore_repository
+from app.services.user_directory import index_key
+from google.cloud.firestore import async_transactional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import heapq
+import hmac
+import logging
+import secrets
+import time
+
+logger = logging.getLogger(__name__)
+
+OTP_COLLECTION = 'otps'
+OTP_OK = "ok"
+OTP_INVALID = "invalid"
+OTP_EXPIRED = "expired"
+OTP_LOCKED = "locked"
+
+def _digest(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+class OTPEntry:
+    __slots__ = ("digest", "expires_at", "attempts")
+
+    def __init__(self, digest: str, expires_at: float, attempts: int = 0):
+        self.digest = digest
+        self.expires_at = expires_at
+        self.attempts = attempts
+
+class OTPStore:
+    def __init__(self):
+        self.ttl = settings.OTP_TTL_SECONDS
+        self.max_attempts = settings.OTP_MAX_ATTEMPTS
+        self.write_through = settings.OTP_WRITE_THROUGH
+        self._entries: Dict[str, OTPEntry] = {}
+        # (expires_at, email); superseded codes are skipped when popped
+        self._expiry: List[Tuple[float, str]] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+        self.issued = 0
+        self.verified = 0
+        self.rejected = 0
+        self.locked_out = 0
+        self.swept = 0
+
+    @staticmethod
+    def generate(length: int = 6) -> str:
+        return "".join(secrets.choice("0123456789") for _ in range(length))
+
+    def _persisted(self) -> bool:
+        return self.write_through and firestore_repository.available
+
+    async def issue(self, email: str) -> str:
+        """A fresh code for email, replacing any outstanding one"""
+        email = index_key("email", email)
+        code = self.generate()
+        entry = OTPEntry(_digest(code), time.time() + self.ttl)
+        if self._persisted():
+            await firestore_repository.set(OTP_COLLECTION, email, {
+                'email': email,
+                'otpHash': entry.digest,
+                'attempts': 0,
+                'expiresAt': datetime.utcfromtimestamp(entry.expires_at)
+            })
+        self._remember(email, entry)
+        self.issued += 1
+        return code
+
+    def _remember(self, email: str, entry: OTPEntry):
+        self._entries[email] = entry
+        heapq.heappush(self._expiry, (entry.expires_at, email))
+        if self._expiry[0][1] == email:
+            # New earliest expiry - let the sweeper re-plan its sleep
+            self._wakeup.set()
+
+    def _judge(self, entry: OTPEntry, code: str) -> str:
+        """Outcome of one attempt at entry; counts a wrong guess on the entry"""
+        if entry.expires_at <= time.time():
+            return OTP_EXPIRED
+        if hmac.compare_digest(entry.digest, _digest(code)):
+            return OTP_OK
+        entry.attempts += 1
+        return OTP_LOCKED if entry.attempts >= self.max_attempts else OTP_INVALID
+
+    async def _attempt_persisted(self, email: str, code: str) -> Tuple[str, Optional[OTPEntry]]:
+        """
+        Judge an attempt against the write-through document in one transaction -
+        the attempt counter is bumped, or the code consumed, atomically with the
+        read, so parallel guesses cannot share an attempt or both succeed
+        """
+        ref = firestore_repository.collection(OTP_COLLECTION).document(email)
+
+        @async_transactional
+        async def attempt(transaction) -> Tuple[str, Optional[OTPEntry]]:
+            snapshot = await ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return OTP_INVALID, None
+            data = snapshot.to_dict()
+            entry = OTPEntry(data['otpHash'], data['expiresAt'].timestamp(), data.get('attempts', 0))
+            result = self._judge(entry, code)
+            if result == OTP_INVALID:
+                transaction.update(ref, {'attempts': entry.attempts})
+            else:
+                transaction.delete(ref)
+            return result, entry
+
+        return await attempt(firestore_repository.db.transaction())
+
+    async def verify(self, email: str, code: str) -> str:
+        """
+        Check and consume a code. Returns OTP_OK, OTP_INVALID, OTP_EXPIRED or
+        OTP_LOCKED (too many wrong attempts - the code is discarded).
+        """
+        email = index_key("email", email)
+        if self._persisted():
+            # The document is the source of truth, since the code may have been
+            # issued, reissued or consumed on another worker
+            result, entry = await self._attempt_persisted(email, code)
+            if result == OTP_INVALID and entry is not None:
+                self._remember(email, entry)
+            else:
+                self._entries.pop(email, None)
+        else:
+            # No await between reading and updating the entry, so this is atomic
+            entry = self._entries.get(email)
+            result = OTP_INVALID if entry is None else self._judge(entry, code)
+            if result != OTP_INVALID:
+                self._entries.pop(email, None)
+
+        if result == OTP_OK:
+            self.verified += 1
+        else:
+            self.rejected += 1
+        if result == OTP_LOCKED:
+            self.locked_out += 1
+        return result
+
+    async def sweep(self) -> int:
+        """Drop every expired code; returns how many were removed"""
+        now = time.time()
+        expired = []
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, email = heapq.heappop(self._expiry)
+            entry = self._entries.get(email)
+            # Skip heap items for codes that were consumed or reissued since
+            if entry is not None and entry.expires_at == expires_at:
+                del self._entries[email]
+                expired.append(email)
+        if expired and self._persisted():
+            batch = firestore_repository.batch()
+            for email in expired:
+                batch.delete(firestore_repository.collection(OTP_COLLECTION).document(email))
+            try:
+                await batch.commit()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to delete {len(expired)} expired OTP documents: {e}")
+        self.swept += len(expired)
+        return len(expired)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            delay = self._expiry[0][0] - time.time() if self._expiry else self.ttl
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, delay))
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ OTP sweep failed: {e}")
+
+    def start(self):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "outstanding": len(self._entries),
+            "heap_size": len(self._expiry),
+            "issued": self.issued,
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "locked_out": self.locked_out,
+            "swept": self.swept,
+            "write_through": self.write_through
+        }
+
+# Global OTP store instance
+otp_store = OTPStore()
@@ -0,0 +1,72 @@
+"""
+Password hashing off the event loop - bcrypt runs on a small dedicated thread
+pool (the bcrypt backend releases the GIL while hashing) behind a concurrency
+limit, so a login burst queues here instead of stalling every other request
+"""
+from app.config import settings
+from app.utils.auth import pwd_context
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class PasswordHasher:
+    def __init__(self):
+        self.workers = max(1, settings.PASSWORD_HASH_WORKERS)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        self._semaphore = asyncio.Semaphore(self.workers)
+        self.waiting = 0
+        self.hashes = 0
+        self.verifications = 0
+        self.rehashes = 0
+        self._busy_seconds = 0.0
+
+    async def _run(self, func, *args):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._busy_seconds += time.perf_counter() - started
+            self._semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        """bcrypt hash at the configured cost factor"""
+        self.hashes += 1
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password; on success also returns a replacement hash when the
+        stored one was made with a different cost factor (None otherwise)
+        """
+        self.verifications += 1
+        valid, new_hash = await self._run(pwd_context.verify_and_update, password, hashed)
+        if new_hash:
+            self.rehashes += 1
+        return valid, new_hash
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        operations = self.hashes + self.verifications
+        return {
+            "workers": self.workers,
+            "rounds": settings.BCRYPT_ROUNDS,
+            "waiting": self.waiting,
+            "hashes": self.hashes,
+            "verifications": self.verifications,
+            "rehashes": self.rehashes,
+            "avg_ms": round(self._busy_seconds / operations * 1000, 1) if operations else 0.0
+        }
+
+# Global password hasher instance
+password_hasher = PasswordHasher()
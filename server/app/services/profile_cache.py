@@ -0,0 +1,81 @@
+"""
+Read-through cache for the slices of the complete-profile payload, with
+per-slice invalidation from the profile write routes
+"""
+from app.config import settings
+from app.utils.ttl_cache import TTLCache
+from typing import Any, Dict
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Slice name -> Firestore collection for the single-document slices
+DOCUMENT_SLICES = {
+    "profile": "users",
+    "health": "healthProfiles",
+    "settings": "userSettings"
+}
+QUERY_SLICES = ("activities", "history")
+SLICES = (*DOCUMENT_SLICES, *QUERY_SLICES)
+
+def _sizeof(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+class ProfileCache:
+    def __init__(self):
+        self.cache = TTLCache(
+            maxsize=settings.PROFILE_CACHE_MAX_ENTRIES,
+            ttl=settings.PROFILE_CACHE_TTL_SECONDS,
+            max_bytes=settings.PROFILE_CACHE_MAX_BYTES,
+            sizeof=_sizeof
+        )
+        # Bumped on every invalidation; a read that started before a write
+        # must not put what it loaded back into the cache
+        self.generation = 0
+        self.invalidations = {name: 0 for name in SLICES}
+        self.stale_discards = 0
+        self._served = 0
+        self._served_age_total = 0.0
+        self._served_age_max = 0.0
+
+    def get_slices(self, user_id: str) -> Dict[str, Any]:
+        """Cached slices for a user; missing or expired slices are left out"""
+        found = {}
+        for name in SLICES:
+            entry = self.cache.get_entry((user_id, name))
+            if entry is None:
+                continue
+            value, age = entry
+            found[name] = value
+            self._served += 1
+            self._served_age_total += age
+            self._served_age_max = max(self._served_age_max, age)
+        return found
+
+    def set_slices(self, user_id: str, slices: Dict[str, Any], generation: int):
+        """Store freshly loaded slices unless a write landed while they were loading"""
+        if generation != self.generation:
+            self.stale_discards += 1
+            return
+        for name, value in slices.items():
+            self.cache.set((user_id, name), value)
+
+    def invalidate(self, user_id: str, *names: str):
+        for name in names:
+            self.cache.pop((user_id, name))
+            self.invalidations[name] += 1
+        self.generation += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.cache.stats(),
+            "invalidations": self.invalidations,
+            "stale_discards": self.stale_discards,
+            "served_age_avg_seconds": round(self._served_age_total / self._served, 2) if self._served else 0.0,
+            "served_age_max_seconds": round(self._served_age_max, 2),
+            "ttl_seconds": self.cache.ttl
+        }
+
+# Global profile cache instance
+profile_cache = ProfileCache()
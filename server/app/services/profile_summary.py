@@ -0,0 +1,157 @@
+"""
+Materialized profileSummary/{user_id} documents - everything the profile
+screen shows in one read, kept current by the profile write routes
+"""
+from app.services.firestore_repository import firestore_repository
+from app.services.profile_cache import DOCUMENT_SLICES, SLICES
+from app.utils.server_timing import ServerTiming
+from google.api_core.exceptions import Conflict, FailedPrecondition
+from google.cloud.firestore import async_transactional
+from datetime import datetime
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_COLLECTION = 'profileSummary'
+# How many of the newest entries the summary keeps for each list slice
+LIST_LIMITS = {"activities": 10, "history": 5}
+
+class ProfileSummaryService:
+    def __init__(self):
+        self.reads = 0
+        self.rebuilds = 0
+        self.updates = 0
+        self.superseded = 0
+        self.failures = 0
+
+    def _ref(self, user_id: str):
+        return firestore_repository.collection(SUMMARY_COLLECTION).document(user_id)
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """The summary's slices, or None when no summary has been built yet"""
+        self.reads += 1
+        summary = await firestore_repository.get(SUMMARY_COLLECTION, user_id)
+        if summary is None or any(name not in summary for name in SLICES):
+            return None
+        return {name: summary[name] for name in SLICES}
+
+    async def load_sources(self, user_id: str, timing: Optional[ServerTiming] = None) -> Dict[str, Any]:
+        """
+        Read every slice from its source collections - the point lookups in one
+        batched read with the two subcollection queries running alongside it
+        """
+        timing = timing or ServerTiming()
+        documents, activities, history = await asyncio.gather(
+            timing.measure("documents", firestore_repository.get_many(
+                *[(collection, user_id) for collection in DOCUMENT_SLICES.values()]
+            )),
+            timing.measure("activities", firestore_repository.list_entries(
+                'userActivity', user_id, 'activities', order_by='timestamp', limit=LIST_LIMITS["activities"]
+            )),
+            timing.measure("history", firestore_repository.list_entries(
+                'medicalHistory', user_id, 'entries', order_by='timestamp', limit=LIST_LIMITS["history"]
+            ))
+        )
+        return {**dict(zip(DOCUMENT_SLICES, documents)), "activities": activities, "history": history}
+
+    async def save(self, user_id: str, slices: Dict[str, Any], previous):
+        """
+        Write rebuilt slices only if the summary is unchanged since the
+        previous snapshot was read - created if it did not exist, otherwise
+        updated with a last-update-time precondition
+        """
+        ref = self._ref(user_id)
+        data = {**slices, 'updatedAt': datetime.utcnow()}
+        if not previous.exists:
+            await ref.create(data)
+        else:
+            option = firestore_repository.db.write_option(last_update_time=previous.update_time)
+            await ref.update(data, option=option)
+
+    async def rebuild(self, user_id: str, timing: Optional[ServerTiming] = None) -> Dict[str, Any]:
+        """
+        Rebuild the summary from its sources. If a merge or push hook lands
+        between reading the sources and writing, the rebuilt slices may miss
+        that write, so the summary is dropped for the next read to rebuild
+        instead. The slices read are returned either way.
+        """
+        previous = await self._ref(user_id).get()
+        slices = await self.load_sources(user_id, timing)
+        try:
+            await self.save(user_id, slices, previous)
+            self.rebuilds += 1
+        except (Conflict, FailedPrecondition):
+            self.superseded += 1
+            logger.info(f"ℹ️ Profile summary for {user_id} changed during rebuild, dropping it")
+            await self._ref(user_id).delete()
+        return slices
+
+    async def merge(self, user_id: str, name: str, data: Dict[str, Any]):
+        """
+        Post-write hook for the document slices - mirror the source's merge write
+        into the summary. If no summary exists this leaves a partial document,
+        which get() treats as missing, so the next read rebuilds it.
+        """
+        if not firestore_repository.available:
+            return
+        try:
+            await self._ref(user_id).set({name: data, 'updatedAt': datetime.utcnow()}, merge=True)
+            self.updates += 1
+        except Exception as e:
+            await self.discard(user_id, e)
+
+    async def push(self, user_id: str, name: str, entry: Dict[str, Any]):
+        """Post-write hook for the list slices - prepend the new entry and trim"""
+        await self._apply(user_id, lambda summary: {
+            name: ([entry] + list(summary.get(name) or []))[:LIST_LIMITS[name]]
+        })
+
+    async def _apply(self, user_id: str, change):
+        """
+        Apply a read-modify-write change to an existing summary inside a
+        transaction. A user without a summary gets a full rebuild instead. Any
+        failure drops the summary so the next read rebuilds it rather than
+        serving stale data.
+        """
+        if not firestore_repository.available:
+            return
+        ref = self._ref(user_id)
+
+        @async_transactional
+        async def update(transaction) -> bool:
+            snapshot = await ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return False
+            transaction.update(ref, {**change(snapshot.to_dict()), 'updatedAt': datetime.utcnow()})
+            return True
+
+        try:
+            if await update(firestore_repository.db.transaction()):
+                self.updates += 1
+            else:
+                await self.rebuild(user_id)
+        except Exception as e:
+            await self.discard(user_id, e)
+
+    async def discard(self, user_id: str, error: Exception):
+        """Drop a summary that could not be kept current so the next read rebuilds it"""
+        self.failures += 1
+        logger.warning(f"⚠️ Profile summary update failed for {user_id}: {error}")
+        try:
+            await self._ref(user_id).delete()
+        except Exception:
+            pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "reads": self.reads,
+            "rebuilds": self.rebuilds,
+            "updates": self.updates,
+            "superseded": self.superseded,
+            "failures": self.failures
+        }
+
+# Global profile summary service instance
+profile_summary = ProfileSummaryService()
@@ -0,0 +1,98 @@
+"""
+Diffed profile writes - compare a partial update with the current document
+and write only the fields that changed, skipping no-op autosaves entirely
+"""
+from app.services.firestore_repository import firestore_repository
+from app.services.profile_cache import profile_cache, DOCUMENT_SLICES
+from app.services.profile_summary import profile_summary
+from app.services.user_directory import user_directory
+from datetime import datetime
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+def changed_fields(current: Optional[Dict[str, Any]], update: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The part of update that differs from current. Nested maps are compared
+    field by field, so the result can be merge-written as is; a field missing
+    from current counts as None.
+    """
+    current = current or {}
+    changes = {}
+    for field, value in update.items():
+        existing = current.get(field)
+        if isinstance(value, dict) and isinstance(existing, dict):
+            nested = changed_fields(existing, value)
+            if nested:
+                changes[field] = nested
+        elif value != existing:
+            changes[field] = value
+    return changes
+
+def _merged(current: Optional[Dict[str, Any]], changes: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(current or {})
+    for field, value in changes.items():
+        if isinstance(value, dict) and isinstance(merged.get(field), dict):
+            merged[field] = _merged(merged[field], value)
+        else:
+            merged[field] = value
+    return merged
+
+class ProfileWriter:
+    def __init__(self):
+        self.writes = {name: 0 for name in DOCUMENT_SLICES}
+        self.skipped = {name: 0 for name in DOCUMENT_SLICES}
+        self.fields_written = 0
+
+    async def _current(self, user_id: str, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Current document for the slice, always read from Firestore - another
+        worker may have written since this worker cached it, and diffing
+        against a stale copy would drop fields that really changed
+        """
+        return await firestore_repository.get(DOCUMENT_SLICES[name], user_id)
+
+    async def write(self, user_id: str, name: str, update: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge-write the changed fields of update into the slice's document and
+        keep the summary and cache in step. Returns the fields written, empty
+        when the update changed nothing and no write was made.
+        """
+        generation = profile_cache.generation
+        current = await self._current(user_id, name)
+        changes = changed_fields(current, update)
+        if not changes:
+            self.skipped[name] += 1
+            return {}
+
+        changes['updatedAt'] = datetime.utcnow()
+        if name == 'profile' and 'email' in changes and current is not None:
+            # Moves the usersByEmail entry in the same transaction; raises
+            # UserAlreadyExistsError when the new email belongs to another user
+            await user_directory.update(user_id, changes)
+        else:
+            await firestore_repository.set(DOCUMENT_SLICES[name], user_id, changes, merge=True)
+        await profile_summary.merge(user_id, name, changes)
+        self.writes[name] += 1
+        self.fields_written += len(changes) - 1
+
+        # Keep the written state cached for the next autosave's diff, unless
+        # another write to this worker's cache raced with this one
+        stale = generation != profile_cache.generation
+        profile_cache.invalidate(user_id, name)
+        if not stale:
+            profile_cache.set_slices(user_id, {name: _merged(current, changes)}, profile_cache.generation)
+        return changes
+
+    def get_metrics(self) -> Dict[str, Any]:
+        total = sum(self.writes.values()) + sum(self.skipped.values())
+        return {
+            "writes": self.writes,
+            "skipped": self.skipped,
+            "fields_written": self.fields_written,
+            "skip_ratio": round(sum(self.skipped.values()) / total, 4) if total else 0.0
+        }
+
+# Global profile writer instance
+profile_writer = ProfileWriter()
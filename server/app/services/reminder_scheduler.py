@@ -0,0 +1,565 @@
+"""
+Reminder scheduler - medication, health check-in and appointment reminders
+kept in a min-heap of due times (O(log n) schedule, O(1) lazy cancel),
+persisted to Firestore (reminders/{id}) so they survive restarts, and fired
+in batches - each due reminder claimed in a transaction before it is sent -
+with one email per user through the mail queue
+"""
+from app.config import settings
+from app.services.firestore_repository import firestore_repository
+from app.services.mail_queue import mail_queue
+from app.services.profile_cache import DOCUMENT_SLICES
+from app.utils.email_service import email_service
+from google.cloud.firestore import SERVER_TIMESTAMP, async_transactional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import asyncio
+import heapq
+import logging
+import math
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+REMINDER_COLLECTION = 'reminders'
+KIND_MEDICATION = "medication"
+KIND_HEALTH = "health"
+KIND_APPOINTMENT = "appointment"
+DAY_SECONDS = 86400
+# Firestore rejects write batches larger than this
+_FIRESTORE_BATCH_LIMIT = 500
+# Re-read this much before the change cursor, for writes committed just behind it
+_POLL_OVERLAP = timedelta(seconds=5)
+
+class RemindersDisabledError(Exception):
+    """The user has turned off the notifications this reminder needs"""
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _datetime(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, timezone.utc)
+
+def medication_names(value: Any) -> List[str]:
+    """Medications from the health profile, which stores a list or a comma-separated string"""
+    if not value:
+        return []
+    items = value.split(",") if isinstance(value, str) else [str(item) for item in value]
+    names = [item.strip() for item in items if item.strip()]
+    return [name for name in names if name.lower() not in ("none", "n/a", "-")]
+
+def parse_times(spec: str) -> List[Tuple[int, int]]:
+    """'08:00,20:00' -> [(8, 0), (20, 0)]"""
+    times = []
+    for part in spec.split(","):
+        if part.strip():
+            hour, minute = part.strip().split(":")
+            times.append((int(hour) % 24, int(minute) % 60))
+    return sorted(set(times))
+
+def user_zone(name: Optional[str]) -> ZoneInfo:
+    """The user's time zone, or the configured default when unset or unknown"""
+    try:
+        return ZoneInfo(name or settings.REMINDER_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(settings.REMINDER_TIMEZONE)
+
+def next_daily(hour: int, minute: int, now: float, zone: ZoneInfo) -> float:
+    """Next occurrence of hour:minute local time in zone after now"""
+    today = datetime.fromtimestamp(now, zone).replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if today.timestamp() <= now:
+        # Wall-clock arithmetic, so the time of day holds across DST changes
+        today += timedelta(days=1)
+    return today.timestamp()
+
+def local_time(epoch: float, zone: ZoneInfo) -> Tuple[int, int]:
+    local = datetime.fromtimestamp(epoch, zone)
+    return local.hour, local.minute
+
+class Reminder:
+    __slots__ = ("id", "user_id", "kind", "due", "repeat", "email", "message")
+
+    def __init__(self, id: str, user_id: str, kind: str, due: float, repeat: int, email: str, message: str):
+        self.id = id
+        self.user_id = user_id
+        self.kind = kind
+        self.due = due
+        self.repeat = repeat
+        self.email = email
+        self.message = message
+
+    def same(self, other: Optional["Reminder"]) -> bool:
+        return other is not None and all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def next_due(self, now: float) -> float:
+        """First repeat after now - missed occurrences (e.g. during downtime) are not replayed"""
+        return self.due + self.repeat * max(1, math.ceil((now - self.due) / self.repeat))
+
+    def changes_from(self, stored: "Reminder") -> Dict[str, Any]:
+        """Document fields that differ from the stored reminder - dueAt only when the due time itself moved"""
+        document, previous = self.to_document(), stored.to_document()
+        changes = {field: value for field, value in document.items() if value != previous[field]}
+        changes['updatedAt'] = SERVER_TIMESTAMP
+        return changes
+
+    def to_document(self) -> Dict[str, Any]:
+        return {
+            'userId': self.user_id,
+            'kind': self.kind,
+            'dueAt': _datetime(self.due),
+            'repeatSeconds': self.repeat,
+            'email': self.email,
+            'message': self.message,
+            'updatedAt': SERVER_TIMESTAMP
+        }
+
+    @classmethod
+    def from_document(cls, id: str, data: Dict[str, Any]) -> "Reminder":
+        return cls(
+            id, data['userId'], data['kind'], _epoch(data['dueAt']),
+            data.get('repeatSeconds', 0), data.get('email', ''), data.get('message', '')
+        )
+
+    def to_response(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "dueAt": _datetime(self.due),
+            "repeatSeconds": self.repeat,
+            "message": self.message
+        }
+
+class ReminderScheduler:
+    def __init__(self):
+        self.enabled = settings.REMINDERS_ENABLED
+        self.batch_size = max(1, min(settings.REMINDER_BATCH_SIZE, _FIRESTORE_BATCH_LIMIT))
+        self.poll_interval = settings.REMINDER_POLL_SECONDS
+        self.medication_times = parse_times(settings.REMINDER_MEDICATION_TIMES)
+        self.health_interval = max(1, settings.REMINDER_HEALTH_INTERVAL_DAYS) * DAY_SECONDS
+        self._reminders: Dict[str, Reminder] = {}
+        self._by_user: Dict[str, Set[str]] = {}
+        # (due, id); entries whose reminder was cancelled or rescheduled are skipped when popped
+        self._heap: List[Tuple[float, str]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._cursor: Optional[datetime] = None
+        self._syncs: Set[asyncio.Task] = set()
+
+        self.loaded = 0
+        self.load_failures = 0
+        self.fired = 0
+        self.emails = 0
+        self.dropped = 0
+        self.superseded = 0
+        self.muted = 0
+        self.synced = 0
+        self.compactions = 0
+        self._load_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def _collection(self):
+        return firestore_repository.collection(REMINDER_COLLECTION)
+
+    def _add(self, reminder: Reminder):
+        existing = self._reminders.get(reminder.id)
+        self._reminders[reminder.id] = reminder
+        self._by_user.setdefault(reminder.user_id, set()).add(reminder.id)
+        if existing is not None and existing.due == reminder.due:
+            return
+        heapq.heappush(self._heap, (reminder.due, reminder.id))
+        self._compact()
+        if self._heap[0][1] == reminder.id:
+            # New earliest reminder - let the loop re-plan its sleep
+            self._wakeup.set()
+
+    def _forget(self, reminder_id: str):
+        reminder = self._reminders.pop(reminder_id, None)
+        if reminder is None:
+            return
+        ids = self._by_user.get(reminder.user_id)
+        if ids is not None:
+            ids.discard(reminder_id)
+            if not ids:
+                del self._by_user[reminder.user_id]
+        self._compact()
+
+    def _compact(self):
+        # Cancelled and rescheduled entries stay in the heap until popped; rebuild once they dominate it
+        if len(self._heap) > 2 * len(self._reminders) + 1024:
+            self._heap = [(r.due, r.id) for r in self._reminders.values()]
+            heapq.heapify(self._heap)
+            self.compactions += 1
+
+    def _apply(self, changed: List[Reminder], removed: List[str]):
+        """Mirror persisted changes in this worker's heap when it is the one firing reminders"""
+        if not self.running:
+            return
+        for reminder in changed:
+            self._add(reminder)
+        for reminder_id in removed:
+            self._forget(reminder_id)
+
+    def _desired(
+        self,
+        user_id: str,
+        email: str,
+        notifications: Dict[str, Any],
+        health: Dict[str, Any],
+        existing: Dict[str, Reminder],
+        zone: ZoneInfo,
+        now: float
+    ) -> Dict[str, Reminder]:
+        """
+        Medication and health reminders the user's settings call for, keeping
+        existing due times - except medication reminders no longer at their
+        local time, after a time zone change or a DST shift
+        """
+        desired = {}
+        if not email:
+            return desired
+
+        medications = medication_names(health.get('medications'))
+        if notifications.get('medicationReminders') and medications:
+            message = f"Time to take your medication: {', '.join(medications)}"
+            for hour, minute in self.medication_times:
+                reminder_id = f"{user_id}:{KIND_MEDICATION}:{hour:02d}{minute:02d}"
+                current = existing.get(reminder_id)
+                if current and local_time(current.due, zone) == (hour, minute):
+                    due = current.due
+                else:
+                    due = next_daily(hour, minute, now, zone)
+                desired[reminder_id] = Reminder(reminder_id, user_id, KIND_MEDICATION, due, DAY_SECONDS, email, message)
+
+        if notifications.get('healthReminders'):
+            reminder_id = f"{user_id}:{KIND_HEALTH}"
+            current = existing.get(reminder_id)
+            due = current.due if current and current.repeat == self.health_interval else now + self.health_interval
+            desired[reminder_id] = Reminder(
+                reminder_id, user_id, KIND_HEALTH, due, self.health_interval, email,
+                "Time for your health check-in - review your vitals and health profile"
+            )
+        return desired
+
+    async def _user_state(self, user_id: str) -> Tuple[str, Dict[str, Any], Dict[str, Any], ZoneInfo]:
+        profile, health, user_settings = await firestore_repository.get_many(
+            (DOCUMENT_SLICES['profile'], user_id),
+            (DOCUMENT_SLICES['health'], user_id),
+            (DOCUMENT_SLICES['settings'], user_id)
+        )
+        notifications = (user_settings or {}).get('notifications') or {}
+        zone = user_zone((user_settings or {}).get('timezone'))
+        return (profile or {}).get('email', ''), notifications, health or {}, zone
+
+    async def _stored(self, user_id: str, transaction=None) -> Dict[str, Reminder]:
+        query = self._collection().where('userId', '==', user_id)
+        return {
+            doc.id: Reminder.from_document(doc.id, doc.to_dict())
+            async for doc in query.stream(transaction=transaction)
+        }
+
+    async def sync_user(self, user_id: str) -> int:
+        """
+        Bring a user's stored reminders in line with their notification
+        settings, medications and email. The stored reminders are read and
+        written in one transaction, so a concurrent fire_due claim makes it
+        retry instead of writing back a due time from before the claim, and
+        existing reminders only get their changed fields written. Returns the
+        number of reminder documents written or deleted.
+        """
+        email, notifications, health, zone = await self._user_state(user_id)
+        changed: List[Reminder] = []
+        removed: List[str] = []
+
+        @async_transactional
+        async def apply(transaction):
+            changed.clear()
+            removed.clear()
+            existing = await self._stored(user_id, transaction)
+            desired = self._desired(user_id, email, notifications, health, existing, zone, time.time())
+            for reminder_id, reminder in existing.items():
+                if reminder.kind == KIND_APPOINTMENT:
+                    # Kept while appointment alerts are off (fire_due skips them
+                    # then) and addressed to the current email
+                    desired[reminder_id] = Reminder(
+                        reminder_id, user_id, KIND_APPOINTMENT, reminder.due, 0, email or reminder.email, reminder.message
+                    )
+
+            for reminder_id, reminder in desired.items():
+                current = existing.get(reminder_id)
+                if reminder.same(current):
+                    continue
+                ref = self._collection().document(reminder_id)
+                if current is None:
+                    transaction.set(ref, reminder.to_document())
+                else:
+                    transaction.update(ref, reminder.changes_from(current))
+                changed.append(reminder)
+            for reminder_id in existing:
+                if reminder_id not in desired:
+                    transaction.delete(self._collection().document(reminder_id))
+                    removed.append(reminder_id)
+
+        await apply(firestore_repository.db.transaction())
+        if not changed and not removed:
+            return 0
+        self._apply(changed, removed)
+        self.synced += 1
+        return len(changed) + len(removed)
+
+    def request_sync(self, user_id: str):
+        """Sync a user's reminders in the background after a profile write"""
+        if not firestore_repository.available:
+            return
+        task = asyncio.create_task(self.sync_user(user_id))
+        self._syncs.add(task)
+        task.add_done_callback(self._sync_done)
+
+    def _sync_done(self, task: asyncio.Task):
+        self._syncs.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"⚠️ Reminder sync failed: {task.exception()}")
+
+    async def add_appointment(self, user_id: str, due_at: datetime, message: str) -> Reminder:
+        profile, user_settings = await firestore_repository.get_many(
+            (DOCUMENT_SLICES['profile'], user_id),
+            (DOCUMENT_SLICES['settings'], user_id)
+        )
+        email = (profile or {}).get('email')
+        notifications = (user_settings or {}).get('notifications') or {}
+        if not notifications.get('appointmentAlerts') or not email:
+            raise RemindersDisabledError("Appointment alerts are turned off")
+
+        reminder = Reminder(uuid.uuid4().hex, user_id, KIND_APPOINTMENT, _epoch(due_at), 0, email, message)
+        await firestore_repository.set(REMINDER_COLLECTION, reminder.id, reminder.to_document())
+        self._apply([reminder], [])
+        return reminder
+
+    async def list_user(self, user_id: str) -> List[Reminder]:
+        """A user's pending reminders, soonest first"""
+        stored = await self._stored(user_id)
+        return sorted(stored.values(), key=lambda reminder: reminder.due)
+
+    async def cancel(self, user_id: str, reminder_id: str) -> bool:
+        data = await firestore_repository.get(REMINDER_COLLECTION, reminder_id)
+        if not data or data.get('userId') != user_id:
+            return False
+        await firestore_repository.delete(REMINDER_COLLECTION, reminder_id)
+        self._apply([], [reminder_id])
+        return True
+
+    def _pop_due(self, now: float) -> List[Reminder]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            when, reminder_id = heapq.heappop(self._heap)
+            reminder = self._reminders.get(reminder_id)
+            if reminder is not None and reminder.due == when:
+                due.append(reminder)
+        return due
+
+    async def _appointments_muted(self, reminders: List[Reminder]) -> Set[str]:
+        """Users among the due appointment reminders who have turned appointment alerts off"""
+        user_ids = sorted({r.user_id for r in reminders if r.kind == KIND_APPOINTMENT})
+        if not user_ids:
+            return set()
+        try:
+            documents = await firestore_repository.get_many(
+                *[(DOCUMENT_SLICES['settings'], user_id) for user_id in user_ids]
+            )
+        except Exception as e:
+            # Alerts were on when the appointment was scheduled
+            logger.warning(f"⚠️ Could not read appointment alert settings, sending anyway: {e}")
+            return set()
+        return {
+            user_id
+            for user_id, data in zip(user_ids, documents)
+            if not ((data or {}).get('notifications') or {}).get('appointmentAlerts')
+        }
+
+    async def fire_due(self) -> int:
+        """
+        Send up to batch_size due reminders. Their documents are claimed in
+        one transaction - repeats are moved on and one-offs deleted only if
+        they are still due, so a reminder cancelled, moved or already sent by
+        another worker is skipped - then every claimed reminder of a user goes
+        out in a single email. Appointment reminders of users who have turned
+        appointment alerts off are claimed without being sent. Returns how
+        many heap entries were taken.
+        """
+        now = time.time()
+        due = self._pop_due(now)
+        if not due:
+            return 0
+
+        refs = [self._collection().document(reminder.id) for reminder in due]
+        claimed: List[Reminder] = []
+        missing: List[str] = []
+        moved: List[Reminder] = []
+
+        @async_transactional
+        async def claim(transaction):
+            claimed.clear()
+            missing.clear()
+            moved.clear()
+            async for snapshot in firestore_repository.db.get_all(refs, transaction=transaction):
+                if not snapshot.exists:
+                    missing.append(snapshot.id)
+                    continue
+                current = Reminder.from_document(snapshot.id, snapshot.to_dict())
+                if current.due > now:
+                    moved.append(current)
+                    continue
+                if current.repeat:
+                    current.due = current.next_due(now)
+                    transaction.update(snapshot.reference, {
+                        'dueAt': _datetime(current.due),
+                        'lastSentAt': _datetime(now),
+                        'updatedAt': SERVER_TIMESTAMP
+                    })
+                else:
+                    transaction.delete(snapshot.reference)
+                claimed.append(current)
+
+        try:
+            await claim(firestore_repository.db.transaction())
+        except Exception:
+            for reminder in due:
+                heapq.heappush(self._heap, (reminder.due, reminder.id))
+            raise
+        self.superseded += len(missing) + len(moved)
+
+        # Only claimed reminders are mailed; the claim already moved them on, so
+        # a failed enqueue loses that one email rather than sending it twice
+        muted = await self._appointments_muted(claimed)
+        by_user: Dict[str, List[Reminder]] = {}
+        for reminder in claimed:
+            if reminder.kind == KIND_APPOINTMENT and reminder.user_id in muted:
+                self.muted += 1
+                continue
+            by_user.setdefault(reminder.user_id, []).append(reminder)
+        messages = [
+            email_service.reminder_message(reminders[0].email, [r.message for r in reminders])
+            for reminders in by_user.values()
+        ]
+        accepted = mail_queue.enqueue_many(messages)
+        self.emails += accepted
+        self.dropped += len(messages) - accepted
+
+        for reminder_id in missing:
+            self._forget(reminder_id)
+        for reminder in moved:
+            self._add(reminder)
+        for reminder in claimed:
+            if reminder.repeat:
+                self._add(reminder)
+            else:
+                self._forget(reminder.id)
+        self.fired += len(claimed)
+        return len(due)
+
+    async def _load(self):
+        """Every stored reminder into the heap; changes after this are picked up by polling"""
+        started = time.perf_counter()
+        self._cursor = datetime.now(timezone.utc)
+        async for doc in self._collection().stream():
+            self._add(Reminder.from_document(doc.id, doc.to_dict()))
+        self.loaded = len(self._reminders)
+        self._load_seconds = time.perf_counter() - started
+        logger.info(f"✅ Reminder scheduler loaded {self.loaded} reminders in {self._load_seconds:.1f}s")
+
+    async def _poll_changes(self):
+        """Reminders created or rescheduled by other workers since the last poll"""
+        changes = (
+            self._collection()
+            .where('updatedAt', '>', self._cursor - _POLL_OVERLAP)
+            .order_by('updatedAt')
+        )
+        last = None
+        while True:
+            query = changes.limit(_FIRESTORE_BATCH_LIMIT)
+            if last is not None:
+                query = query.start_after(last)
+            docs = [doc async for doc in query.stream()]
+            for doc in docs:
+                self._add(Reminder.from_document(doc.id, doc.to_dict()))
+            if docs:
+                last = docs[-1]
+                self._cursor = max(self._cursor, last.get('updatedAt'))
+            if len(docs) < _FIRESTORE_BATCH_LIMIT:
+                return
+
+    async def _run(self):
+        # A transient Firestore error at startup must not leave a task that never fires
+        while True:
+            try:
+                await self._load()
+                break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.load_failures += 1
+                logger.error(f"❌ Reminder scheduler failed to load reminders, retrying: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+        while True:
+            self._wakeup.clear()
+            delay = self.poll_interval
+            if self._heap:
+                delay = min(delay, self._heap[0][0] - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, delay))
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self._poll_changes()
+                while await self.fire_due() == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Reminder scheduler failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        # Off by default; claiming keeps extra firing workers from sending duplicates
+        if self.enabled and self._task is None and firestore_repository.available:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        for task in list(self._syncs):
+            task.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": len(self._reminders),
+            "users": len(self._by_user),
+            "heap_size": len(self._heap),
+            "next_due": _datetime(self._heap[0][0]) if self._heap else None,
+            "loaded": self.loaded,
+            "load_seconds": round(self._load_seconds, 3),
+            "load_failures": self.load_failures,
+            "fired": self.fired,
+            "emails": self.emails,
+            "dropped": self.dropped,
+            "superseded": self.superseded,
+            "muted": self.muted,
+            "synced": self.synced,
+            "compactions": self.compactions
+        }
+
+# Global reminder scheduler instance
+reminder_scheduler = ReminderScheduler()
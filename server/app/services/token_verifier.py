@@ -0,0 +1,135 @@
+"""
+Firebase ID token verification with a decoded-token cache and Google signing
+certificates prefetched and refreshed in the background
+"""
+from firebase_admin import auth
+from google.auth import jwt as google_jwt
+from app.config import settings
+from app.utils.ttl_cache import TTLCache
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import httpx
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+FIREBASE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+_DEFAULT_CERT_TTL = 3600.0
+_MIN_REFRESH_INTERVAL = 60.0
+_RETRY_INTERVAL = 30.0
+# Tolerated clock difference when checking iat/exp
+_CLOCK_SKEW_SECONDS = 10
+
+class FirebaseTokenVerifier:
+    def __init__(self):
+        self.project_id = settings.FIREBASE_PROJECT_ID
+        self.cache = TTLCache(maxsize=settings.FIREBASE_TOKEN_CACHE_SIZE, ttl=_DEFAULT_CERT_TTL)
+        self._certs: Dict[str, str] = {}
+        self._certs_expire_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.verifications = 0
+        self.fallback_verifications = 0
+        self.cert_refreshes = 0
+        self.cert_refresh_failures = 0
+
+    @staticmethod
+    def _cache_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    async def refresh_certs(self) -> float:
+        """Fetch the signing certificates; returns how long they may be cached for"""
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            response = await client.get(FIREBASE_CERTS_URL)
+            response.raise_for_status()
+        match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+        max_age = float(match.group(1)) if match else _DEFAULT_CERT_TTL
+
+        self._certs = response.json()
+        self._certs_expire_at = time.monotonic() + max_age
+        self.cert_refreshes += 1
+        return max_age
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                max_age = await self.refresh_certs()
+                # Refresh well before Google rotates them out
+                delay = max(_MIN_REFRESH_INTERVAL, max_age * 0.9)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.cert_refresh_failures += 1
+                logger.warning(f"⚠️ Failed to refresh Firebase signing certificates: {e}")
+                delay = _RETRY_INTERVAL
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    def _decode(self, token: str) -> Dict[str, Any]:
+        """Verify signature and claims the same way firebase_admin.auth.verify_id_token does"""
+        claims = google_jwt.decode(
+            token,
+            certs=self._certs,
+            audience=self.project_id,
+            clock_skew_in_seconds=_CLOCK_SKEW_SECONDS
+        )
+        if claims.get("iss") != f"https://securetoken.google.com/{self.project_id}":
+            raise ValueError("Token has an incorrect issuer")
+        subject = claims.get("sub")
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise ValueError("Token has an invalid subject")
+        claims["uid"] = subject
+        return claims
+
+    async def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """Decoded token claims, or None if the token is invalid or expired"""
+        key = self._cache_key(token)
+        claims = self.cache.get(key)
+        if claims is not None:
+            return claims
+
+        self.verifications += 1
+        try:
+            if self._certs and time.monotonic() < self._certs_expire_at:
+                claims = self._decode(token)
+            else:
+                # Certificates not loaded yet - let the SDK fetch them
+                self.fallback_verifications += 1
+                claims = await asyncio.to_thread(auth.verify_id_token, token)
+        except Exception as e:
+            logger.error(f"Error verifying Firebase token: {e}")
+            return None
+
+        ttl = claims.get("exp", 0) - time.time()
+        if ttl > 0:
+            self.cache.set(key, claims, ttl=ttl)
+        return claims
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.cache.stats(),
+            "verifications": self.verifications,
+            "fallback_verifications": self.fallback_verifications,
+            "cert_refreshes": self.cert_refreshes,
+            "cert_refresh_failures": self.cert_refresh_failures,
+            "certs_valid_for_seconds": round(max(0.0, self._certs_expire_at - time.monotonic()), 1)
+        }
+
+# Global token verifier instance
+token_verifier = FirebaseTokenVerifier()
@@ -0,0 +1,181 @@
+"""
+Key-indexed user lookups - usersByUid/{firebase_uid} and usersByEmail/{email}
+documents pointing at users/{id}, kept consistent with the users collection
+inside transactions and fronted by an in-process LRU of resolved ids
+"""
+from app.config import settings
+from app.services.firestore_repository import firestore_repository
+from app.utils.ttl_cache import TTLCache
+from google.cloud.firestore import async_transactional
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote
+import logging
+
+logger = logging.getLogger(__name__)
+
+USERS_BY_UID = 'usersByUid'
+USERS_BY_EMAIL = 'usersByEmail'
+# Lookup field on the user document -> index collection
+INDEXES = {"firebase_uid": USERS_BY_UID, "email": USERS_BY_EMAIL}
+
+class UserAlreadyExistsError(Exception):
+    """Another user already owns this email or Firebase UID"""
+
+def index_key(field: str, value: str) -> str:
+    """Document id of a lookup entry; emails are lowercased and escaped since ids cannot contain '/'"""
+    if field == "email":
+        value = value.lower().strip()
+    return quote(value, safe="@+")
+
+def index_entries(user_id: str, data: Dict[str, Any]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """(index collection, key) -> lookup document for every indexed field the user has"""
+    return {
+        (collection, index_key(field, data[field])): {"userId": user_id}
+        for field, collection in INDEXES.items()
+        if data.get(field)
+    }
+
+class UserDirectory:
+    def __init__(self):
+        # (field, value) -> users document id. Ids never change, so entries only
+        # go stale when a user is deleted or re-keyed, which pops them here.
+        self.ids = TTLCache(
+            maxsize=settings.USER_LOOKUP_CACHE_SIZE,
+            ttl=settings.USER_LOOKUP_CACHE_TTL_SECONDS
+        )
+        self.index_hits = 0
+        self.index_misses = 0
+        self.query_fallbacks = 0
+        self.repairs = 0
+
+    def _index_ref(self, collection: str, key: str):
+        return firestore_repository.collection(collection).document(key)
+
+    def _user_ref(self, user_id: str):
+        return firestore_repository.collection('users').document(user_id)
+
+    def _forget(self, data: Optional[Dict[str, Any]]):
+        for field in INDEXES:
+            if data and data.get(field):
+                self.ids.pop((field, index_key(field, data[field])))
+
+    async def find(self, field: str, value: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(user id, data) of the user whose field equals value - a memory hit plus one get when warm"""
+        key = index_key(field, value)
+        user_id = self.ids.get((field, key))
+        if user_id is not None:
+            data = await firestore_repository.get('users', user_id)
+            if data is not None and index_key(field, data.get(field) or "") == key:
+                return user_id, data
+            self.ids.pop((field, key))
+
+        index = await firestore_repository.get(INDEXES[field], key)
+        if index is not None:
+            self.index_hits += 1
+            data = await firestore_repository.get('users', index["userId"])
+            if data is not None and index_key(field, data.get(field) or "") == key:
+                self.ids.set((field, key), index["userId"])
+                return index["userId"], data
+        self.index_misses += 1
+
+        if not settings.USER_LOOKUP_QUERY_FALLBACK:
+            return None
+        # Users created before the lookup collections existed - query once and
+        # write the missing entry so the next lookup is a direct get
+        self.query_fallbacks += 1
+        query_value = value.lower().strip() if field == "email" else value
+        found = await firestore_repository.find_one('users', **{field: query_value})
+        if found is None:
+            return None
+        user_id, data = found
+        await firestore_repository.set(INDEXES[field], key, {"userId": user_id})
+        self.repairs += 1
+        self.ids.set((field, key), user_id)
+        return user_id, data
+
+    async def create(self, user_id: str, data: Dict[str, Any]):
+        """Write a new user and its lookup entries atomically, failing if a key is taken"""
+        entries = index_entries(user_id, data)
+        user_ref = self._user_ref(user_id)
+
+        @async_transactional
+        async def create_user(transaction):
+            refs = [self._index_ref(collection, key) for collection, key in entries]
+            async for snapshot in firestore_repository.db.get_all(refs, transaction=transaction):
+                if snapshot.exists:
+                    raise UserAlreadyExistsError(f"{snapshot.reference.parent.id}/{snapshot.id} is taken")
+            transaction.create(user_ref, data)
+            for ref, entry in zip(refs, entries.values()):
+                transaction.set(ref, entry)
+
+        await create_user(firestore_repository.db.transaction())
+
+    async def update(self, user_id: str, update_data: Dict[str, Any]):
+        """Update a user, moving its lookup entries when an indexed field changes"""
+        if not any(field in update_data for field in INDEXES):
+            await firestore_repository.update('users', user_id, update_data)
+            return
+        user_ref = self._user_ref(user_id)
+        previous: Dict[str, Any] = {}
+
+        @async_transactional
+        async def update_user(transaction):
+            snapshot = await user_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                raise ValueError(f"User {user_id} does not exist")
+            current = snapshot.to_dict()
+            old_entries = index_entries(user_id, current)
+            new_entries = index_entries(user_id, {**current, **update_data})
+            added = [(collection, key) for collection, key in new_entries if (collection, key) not in old_entries]
+
+            refs = [self._index_ref(collection, key) for collection, key in added]
+            async for taken in firestore_repository.db.get_all(refs, transaction=transaction):
+                if taken.exists and taken.to_dict().get("userId") != user_id:
+                    raise UserAlreadyExistsError(f"{taken.reference.parent.id}/{taken.id} is taken")
+            transaction.update(user_ref, update_data)
+            for (collection, key) in old_entries:
+                if (collection, key) not in new_entries:
+                    transaction.delete(self._index_ref(collection, key))
+            for ref in refs:
+                transaction.set(ref, {"userId": user_id})
+            previous.clear()
+            previous.update(current)
+
+        await update_user(firestore_repository.db.transaction())
+        self._forget(previous)
+
+    async def delete(self, user_id: str):
+        """Delete a user together with its lookup entries"""
+        user_ref = self._user_ref(user_id)
+        previous: Dict[str, Any] = {}
+
+        @async_transactional
+        async def delete_user(transaction):
+            snapshot = await user_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return
+            current = snapshot.to_dict()
+            refs = [self._index_ref(collection, key) for collection, key in index_entries(user_id, current)]
+            owners = [owner async for owner in firestore_repository.db.get_all(refs, transaction=transaction)]
+            for owner in owners:
+                # Only drop entries that still point at this user
+                if owner.exists and owner.to_dict().get("userId") == user_id:
+                    transaction.delete(owner.reference)
+            transaction.delete(user_ref)
+            previous.clear()
+            previous.update(current)
+
+        await delete_user(firestore_repository.db.transaction())
+        self._forget(previous)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.ids.stats(),
+            "index_hits": self.index_hits,
+            "index_misses": self.index_misses,
+            "query_fallbacks": self.query_fallbacks,
+            "repairs": self.repairs
+        }
+
+# Global user directory instance
+user_directory = UserDirectory()
@@ -0,0 +1,314 @@
+"""
+Vital-signs time series - per-minute readings packed into one document per
+user per day (vitals/{uid}/days/{YYYY-MM-DD}) with hourly rollups beside the
+samples, daily rollups collected per month (vitals/{uid}/months/{YYYY-MM}) and
+the latest value of each metric on vitals/{uid}
+"""
+from app.config import settings
+from app.models.vitals import VitalReading, VITAL_METRICS
+from app.services.firestore_repository import firestore_repository
+from app.utils import vitals_analytics as analytics
+from app.utils.vitals_analytics import Buckets
+from app.utils.pagination import naive_utc
+from google.cloud.firestore import async_transactional
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import re
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VITALS_COLLECTION = 'vitals'
+DAY_FORMAT = "%Y-%m-%d"
+MONTH_FORMAT = "%Y-%m"
+# Day transactions run concurrently per upload, but not unboundedly
+_DAY_WRITE_CONCURRENCY = 8
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_FEET_INCHES = re.compile(r"(\d+(?:\.\d+)?)\s*(?:'|ft\b|feet|foot)\s*(?:(\d+(?:\.\d+)?)\s*(?:\"|''|in\b|inch))?", re.IGNORECASE)
+_INCHES = re.compile(r"(\d+(?:\.\d+)?)\s*(?:\"|''|in\b|inch)", re.IGNORECASE)
+_METRES = re.compile(r"(\d+(?:\.\d+)?)\s*(?:m|metres?|meters?)\b", re.IGNORECASE)
+_POUNDS = re.compile(r"(\d+(?:\.\d+)?)\s*(?:lbs?|pounds?)\b", re.IGNORECASE)
+# Values outside these ranges after unit conversion are typos, not measurements
+_HEIGHT_CM_RANGE = (50.0, 250.0)
+_WEIGHT_KG_RANGE = (2.0, 350.0)
+
+def _epoch(value: datetime) -> float:
+    return naive_utc(value).replace(tzinfo=timezone.utc).timestamp()
+
+def encode_samples(minutes: np.ndarray, values: np.ndarray) -> Dict[str, bytes]:
+    """Minute-of-day offsets as uint16 and values as float32, little-endian"""
+    return {"t": minutes.astype("<u2").tobytes(), "v": values.astype("<f4").tobytes()}
+
+def decode_samples(packed: Optional[Dict[str, bytes]]) -> Tuple[np.ndarray, np.ndarray]:
+    if not packed:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    minutes = np.frombuffer(packed["t"], dtype="<u2").astype(np.int64)
+    values = np.frombuffer(packed["v"], dtype="<f4").astype(np.float64)
+    return minutes, values
+
+def merge_samples(minutes: np.ndarray, values: np.ndarray, new_minutes: np.ndarray, new_values: np.ndarray):
+    """Union of two sample sets sorted by minute; a new reading replaces a stored one for the same minute"""
+    all_minutes = np.concatenate((minutes, new_minutes))
+    all_values = np.concatenate((values, new_values))
+    # np.unique keeps the first occurrence, so search the reversed arrays to keep the last
+    _, first_in_reversed = np.unique(all_minutes[::-1], return_index=True)
+    keep = len(all_minutes) - 1 - first_in_reversed
+    return all_minutes[keep], all_values[keep]
+
+def daily_rollup(hourly: Dict[str, List[Any]]) -> Dict[str, Any]:
+    present = [i for i, count in enumerate(hourly["count"]) if count]
+    return {
+        "count": int(sum(hourly["count"])),
+        "sum": round(float(sum(hourly["sum"])), 4),
+        "min": min(hourly["min"][i] for i in present),
+        "max": max(hourly["max"][i] for i in present)
+    }
+
+def _in_range(value: float, bounds: Tuple[float, float]) -> Optional[float]:
+    return round(value, 1) if bounds[0] <= value <= bounds[1] else None
+
+def parse_height_cm(text: str) -> Optional[float]:
+    """Height in cm from "175 cm", "1.75 m", "5'10\"", "5 ft 10 in" or "70 in"; bare numbers are cm"""
+    feet = _FEET_INCHES.search(text)
+    if feet:
+        return _in_range(float(feet.group(1)) * 30.48 + float(feet.group(2) or 0) * 2.54, _HEIGHT_CM_RANGE)
+    inches = _INCHES.search(text)
+    if inches:
+        return _in_range(float(inches.group(1)) * 2.54, _HEIGHT_CM_RANGE)
+    metres = _METRES.search(text)
+    if metres:
+        return _in_range(float(metres.group(1)) * 100, _HEIGHT_CM_RANGE)
+    number = _NUMBER.search(text)
+    return _in_range(float(number.group()), _HEIGHT_CM_RANGE) if number else None
+
+def parse_weight_kg(text: str) -> Optional[float]:
+    """Weight in kg from "70 kg" or "160 lbs"; bare numbers are kg"""
+    pounds = _POUNDS.search(text)
+    if pounds:
+        return _in_range(float(pounds.group(1)) * 0.45359237, _WEIGHT_KG_RANGE)
+    number = _NUMBER.search(text)
+    return _in_range(float(number.group()), _WEIGHT_KG_RANGE) if number else None
+
+def parse_profile_vitals(health_data: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Numbers out of the health profile's free-text fields ("72 bpm", "120/80",
+    "70 kg", "5'10\""), with height in cm and weight in kg; implausible
+    heights and weights are left out
+    """
+    values = {}
+    match = _NUMBER.search(str(health_data.get("heartRate") or ""))
+    if match:
+        values["heartRate"] = float(match.group())
+    weight = parse_weight_kg(str(health_data.get("weight") or ""))
+    if weight is not None:
+        values["weight"] = weight
+    height = parse_height_cm(str(health_data.get("height") or ""))
+    if height is not None:
+        values["height"] = height
+    pressure = _NUMBER.findall(str(health_data.get("bloodPressure") or ""))
+    if len(pressure) >= 2:
+        values["systolic"], values["diastolic"] = float(pressure[0]), float(pressure[1])
+    return values
+
+class VitalsStore:
+    def __init__(self):
+        self.readings_written = 0
+        self.day_writes = 0
+        self.queries = 0
+        self.documents_read = 0
+
+    def _root(self, user_id: str):
+        return firestore_repository.collection(VITALS_COLLECTION).document(user_id)
+
+    @staticmethod
+    def group_by_day(readings: Iterable[VitalReading]) -> Dict[str, Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+        """day -> metric -> (minute offsets, values), in upload order"""
+        grouped: Dict[str, Dict[str, Tuple[List[int], List[float]]]] = defaultdict(lambda: defaultdict(lambda: ([], [])))
+        for reading in readings:
+            timestamp = naive_utc(reading.timestamp)
+            day = timestamp.strftime(DAY_FORMAT)
+            minute = timestamp.hour * 60 + timestamp.minute
+            for metric in VITAL_METRICS:
+                value = getattr(reading, metric)
+                if value is not None:
+                    minutes, values = grouped[day][metric]
+                    minutes.append(minute)
+                    values.append(value)
+        return {
+            day: {
+                metric: (np.array(minutes, dtype=np.int64), np.array(values, dtype=np.float64))
+                for metric, (minutes, values) in metrics.items()
+            }
+            for day, metrics in grouped.items()
+        }
+
+    async def _append_day(self, user_id: str, day: str, metrics: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        """Merge one day's new samples into its document and refresh the hourly/daily rollups"""
+        root = self._root(user_id)
+        day_ref = root.collection('days').document(day)
+        month_ref = root.collection('months').document(day[:7])
+
+        @async_transactional
+        async def append(transaction):
+            snapshot = await day_ref.get(transaction=transaction)
+            stored = (snapshot.to_dict() or {}).get("samples", {}) if snapshot.exists else {}
+            samples, hourly, daily = {}, {}, {}
+            for metric, (new_minutes, new_values) in metrics.items():
+                minutes, values = merge_samples(*decode_samples(stored.get(metric)), new_minutes, new_values)
+                samples[metric] = encode_samples(minutes, values)
+                hourly[metric] = analytics.rollup(minutes // 60, values, 24)
+                daily[metric] = daily_rollup(hourly[metric])
+            now = datetime.utcnow()
+            transaction.set(day_ref, {
+                "date": day, "samples": samples, "hourly": hourly, "daily": daily, "updatedAt": now
+            }, merge=True)
+            transaction.set(month_ref, {"days": {day[8:]: daily}, "updatedAt": now}, merge=True)
+
+        await append(firestore_repository.db.transaction())
+        self.day_writes += 1
+
+    async def _update_latest(self, user_id: str, readings: List[VitalReading]):
+        latest: Dict[str, Dict[str, Any]] = {}
+        for reading in readings:
+            timestamp = naive_utc(reading.timestamp)
+            for metric in VITAL_METRICS:
+                value = getattr(reading, metric)
+                if value is not None and (metric not in latest or timestamp >= latest[metric]["timestamp"]):
+                    latest[metric] = {"value": value, "timestamp": timestamp}
+        root = self._root(user_id)
+
+        @async_transactional
+        async def update(transaction):
+            snapshot = await root.get(transaction=transaction)
+            current = (snapshot.to_dict() or {}).get("latest", {}) if snapshot.exists else {}
+            newer = {}
+            for metric, entry in latest.items():
+                stored = current.get(metric)
+                if stored is None or naive_utc(stored["timestamp"]) <= entry["timestamp"]:
+                    newer[metric] = entry
+            if newer:
+                transaction.set(root, {"latest": newer, "updatedAt": datetime.utcnow()}, merge=True)
+
+        await update(firestore_repository.db.transaction())
+
+    async def append(self, user_id: str, readings: List[VitalReading]) -> int:
+        """Store readings; returns how many day documents were written"""
+        grouped = self.group_by_day(readings)
+        semaphore = asyncio.Semaphore(_DAY_WRITE_CONCURRENCY)
+
+        async def write(day, metrics):
+            async with semaphore:
+                await self._append_day(user_id, day, metrics)
+
+        await asyncio.gather(*(write(day, metrics) for day, metrics in grouped.items()))
+        await self._update_latest(user_id, readings)
+        self.readings_written += len(readings)
+        return len(grouped)
+
+    async def record_profile_vitals(self, user_id: str, health_data: Dict[str, Any]):
+        """Post-write hook for update_health_profile - keep a reading of the vitals it changed"""
+        values = parse_profile_vitals(health_data)
+        if not values or not firestore_repository.available:
+            return
+        try:
+            reading = VitalReading(timestamp=datetime.utcnow(), **values)
+            await self.append(user_id, [reading])
+        except Exception as e:
+            logger.warning(f"⚠️ Could not record profile vitals for {user_id}: {e}")
+
+    async def latest(self, user_id: str) -> Dict[str, Dict[str, Any]]:
+        root = await firestore_repository.get(VITALS_COLLECTION, user_id)
+        return (root or {}).get("latest", {})
+
+    async def _stream_range(self, user_id: str, subcollection: str, start_id: str, end_id: str, field: str):
+        """Documents of a days/months subcollection with ids in [start_id, end_id], only the given field"""
+        documents = self._root(user_id).collection(subcollection)
+        query = (
+            documents.where('__name__', '>=', documents.document(start_id))
+            .where('__name__', '<=', documents.document(end_id))
+            .order_by('__name__')
+            .select([field])
+        )
+        async for doc in query.stream():
+            self.documents_read += 1
+            yield doc.id, doc.to_dict()
+
+    async def load(self, user_id: str, metric: str, start: datetime, end: datetime, resolution: str) -> Buckets:
+        """A metric over [start, end] as raw readings or hourly/daily rollup buckets"""
+        self.queries += 1
+        start, end = naive_utc(start), naive_utc(end)
+        start_epoch, end_epoch = _epoch(start), _epoch(end)
+        parts: List[Buckets] = []
+
+        if resolution == "day":
+            async for month, data in self._stream_range(
+                user_id, 'months', start.strftime(MONTH_FORMAT), end.strftime(MONTH_FORMAT), 'days'
+            ):
+                for day, metrics in sorted((data.get("days") or {}).items()):
+                    rollup = metrics.get(metric)
+                    if not rollup or not rollup.get("count"):
+                        continue
+                    day_start = _epoch(datetime.strptime(f"{month}-{day}", DAY_FORMAT))
+                    if day_start + 86400 <= start_epoch or day_start > end_epoch:
+                        continue
+                    parts.append(Buckets(
+                        np.array([day_start]), np.array([rollup["count"]], dtype=np.int64),
+                        np.array([rollup["sum"]]), np.array([rollup["min"]]), np.array([rollup["max"]])
+                    ))
+            return analytics.concat(parts)
+
+        field = f"samples.{metric}" if resolution == "raw" else f"hourly.{metric}"
+        async for day, data in self._stream_range(
+            user_id, 'days', start.strftime(DAY_FORMAT), end.strftime(DAY_FORMAT), field
+        ):
+            day_start = _epoch(datetime.strptime(day, DAY_FORMAT))
+            if resolution == "raw":
+                minutes, values = decode_samples((data.get("samples") or {}).get(metric))
+                times = day_start + minutes * 60.0
+                inside = (times >= start_epoch) & (times <= end_epoch)
+                parts.append(analytics.from_samples(times[inside], values[inside]))
+                continue
+
+            rollup = (data.get("hourly") or {}).get(metric)
+            if not rollup:
+                continue
+            count = np.array(rollup["count"], dtype=np.int64)
+            times = day_start + np.arange(24) * 3600.0
+            inside = (count > 0) & (times + 3600 > start_epoch) & (times <= end_epoch)
+            parts.append(Buckets(
+                times[inside], count[inside], np.array(rollup["sum"], dtype=np.float64)[inside],
+                np.array([v if v is not None else np.nan for v in rollup["min"]])[inside],
+                np.array([v if v is not None else np.nan for v in rollup["max"]])[inside]
+            ))
+        return analytics.concat(parts)
+
+    async def height_cm(self, user_id: str) -> Optional[float]:
+        """Latest recorded height, falling back to the health profile's height field"""
+        latest = await self.latest(user_id)
+        if "height" in latest:
+            return float(latest["height"]["value"])
+        health = await firestore_repository.get('healthProfiles', user_id)
+        return parse_profile_vitals(health or {}).get("height")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "readings_written": self.readings_written,
+            "day_writes": self.day_writes,
+            "queries": self.queries,
+            "documents_read": self.documents_read
+        }
+
+def choose_resolution(start: datetime, end: datetime) -> str:
+    """Finest resolution that keeps a query within a bounded number of points and reads"""
+    span = end - start
+    if span <= timedelta(days=settings.VITALS_RAW_MAX_DAYS):
+        return "raw"
+    if span <= timedelta(days=settings.VITALS_HOURLY_MAX_DAYS):
+        return "hour"
+    return "day"
+
+# Global vitals store instance
+vitals_store = VitalsStore()
@@ -5,18 +5,31 @@ from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status
+from fastapi import HTTPException, status, Header
 from app.config import settings
+from app.services.firestore_repository import firestore_repository
+from app.services.token_verifier import token_verifier
+import hmac
+import logging
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Password hashing context. Pinning min/max rounds to the configured cost
+# makes verify_and_update flag hashes made at any other cost for rehashing.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
+    """Verify a password against its hash (blocking - async code uses password_hasher)"""
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Hash a password"""
+    """Hash a password (blocking - async code uses password_hasher)"""
     return pwd_context.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -42,3 +55,70 @@ def verify_token(token: str) -> dict:
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+# Dependency to get current user from Firebase token, shared by every router
+async def get_current_user(authorization: str = Header(None)):
+    """Extract and verify Firebase token from Authorization header"""
+    # Check if we're in development mode (no authorization header)
+    if not authorization or not authorization.startswith("Bearer "):
+        # In development, check if Firebase is properly configured
+        try:
+            if not firestore_repository.available:
+                # Firebase not configured, allow development access
+                logger.warning("Firebase not configured, allowing development access")
+                return {
+                    'uid': 'dev_user_123',
+                    'email': 'dev@arogyaai.com',
+                    'name': 'Development User'
+                }
+        except Exception as e:
+            logger.warning(f"Firebase not available: {e}, allowing development access")
+            return {
+                'uid': 'dev_user_123',
+                'email': 'dev@arogyaai.com',
+                'name': 'Development User'
+            }
+        
+        # Firebase is configured but no token provided
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authorization header required"
+        )
+    
+    token = authorization.split(" ")[1]
+    
+    try:
+        decoded_token = await token_verifier.verify(token)
+    except Exception as e:
+        logger.error(f"Token verification error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token verification failed"
+        )
+    
+    if not decoded_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+    
+    return decoded_token
+
+async def get_optional_user(authorization: Optional[str] = Header(None)) -> Optional[dict]:
+    """Decoded Firebase token when a valid bearer token is sent, otherwise None"""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    return await token_verifier.verify(authorization.split(" ")[1])
+
+async def require_admin_key(x_admin_key: Optional[str] = Header(None)):
+    """Dependency guarding admin endpoints with the X-Admin-Key header"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin API is not configured"
+        )
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin key"
+        )
@@ -0,0 +1,75 @@
+"""
+Helpers for the five-section diagnosis HTML document
+"""
+from html import escape
+from typing import Iterable, List, Tuple
+import re
+
+_SECTION_END = re.compile(r"</div\s*>", re.IGNORECASE)
+_CODE_FENCE = re.compile(r"```(?:html)?", re.IGNORECASE)
+
+def strip_code_fences(html: str) -> str:
+    """Remove markdown code fences the model sometimes wraps around HTML"""
+    return _CODE_FENCE.sub("", html)
+
+class SectionStreamer:
+    """
+    Accumulates streamed diagnosis HTML and releases each section as soon as
+    its closing </div> arrives, so the client can render it immediately
+    """
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        self._buffer += chunk
+        sections = []
+        while True:
+            match = _SECTION_END.search(self._buffer)
+            if match is None:
+                break
+            section = strip_code_fences(self._buffer[:match.end()]).strip()
+            self._buffer = self._buffer[match.end():]
+            if section:
+                sections.append(section)
+        return sections
+
+    def flush(self) -> str:
+        """Return whatever trailing markup is left once the stream ends"""
+        rest = strip_code_fences(self._buffer).strip()
+        self._buffer = ""
+        return rest
+
+def split_sections(html: str) -> List[str]:
+    """Split a complete diagnosis document into its sections"""
+    streamer = SectionStreamer()
+    sections = streamer.feed(html)
+    rest = streamer.flush()
+    if rest:
+        sections.append(rest)
+    return sections
+
+# Precompiled layout matching the HTML template Gemini is asked to produce
+_SECTION_TEMPLATE = (
+    "<hr style='width: 100%; border: none; border-top: 2px solid #f28b82; margin: 2rem 0;'>\n"
+    "\n"
+    "<div>\n"
+    "  <h3 style='font-size:1.1rem; color:#003153; font-weight:bold;'>{title}</h3>\n"
+    "  <hr style='margin: 0.2rem 0 1rem 0; border: none; border-top: 1px solid #ccc;'>\n"
+    "  <ol style='list-style-type: decimal; padding-left: 20px;'>\n"
+    "{items}"
+    "  </ol>\n"
+    "</div>\n"
+).format
+_POINT_TEMPLATE = "    <li><b>{label}:</b> {text}</li>\n".format
+
+def render_section(title: str, points: List[Tuple[str, str]]) -> str:
+    """Render one section from its title and (label, text) points"""
+    items = "".join(
+        _POINT_TEMPLATE(label=escape(label.strip().rstrip(":"), quote=False), text=escape(text.strip(), quote=False))
+        for label, text in points
+    )
+    return _SECTION_TEMPLATE(title=escape(title.strip(), quote=False), items=items)
+
+def render_diagnosis(sections: Iterable[Tuple[str, List[Tuple[str, str]]]]) -> str:
+    """Render the full five-section diagnosis document"""
+    return "\n".join(render_section(title, points) for title, points in sections)
@@ -1,64 +1,74 @@
 """
-Email service utility for sending OTP emails
+Email service utility for sending OTP and reminder emails
 """
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.config import settings
+from app.services.mail_queue import mail_queue
+from html import escape
+from typing import List
 import logging
 
 logger = logging.getLogger(__name__)
 
 class EmailService:
     def __init__(self):
-        self.smtp_server = settings.SMTP_SERVER
-        self.smtp_port = settings.SMTP_PORT
         self.smtp_email = settings.SMTP_EMAIL
-        self.smtp_password = settings.SMTP_PASSWORD
+
+    def build_message(self, to_email: str, subject: str, html: str) -> MIMEMultipart:
+        message = MIMEMultipart()
+        message["From"] = self.smtp_email
+        message["To"] = to_email
+        message["Subject"] = subject
+        message.attach(MIMEText(html, "html"))
+        return message
 
     async def send_otp_email(self, to_email: str, otp: str) -> bool:
         """
-        Send OTP email - matches the Node.js email functionality
+        Send OTP email - matches the Node.js email functionality. Returns once
+        the message is queued; delivery and retries happen on the mail queue.
         """
         try:
-            # Create message
-            message = MIMEMultipart()
-            message["From"] = self.smtp_email
-            message["To"] = to_email
-            message["Subject"] = "Your OTP Code - HALO Healthcare"
-
             # Email body
             body = f"""
             <html>
                 <body>
                     <h2>HALO Healthcare - OTP Verification</h2>
                     <p>Your OTP code is: <strong>{otp}</strong></p>
-                    <p>This code will expire in 5 minutes.</p>
+                    <p>This code will expire in {max(1, settings.OTP_TTL_SECONDS // 60)} minutes.</p>
                     <p>If you didn't request this code, please ignore this email.</p>
                     <br>
                     <p>Best regards,<br>HALO Healthcare Team</p>
                 </body>
             </html>
             """
-            
-            message.attach(MIMEText(body, "html"))
 
-            # Create SMTP session
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()  # Enable security
-            server.login(self.smtp_email, self.smtp_password)
-            
-            # Send email
-            text = message.as_string()
-            server.sendmail(self.smtp_email, to_email, text)
-            server.quit()
-            
-            logger.info(f"✅ OTP email sent successfully to {to_email}")
+            message = self.build_message(to_email, "Your OTP Code - HALO Healthcare", body)
+            if not mail_queue.enqueue(message):
+                return False
+
+            logger.info(f"✅ OTP email queued for {to_email}")
             return True
-            
+
         except Exception as e:
-            logger.error(f"❌ Failed to send OTP email to {to_email}: {e}")
+            logger.error(f"❌ Failed to queue OTP email to {to_email}: {e}")
             return False
 
+    def reminder_message(self, to_email: str, reminders: List[str]) -> MIMEMultipart:
+        """One email listing every reminder due for a user"""
+        items = "".join(f"<li>{escape(text)}</li>" for text in reminders)
+        body = f"""
+            <html>
+                <body>
+                    <h2>HALO Healthcare - Reminders</h2>
+                    <ul>{items}</ul>
+                    <p>You can change which reminders you receive in your profile settings.</p>
+                    <br>
+                    <p>Best regards,<br>HALO Healthcare Team</p>
+                </body>
+            </html>
+            """
+        return self.build_message(to_email, "Your Health Reminders - HALO Healthcare", body)
+
 # Global email service instance
 email_service = EmailService()
@@ -0,0 +1,41 @@
+"""
+Incremental NDJSON reading from a streamed request body
+"""
+from typing import AsyncIterator, Optional, Tuple
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Yield (line_number, line) for every non-blank line as the body arrives.
+    Lines longer than max_line_bytes are yielded as None and not buffered, so
+    memory stays bounded by one line whatever the upload size.
+    """
+    buffer = bytearray()
+    line_number = 0
+    overflow = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not overflow:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        overflow = True
+                        buffer.clear()
+                break
+            line_number += 1
+            if overflow:
+                yield line_number, None
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield line_number, None
+                elif buffer.strip():
+                    yield line_number, bytes(buffer)
+            buffer.clear()
+            overflow = False
+            start = end + 1
+    if overflow:
+        yield line_number + 1, None
+    elif buffer.strip():
+        yield line_number + 1, bytes(buffer)
@@ -0,0 +1,51 @@
+"""
+Opaque cursors for paginated list endpoints
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+import binascii
+
+def encode_cursor(doc_id: str) -> str:
+    return base64.urlsafe_b64encode(doc_id.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> str:
+    """Document id inside a cursor; raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Aware datetimes converted to naive UTC, the form Firestore timestamps are compared in"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def paginate_entries(
+    entries: List[Dict[str, Any]],
+    order_by: str,
+    limit: int,
+    start_after: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    In-memory equivalent of a paginated Firestore query, newest first - used
+    for the development storage fallback
+    """
+    start, end = naive_utc(start), naive_utc(end)
+
+    def in_range(entry: Dict[str, Any]) -> bool:
+        value = naive_utc(entry.get(order_by))
+        return value is not None and (start is None or value >= start) and (end is None or value <= end)
+
+    ordered = sorted(filter(in_range, entries), key=lambda entry: naive_utc(entry[order_by]), reverse=True)
+    if start_after:
+        doc_id = decode_cursor(start_after)
+        ids = [entry.get('id') for entry in ordered]
+        ordered = ordered[ids.index(doc_id) + 1:] if doc_id in ids else []
+    page = ordered[:limit]
+    next_cursor = encode_cursor(page[-1]['id']) if len(ordered) > limit else None
+    return page, next_cursor
@@ -0,0 +1,22 @@
+"""
+Server-Timing header helpers for per-source latency breakdowns
+"""
+from typing import Awaitable, Dict, TypeVar
+import time
+
+T = TypeVar("T")
+
+class ServerTiming:
+    """Collects named durations and renders them as a Server-Timing header"""
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    async def measure(self, name: str, awaitable: Awaitable[T]) -> T:
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.durations[name] = (time.perf_counter() - started) * 1000
+
+    def header(self) -> str:
+        return ", ".join(f"{name};dur={duration:.1f}" for name, duration in self.durations.items())
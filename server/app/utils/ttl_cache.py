@@ -0,0 +1,105 @@
+"""
+In-process LRU cache with per-entry TTL and hit/miss/eviction counters
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import time
+
+class TTLCache:
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        # key -> (value, stored_at, expires_at, size)
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, float, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[2] > time.monotonic()
+
+    def get_entry(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return (value, age_seconds) for a live entry and mark it recently used"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, stored_at, expires_at, _ = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value, now - stored_at
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        if key in self._data:
+            self._remove(key)
+
+        now = time.monotonic()
+        size = self._sizeof(value)
+        self._data[key] = (value, now, now + (self.ttl if ttl is None else ttl), size)
+        self.bytes += size
+        self._evict()
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        if key not in self._data:
+            return default
+        value = self._data[key][0]
+        self._remove(key)
+        return value
+
+    def clear(self) -> int:
+        count = len(self._data)
+        self._data.clear()
+        self.bytes = 0
+        return count
+
+    def _remove(self, key: Hashable):
+        _, _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def _evict(self):
+        while self._data and (
+            len(self._data) > self.maxsize
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,82 @@
+"""
+Vectorised analytics over vital-sign series - rollups, moving averages and
+trends on (count, sum, min, max) buckets, so raw readings and hourly/daily
+rollups go through the same code
+"""
+from typing import Any, Dict, List, NamedTuple, Optional
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+
+class Buckets(NamedTuple):
+    """Parallel arrays, one entry per reading or rollup bucket, in time order"""
+    times: np.ndarray   # epoch seconds (float64)
+    count: np.ndarray   # int64
+    sum: np.ndarray     # float64
+    min: np.ndarray     # float64
+    max: np.ndarray     # float64
+
+def empty_buckets() -> Buckets:
+    return Buckets(*(np.empty(0, dtype=dtype) for dtype in (np.float64, np.int64, np.float64, np.float64, np.float64)))
+
+def from_samples(times: np.ndarray, values: np.ndarray) -> Buckets:
+    """Raw readings as single-sample buckets"""
+    return Buckets(times.astype(np.float64), np.ones(len(values), dtype=np.int64), values, values, values)
+
+def concat(parts: List[Buckets]) -> Buckets:
+    if not parts:
+        return empty_buckets()
+    merged = Buckets(*(np.concatenate(column) for column in zip(*parts)))
+    order = np.argsort(merged.times, kind="stable")
+    return Buckets(*(column[order] for column in merged))
+
+def scale(buckets: Buckets, factor: float) -> Buckets:
+    return buckets._replace(sum=buckets.sum * factor, min=buckets.min * factor, max=buckets.max * factor)
+
+def rollup(groups: np.ndarray, values: np.ndarray, size: int) -> Dict[str, List[Any]]:
+    """count/sum/min/max of values per group index in [0, size); empty groups get None for min/max"""
+    count = np.bincount(groups, minlength=size)
+    total = np.bincount(groups, weights=values, minlength=size)
+    low = np.full(size, np.inf)
+    high = np.full(size, -np.inf)
+    np.minimum.at(low, groups, values)
+    np.maximum.at(high, groups, values)
+    present = count > 0
+    return {
+        "count": count.tolist(),
+        "sum": np.round(total, 4).tolist(),
+        "min": [float(v) if p else None for v, p in zip(low, present)],
+        "max": [float(v) if p else None for v, p in zip(high, present)],
+    }
+
+def moving_average(buckets: Buckets, window: int) -> np.ndarray:
+    """Trailing count-weighted mean over the last window buckets; NaN until the window fills"""
+    result = np.full(len(buckets.times), np.nan)
+    if window < 1 or len(buckets.times) < window:
+        return result
+    sums = np.concatenate(([0.0], np.cumsum(buckets.sum)))
+    counts = np.concatenate(([0], np.cumsum(buckets.count)))
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    result[window - 1:] = window_sums / np.maximum(window_counts, 1)
+    return result
+
+def trend(buckets: Buckets) -> Optional[Dict[str, float]]:
+    """Count-weighted least-squares line through the bucket means"""
+    if len(buckets.times) < 2 or buckets.times[-1] == buckets.times[0]:
+        return None
+    days = (buckets.times - buckets.times[0]) / SECONDS_PER_DAY
+    means = buckets.sum / buckets.count
+    slope, _ = np.polyfit(days, means, 1, w=np.sqrt(buckets.count))
+    return {"slope_per_day": float(slope), "change": float(slope * days[-1])}
+
+def summarize(buckets: Buckets) -> Dict[str, Any]:
+    total = int(buckets.count.sum())
+    if total == 0:
+        return {"count": 0, "mean": None, "min": None, "max": None}
+    return {
+        "count": total,
+        "mean": float(buckets.sum.sum() / total),
+        "min": float(buckets.min.min()),
+        "max": float(buckets.max.max())
+    }
@@ -13,6 +13,15 @@ from pathlib import Path
 # Import configuration and database
 from app.config import settings
 from app.database import connect_to_firebase, close_firebase_connection
+from app.services.gemini_service import gemini_service
+from app.services.diagnosis_cache import diagnosis_cache
+from app.services.diagnosis_history import diagnosis_history
+from app.services.token_verifier import token_verifier
+from app.services.password_hasher import password_hasher
+from app.services.otp_store import otp_store
+from app.services.maintenance import maintenance_scheduler
+from app.services.mail_queue import mail_queue
+from app.services.reminder_scheduler import reminder_scheduler
 
 # Import routes
 from app.routes.auth_routes import router as auth_router
@@ -21,6 +30,10 @@ from app.routes.health_routes import router as health_router
 from app.routes.diagnosis_routes import router as diagnosis_router
 from app.routes.profile_routes import router as profile_router
 from app.routes.maps_routes import router as maps_router
+from app.routes.export_routes import router as export_router
+from app.routes.vitals_routes import router as vitals_router
+from app.routes.maintenance_routes import router as maintenance_router
+from app.routes.reminder_routes import router as reminder_router
 
 # Configure logging
 logging.basicConfig(
@@ -35,6 +48,12 @@ async def lifespan(app: FastAPI):
     # Startup
     try:
         await connect_to_firebase()
+        diagnosis_history.start()
+        token_verifier.start()
+        otp_store.start()
+        maintenance_scheduler.start()
+        mail_queue.start()
+        reminder_scheduler.start()
         logger.info("🚀 FastAPI server starting up...")
         
         # Check Google Maps API configuration
@@ -50,6 +69,15 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    await diagnosis_history.stop()
+    await token_verifier.stop()
+    await otp_store.stop()
+    await maintenance_scheduler.stop()
+    await reminder_scheduler.stop()
+    await mail_queue.stop()
+    gemini_service.shutdown()
+    password_hasher.shutdown()
+    diagnosis_cache.close()
     await close_firebase_connection()
     logger.info("🔌 FastAPI server shutting down...")
 
@@ -129,6 +157,10 @@ app.include_router(health_router)
 app.include_router(diagnosis_router)
 app.include_router(profile_router)
 app.include_router(maps_router)
+app.include_router(export_router)
+app.include_router(vitals_router)
+app.include_router(maintenance_router)
+app.include_router(reminder_router)
 
 # Health check endpoint
 @app.get(
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Build profileSummary documents for existing users
+
+Pages through the users collection and rebuilds each user's summary from
+the source collections, one batch of users at a time. Run from the server
+directory:
+
+    python -m scripts.backfill_profile_summaries --batch-size 50 --only-missing
+"""
+import argparse
+import asyncio
+import time
+
+from app.database import connect_to_firebase, close_firebase_connection
+from app.services.firestore_repository import firestore_repository
+from app.services.profile_summary import profile_summary, SUMMARY_COLLECTION
+
+async def user_id_pages(batch_size: int):
+    """Yield lists of user document ids, batch_size at a time"""
+    last = None
+    while True:
+        query = firestore_repository.collection('users').order_by('__name__').limit(batch_size)
+        if last is not None:
+            query = query.start_after(last)
+        docs = [doc async for doc in query.select([]).stream()]
+        if not docs:
+            return
+        yield [doc.id for doc in docs]
+        last = docs[-1]
+
+async def backfill_batch(user_ids, only_missing: bool) -> int:
+    if only_missing:
+        existing = await firestore_repository.get_many(*[(SUMMARY_COLLECTION, uid) for uid in user_ids])
+        user_ids = [uid for uid, summary in zip(user_ids, existing) if summary is None]
+    await asyncio.gather(*(profile_summary.rebuild(uid) for uid in user_ids))
+    return len(user_ids)
+
+async def main(batch_size: int, only_missing: bool):
+    await connect_to_firebase()
+    started = time.perf_counter()
+    scanned = built = 0
+    try:
+        async for user_ids in user_id_pages(batch_size):
+            scanned += len(user_ids)
+            built += await backfill_batch(user_ids, only_missing)
+            print(f"scanned {scanned} users, built {built} summaries")
+    finally:
+        await close_firebase_connection()
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50, help="Users rebuilt concurrently per batch")
+    parser.add_argument("--only-missing", action="store_true", help="Skip users that already have a summary")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.only_missing))
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark Gemini diagnosis generation in HTML vs structured (JSON) mode
+
+Compares prompt/output token counts and end-to-end latency for a fixed set of
+symptom lists. Requires GOOGLE_API_KEY; run from the server directory:
+
+    python -m scripts.benchmark_diagnosis_modes --runs 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.gemini_service import gemini_service
+
+SAMPLES = [
+    ("fever, cough, headache", "en"),
+    ("stomach pain, nausea, loose motions", "en"),
+    ("fever, body ache, fatigue", "hi"),
+    ("sore throat, runny nose", "pa"),
+]
+
+async def count_tokens(text: str) -> int:
+    result = await asyncio.to_thread(gemini_service.model.count_tokens, text)
+    return result.total_tokens
+
+async def run_once(symptoms: str, language: str, mode: str) -> dict:
+    target_language = gemini_service._language_name(language)
+    if mode == "structured":
+        prompt = gemini_service._build_structured_prompt(symptoms, target_language)
+    else:
+        prompt = gemini_service._build_prompt(symptoms, target_language)
+
+    started = time.perf_counter()
+    result = await gemini_service._generate(prompt)
+    elapsed = time.perf_counter() - started
+    raw_output = result.text
+
+    # Rendering is part of the structured path's cost
+    render_started = time.perf_counter()
+    if mode == "structured":
+        html = gemini_service.render_structured(gemini_service.parse_structured(raw_output))
+    else:
+        html = raw_output
+    render_ms = (time.perf_counter() - render_started) * 1000
+
+    return {
+        "latency_s": elapsed,
+        "render_ms": render_ms,
+        "prompt_tokens": await count_tokens(prompt),
+        "output_tokens": await count_tokens(raw_output),
+        "html_bytes": len(html.encode("utf-8")),
+    }
+
+async def main(runs: int):
+    if not gemini_service.model:
+        raise SystemExit("GOOGLE_API_KEY is not configured")
+
+    print(f"{'mode':<11}{'prompt tok':>11}{'output tok':>11}{'latency s':>11}{'p95 s':>8}{'render ms':>11}{'html KB':>9}")
+    for mode in ("html", "structured"):
+        results = []
+        for symptoms, language in SAMPLES:
+            for _ in range(runs):
+                results.append(await run_once(symptoms, language, mode))
+
+        latencies = sorted(r["latency_s"] for r in results)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"{mode:<11}"
+            f"{statistics.mean(r['prompt_tokens'] for r in results):>11.0f}"
+            f"{statistics.mean(r['output_tokens'] for r in results):>11.0f}"
+            f"{statistics.mean(latencies):>11.2f}"
+            f"{p95:>8.2f}"
+            f"{statistics.mean(r['render_ms'] for r in results):>11.3f}"
+            f"{statistics.mean(r['html_bytes'] for r in results) / 1024:>9.1f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Generations per sample and mode")
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark login password checks inline on the event loop vs on the hashing pool
+
+Runs a burst of concurrent bcrypt verifications both ways and reports login
+throughput for one worker, per-login latency and the longest event-loop
+stall seen meanwhile (how long every other request on the worker would have
+waited). Set BCRYPT_ROUNDS / PASSWORD_HASH_WORKERS to compare settings; run
+from the server directory:
+
+    python -m scripts.benchmark_password_hashing --logins 40 --concurrency 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.config import settings
+from app.services.password_hasher import password_hasher
+from app.utils.auth import pwd_context
+
+PASSWORD = "correct horse battery staple"
+_TICK = 0.005
+
+async def watch_loop(stalls: list, stop: asyncio.Event):
+    """Record how late a short sleep wakes up - the time the loop was blocked"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(_TICK)
+        stalls.append(time.perf_counter() - started - _TICK)
+
+async def inline_login(hashed: str) -> bool:
+    return pwd_context.verify(PASSWORD, hashed)
+
+async def pooled_login(hashed: str) -> bool:
+    valid, _ = await password_hasher.verify_and_update(PASSWORD, hashed)
+    return valid
+
+async def burst(login, hashed: str, logins: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, stalls = [], []
+    stop = asyncio.Event()
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            if not await login(hashed):
+                raise RuntimeError("password check failed")
+            latencies.append(time.perf_counter() - started)
+
+    watcher = asyncio.create_task(watch_loop(stalls, stop))
+    await asyncio.sleep(_TICK)
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await watcher
+
+    return {
+        "logins_per_s": logins / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": sorted(latencies)[max(0, int(len(latencies) * 0.95) - 1)] * 1000,
+        "max_stall_ms": max(stalls, default=0.0) * 1000,
+    }
+
+async def main(logins: int, concurrency: int):
+    hashed = pwd_context.hash(PASSWORD)
+    print(f"bcrypt rounds {settings.BCRYPT_ROUNDS}, {password_hasher.workers} hashing threads, "
+          f"{logins} logins, {concurrency} concurrent")
+    print(f"{'mode':<9}{'logins/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'max loop stall ms':>19}")
+    for mode, login in (("inline", inline_login), ("pooled", pooled_login)):
+        result = await burst(login, hashed, logins, concurrency)
+        print(f"{mode:<9}{result['logins_per_s']:>10.1f}{result['p50_ms']:>9.0f}"
+              f"{result['p95_ms']:>9.0f}{result['max_stall_ms']:>19.1f}")
+    password_hasher.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40, help="Logins in the burst")
+    parser.add_argument("--concurrency", type=int, default=20, help="Logins in flight at once")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
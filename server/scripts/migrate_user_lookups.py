@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Create usersByUid / usersByEmail lookup documents for existing users
+
+Pages through the users collection and writes the lookup entries for each
+page in one batched write. Entries already pointing at another user are
+reported and left alone. Run from the server directory:
+
+    python -m scripts.migrate_user_lookups --batch-size 250 --dry-run
+
+Once it finishes cleanly, set USER_LOOKUP_QUERY_FALLBACK=False.
+"""
+import argparse
+import asyncio
+import time
+
+from app.database import connect_to_firebase, close_firebase_connection
+from app.services.firestore_repository import firestore_repository
+from app.services.user_directory import INDEXES, index_entries
+
+async def user_pages(batch_size: int):
+    """Yield lists of (user id, indexed fields) batch_size at a time"""
+    last = None
+    while True:
+        query = firestore_repository.collection('users').order_by('__name__').limit(batch_size)
+        if last is not None:
+            query = query.start_after(last)
+        docs = [doc async for doc in query.select(list(INDEXES)).stream()]
+        if not docs:
+            return
+        yield [(doc.id, doc.to_dict()) for doc in docs]
+        last = docs[-1]
+
+async def migrate_page(users, dry_run: bool):
+    """Returns (entries written, conflicts) for one page of users"""
+    entries = {}
+    conflicts = 0
+    for user_id, data in users:
+        for (collection, key), entry in index_entries(user_id, data).items():
+            if (collection, key) in entries:
+                conflicts += 1
+                print(f"conflict: {collection}/{key} -> {entries[(collection, key)]['userId']}, also {user_id}")
+                continue
+            entries[(collection, key)] = entry
+    if not entries:
+        return 0, conflicts
+    existing = await firestore_repository.get_many(*entries)
+
+    batch = firestore_repository.batch()
+    written = 0
+    for (collection, key), entry, current in zip(entries, entries.values(), existing):
+        if current is not None:
+            if current.get("userId") != entry["userId"]:
+                conflicts += 1
+                print(f"conflict: {collection}/{key} -> {current.get('userId')}, also {entry['userId']}")
+            continue
+        batch.set(firestore_repository.collection(collection).document(key), entry)
+        written += 1
+    if written and not dry_run:
+        await batch.commit()
+    return written, conflicts
+
+async def main(batch_size: int, dry_run: bool):
+    await connect_to_firebase()
+    started = time.perf_counter()
+    scanned = written = conflicts = 0
+    try:
+        async for users in user_pages(batch_size):
+            scanned += len(users)
+            page_written, page_conflicts = await migrate_page(users, dry_run)
+            written += page_written
+            conflicts += page_conflicts
+            print(f"scanned {scanned} users, {'would write' if dry_run else 'wrote'} {written} entries, {conflicts} conflicts")
+    finally:
+        await close_firebase_connection()
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    # Two lookup entries per user, and a batched write takes at most 500 operations
+    parser.add_argument("--batch-size", type=int, default=250, help="Users migrated per batched write (max 250)")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be written without writing")
+    args = parser.parse_args()
+    if not 1 <= args.batch_size <= 250:
+        parser.error("--batch-size must be between 1 and 250")
+    asyncio.run(main(args.batch_size, args.dry_run))
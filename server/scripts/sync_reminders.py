@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Schedule reminders for existing users from their stored settings
+
+Reminders are normally synced whenever a user changes their notification
+settings, medications or email. This pages through userSettings and syncs
+every user with a reminder flag turned on, so accounts created before the
+reminder scheduler existed get their reminders too. Run from the server
+directory:
+
+    python -m scripts.sync_reminders --batch-size 100
+"""
+import argparse
+import asyncio
+import time
+
+from app.database import connect_to_firebase, close_firebase_connection
+from app.services.firestore_repository import firestore_repository
+from app.services.profile_cache import DOCUMENT_SLICES
+from app.services.reminder_scheduler import reminder_scheduler
+
+FLAGS = ("medicationReminders", "healthReminders", "appointmentAlerts")
+
+async def settings_pages(batch_size: int):
+    """Yield lists of (user id, notification settings) batch_size at a time"""
+    last = None
+    while True:
+        query = firestore_repository.collection(DOCUMENT_SLICES['settings']).order_by('__name__').limit(batch_size)
+        if last is not None:
+            query = query.start_after(last)
+        docs = [doc async for doc in query.select(['notifications']).stream()]
+        if not docs:
+            return
+        yield [(doc.id, (doc.to_dict() or {}).get('notifications') or {}) for doc in docs]
+        last = docs[-1]
+
+async def main(batch_size: int):
+    await connect_to_firebase()
+    started = time.perf_counter()
+    scanned = synced = written = 0
+    try:
+        async for page in settings_pages(batch_size):
+            scanned += len(page)
+            user_ids = [user_id for user_id, notifications in page if any(notifications.get(flag) for flag in FLAGS)]
+            results = await asyncio.gather(*(reminder_scheduler.sync_user(user_id) for user_id in user_ids))
+            synced += len(user_ids)
+            written += sum(results)
+            print(f"scanned {scanned} users, synced {synced}, wrote {written} reminder documents")
+    finally:
+        await close_firebase_connection()
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=100, help="Users synced concurrently per page")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    asyncio.run(main(args.batch_size))